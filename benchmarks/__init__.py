@@ -0,0 +1 @@
+"""Бенчмарки горячего пути бота. Запуск из корня репозитория: `python -m benchmarks.<имя>`."""
@@ -0,0 +1,97 @@
+"""Разбор страницы ленты: прежний путь (`resp.json()` + словари) против декодера `codec` и `Order`.
+
+Страницы — заказы из записанных ответов `api.txt` (полный `orderDataFragment`
+сайта и только поля, которые запрашивает бот) и синтетические страницы того же
+формата. Для каждого установленного декодера меряются разбор тела, путь до
+отсортированного списка `Order` и он же вместе с чтением полей заказа (как при
+записи истории) — `.get()`‑цепочки прежнего пути против атрибутов `Order`.
+
+Запуск: `python -m benchmarks.bench_decode`
+"""
+from __future__ import annotations
+
+import json
+from typing import Dict, List
+
+from sloggers.bot.filters import BASE_ORDER_FIELDS
+from sloggers.core.orders import by_creation, parse_orders
+from sloggers.network import codec
+
+from .common import bench, make_orders
+from .mock_graphql import recorded_orders
+
+
+def page_body(orders: List[dict]) -> bytes:
+    """Тело ответа ленты, как его присылает сайт."""
+    data = {"data": {"auctionFilteredCount": len(orders), "orders": {"total": len(orders), "captcha": False, "orders": orders}}}
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def _int(value, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def legacy(body: bytes) -> list:
+    """Прежний путь: `resp.json()` (декодирование в str + json.loads) и сортировка словарей лямбдой."""
+    orders = json.loads(body.decode("utf-8")).get("data", {}).get("orders", {}).get("orders", [])
+    orders.sort(key=lambda x: x.get("creation", 0), reverse=True)
+    return orders
+
+
+def legacy_fields(orders: list) -> list:
+    """Чтение полей словаря — как прежняя запись истории."""
+    return [
+        (_int(o.get("id"), -1), _int(o.get("creation")), _int((o.get("type") or {}).get("id")),
+         _int((o.get("category") or {}).get("id")), _int(o.get("budget")), _int(o.get("recommendedBudget")),
+         _int(o.get("countOffers")))
+        for o in orders
+    ]
+
+
+def fields(orders: list) -> list:
+    return [
+        (o.id, o.creation, o.type_id, o.category_id, o.budget, o.recommended_budget, o.count_offers)
+        for o in orders
+    ]
+
+
+def main() -> None:
+    recorded = recorded_orders()
+    pages: Dict[str, bytes] = {}
+    if recorded:
+        page = (recorded * (30 // len(recorded) + 1))[:30]
+        pages["api.txt, весь фрагмент"] = page_body(page)
+        pages["api.txt, поля бота"] = page_body([{k: v for k, v in o.items() if k in BASE_ORDER_FIELDS} for o in page])
+    pages["синтетика, 30"] = page_body(make_orders(30))
+    pages["синтетика, 300"] = page_body(make_orders(300))
+
+    decoders = codec.available()
+    print(f"декодеры: {', '.join(decoders)} (используется {codec.BACKEND})")
+    for name, body in pages.items():
+        number = max(1, 300_000 // len(body))
+        t_legacy = bench(lambda: legacy(body), number=number)
+        t_legacy_all = bench(lambda: legacy_fields(legacy(body)), number=number)
+        print(
+            f"{name} — {len(body) / 1024:.0f} КБ: прежний путь {t_legacy * 1e6:8.1f} мкс | "
+            f"с чтением полей {t_legacy_all * 1e6:8.1f} мкс"
+        )
+        for label, loads in decoders.items():
+            def fast(loads=loads) -> list:
+                orders = parse_orders(loads(body).get("data", {}).get("orders", {}).get("orders", ()))
+                orders.sort(key=by_creation, reverse=True)
+                return orders
+            assert [str(o.id) for o in fast()] == [o["id"] for o in legacy(body)]
+            t_decode = bench(lambda: loads(body), number=number)
+            t_fast = bench(fast, number=number)
+            t_fast_all = bench(lambda: fields(fast()), number=number)
+            print(
+                f"    {label:8s} разбор {t_decode * 1e6:8.1f} мкс | до Order {t_fast * 1e6:8.1f} мкс | "
+                f"с чтением полей {t_fast_all * 1e6:8.1f} мкс | ускорение x{t_legacy_all / t_fast_all:4.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Микробенчмарк локальных фильтров: прежняя функция против скомпилированного фильтра.
+
+Запуск: `python -m benchmarks.bench_filters`
+"""
+from __future__ import annotations
+
+from typing import List
+
+from sloggers.bot.filters import compile_filters
+from sloggers.core.orders import parse_orders
+
+from .common import CATEGORY_IDS, bench, make_orders
+
+
+def legacy_order_passes_local_filters(order: dict, settings: dict) -> bool:
+    """Копия прежней реализации (до компиляции фильтров) — для сравнения."""
+    f = settings.get("filters", {})
+    types: List[str] = [str(x) for x in f.get("types", [])]
+    categories: List[str] = [str(x) for x in f.get("categories", [])]
+
+    if types:
+        t_id = str(order.get("type", {}).get("id"))
+        if t_id and t_id not in types:
+            return False
+    if categories:
+        c_id = str(order.get("category", {}).get("id"))
+        if c_id and c_id not in categories:
+            return False
+    return True
+
+
+def legacy_page(orders: List[dict], settings: dict) -> List[dict]:
+    """Прежний горячий путь: фильтр по ID + проверка «без откликов» в цикле опроса."""
+    out = []
+    for order in orders:
+        if not legacy_order_passes_local_filters(order, settings):
+            continue
+        if order.get("countOffers", 99) > 0 and settings.get("filters", {}).get("noBids", True):
+            continue
+        out.append(order)
+    return out
+
+
+def main() -> None:
+    settings = {
+        "filters": {
+            # Как в api.txt: почти все типы и большой список предметов
+            "types": ["2", "21", "5", "3", "6", "1", "7", "4", "9", "11"],
+            "categories": CATEGORY_IDS[:150],
+            "noBids": True,
+            "less3bids": True,
+            "contractual": True,
+        }
+    }
+    compiled = compile_filters(settings)
+    for page_size in (30, 300, 3000):
+        orders = make_orders(page_size)
+        # Прежний путь работал со словарями ответа, нынешний — с разобранными `Order`
+        records = parse_orders(orders)
+        assert [o["id"] for o in legacy_page(orders, settings)] == [str(o.id) for o in compiled.filter_batch(records)]
+        number = max(1, 30000 // page_size)
+        t_legacy = bench(lambda: legacy_page(orders, settings), number=number)
+        t_single = bench(lambda: [o for o in records if compiled.matches(o)], number=number)
+        t_batch = bench(lambda: compiled.filter_batch(records), number=number)
+        t_compile = bench(lambda: compile_filters(settings), number=100)
+        print(
+            f"страница {page_size:5d}: прежний {t_legacy * 1e6:9.1f} мкс | matches() {t_single * 1e6:9.1f} мкс | "
+            f"filter_batch() {t_batch * 1e6:9.1f} мкс | ускорение x{t_legacy / t_batch:4.1f} | компиляция {t_compile * 1e6:.1f} мкс"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""История бота на миллионе заказов: скорость записи страницами и сводок.
+
+Запуск: `python -m benchmarks.bench_history [число_заказов]` (база — во временной папке).
+"""
+from __future__ import annotations
+
+import copy
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sloggers.core.database import Database
+from sloggers.core.history import HistoryStore
+from sloggers.core.orders import Order, parse_orders
+
+from .common import make_orders
+
+
+def main() -> None:
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    page = 30
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(Path(tmp) / "bench.db")
+        store = HistoryStore("bench", db=db)
+        template = parse_orders(make_orders(page * 10))
+        rng = random.Random(3)
+        now = time.time() - 30 * 86400
+        step = 30 * 86400 / total  # заказы равномерно за 30 дней
+        t0 = time.perf_counter()
+        written = 0
+        while written < total:
+            orders = []
+            for j in range(page):
+                o = copy.copy(template[(written + j) % len(template)])
+                o.id = written + j
+                orders.append(o)
+            matched = [o.id for o in orders if rng.random() < 0.2]
+            store.record_seen(orders, matched, now=now + written * step)
+            for oid in matched[:1]:
+                store.record_bid(Order(oid, creation=int(now + written * step) - 5), 900, now=now + written * step)
+            written += page
+        t_write = time.perf_counter() - t0
+        size_mb = (Path(tmp) / "bench.db").stat().st_size / 2**20
+        print(f"записано {written} заказов страницами по {page}: {t_write:.1f} с "
+              f"({t_write / (written / page) * 1e3:.2f} мс на страницу), база {size_mb:.0f} МБ")
+        for by in (None, "type", "category", "hour"):
+            for label, since in (("7 дней", time.time() - 7 * 86400), ("всё", None)):
+                t0 = time.perf_counter()
+                rows = store.aggregate(by, since)
+                print(f"сводка {by or 'итог':9s} за {label:6s}: {len(rows):4d} строк, {(time.perf_counter() - t0) * 1e3:8.1f} мс")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
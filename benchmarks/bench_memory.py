@@ -0,0 +1,105 @@
+"""Память аккаунта за недели работы: индекс увиденных, кэш ответов и записи заказов.
+
+Прогон проматывает `days` суток ленты (`per_day` новых заказов в сутки,
+страницами по 30) через те же структуры, что держит движок: разбор в `Order`,
+индекс увиденных (`SeenOrderIndex`, база — во временной папке) и кэш ответов
+`getOrderForBid` (`ResponseCache` с модельным временем). После каждых суток
+печатается, сколько памяти Python удерживают эти структуры (tracemalloc): при
+ограниченном индексе и чистке кэша цифра выходит на плато и дальше не растёт.
+
+Запуск: `python -m benchmarks.bench_memory [суток] [заказов_в_сутки]`
+"""
+from __future__ import annotations
+
+import asyncio
+import gc
+import random
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import List
+
+from sloggers.bot.seen_index import SeenOrderIndex
+from sloggers.core.database import Database
+from sloggers.core.orders import parse_orders
+from sloggers.network.coalesce import ResponseCache, cache_key
+
+from .common import make_order
+
+PAGE = 30
+ENDPOINT = "http://bench/graphql"
+
+
+def retained_kib() -> float:
+    """Сколько КиБ сейчас удерживает процесс по данным tracemalloc (после сборки мусора)."""
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] / 1024
+
+
+def record_sizes(n: int = 1000) -> None:
+    """Сколько памяти занимают `n` заказов словарями ответа и записями `Order`."""
+    rng = random.Random(5)
+    tracemalloc.start()
+    base = retained_kib()
+    raw = [make_order(rng, 11_700_000 + i, 1_760_000_000) for i in range(n)]
+    as_dicts = retained_kib() - base
+    orders = parse_orders(raw)
+    for o in orders:
+        o.description = ""  # как после решения фильтра
+    del raw
+    as_orders = retained_kib() - base
+    tracemalloc.stop()
+    print(f"{n} заказов: словари ответа {as_dicts:8.0f} КиБ | Order {as_orders:6.0f} КиБ "
+          f"({as_dicts / max(as_orders, 1):.1f}x меньше)")
+
+
+async def simulate(days: int, per_day: int, tmp: Path) -> None:
+    rng = random.Random(11)
+    db = Database(tmp / "bench.db")
+    seen = SeenOrderIndex(db, "bench").load()
+    clock = [0.0]
+    cache = ResponseCache(clock=lambda: clock[0])
+    start = 1_760_000_000
+    step = 86400 / per_day
+    next_id = 11_000_000
+
+    async def fetch() -> dict:
+        return {"getOrderForBid": {"id": str(next_id), "budget": 500, "recommendedBudget": 900, "countOffers": 0}}
+
+    tracemalloc.start()
+    base = retained_kib()
+    print(f"{'сутки':>5} {'заказов':>8} {'в индексе':>9} {'в кэше':>7} {'память, КиБ':>12}")
+    for day in range(1, days + 1):
+        for _ in range(per_day // PAGE):
+            now = start + (next_id - 11_000_000) * step
+            clock[0] = now
+            page: List[dict] = [make_order(rng, next_id + i, int(now)) for i in range(PAGE)]
+            for i, raw in enumerate(page):
+                raw["creation"] = int(now + i * step)
+            next_id += PAGE
+            orders = parse_orders(page)
+            fresh = [o for o in orders if not seen.is_seen(o.id, o.creation)]
+            for o in fresh:
+                seen.add(o.id, o.creation)
+                o.description = ""
+            seen.save()
+            # Детали запрашиваются по каждому подходящему заказу (здесь — по каждому пятому)
+            for o in fresh[::5]:
+                await cache.get_or_fetch(cache_key(ENDPOINT, "getOrderForBid", "", {"id": str(o.id)}), fetch)
+            del page, orders, fresh
+        print(f"{day:5d} {next_id - 11_000_000:8d} {len(seen):9d} {len(cache):7d} {retained_kib() - base:12.0f}")
+    tracemalloc.stop()
+    db.close()
+
+
+def main() -> None:
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 28
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    record_sizes()
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(simulate(days, per_day, Path(tmp)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Нагрузочный прогон настоящего конвейера бота против локального GraphQL.
+
+Поднимает `mock_graphql` отдельным процессом и для каждого числа аккаунтов
+запускает в отдельном процессе фоновый режим (`Supervisor` + `AccountBot`) на
+`--duration` секунд. Для каждого прогона печатает:
+- ставок в минуту (всего) и долю опубликованных заказов, по которым успели сделать ставку;
+- задержку «публикация заказа → makeOffer» (p50/p95/max, по часам сервера);
+- число запросов и объём их тел (КБ) — что стоит опрос в трафике;
+- процессорное время и прирост памяти процесса ботов в пересчёте на аккаунт.
+
+Запуск: `python -m benchmarks.bench_pipeline [--accounts 1,10,100] [--duration 60] [--rate 0.1]`.
+Только Linux/macOS: база и данные ботов уходят во временную папку через `XDG_DATA_HOME`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _rss_mb() -> float:
+    """Текущий RSS процесса (МБ); без /proc — пиковый из getrusage."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _http(url: str, body: Optional[dict] = None) -> dict:
+    data = json.dumps(body).encode() if body is not None else None
+    with urllib.request.urlopen(urllib.request.Request(url, data=data), timeout=10) as resp:
+        return json.loads(resp.read())
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_worker(accounts: int, url: str, duration: float) -> dict:
+    """Тело дочернего процесса: `accounts` ботов на одном цикле событий."""
+    import asyncio
+    import logging
+
+    from sloggers.bot.supervisor import AccountSpec, Supervisor
+    from sloggers.core.settings import PATHS
+    from sloggers.network.transport import get_registry
+
+    data_home = os.environ.get("XDG_DATA_HOME", "")
+    if not data_home or not str(PATHS.database).startswith(data_home):
+        raise SystemExit(f"база {PATHS.database} не во временной папке — прогон остановлен")
+    logging.basicConfig(level=logging.WARNING)
+
+    specs = [
+        AccountSpec(
+            account_id=f"bench{i}",
+            name=f"bench{i}",
+            settings={"base_url": url},
+            cookies=[{"name": "bench_account", "value": f"bench{i}", "domain": urllib.parse.urlsplit(url).hostname}],
+        )
+        for i in range(accounts)
+    ]
+
+    async def _run() -> None:
+        stop = asyncio.Event()
+        asyncio.get_running_loop().call_later(duration, stop.set)
+        try:
+            await Supervisor(specs).run(stop)
+        finally:
+            await get_registry().aclose()
+
+    rss0 = _rss_mb()
+    cpu0 = time.process_time()
+    asyncio.run(_run())
+    return {"cpu": time.process_time() - cpu0, "rss": _rss_mb() - rss0, "rss_total": _rss_mb()}
+
+
+def run_scenario(accounts: int, url: str, duration: float, rate: float, data_home: str) -> dict:
+    _http(f"{url}/reset", {"rate": rate})
+    env = dict(os.environ, XDG_DATA_HOME=data_home, PYTHONPATH=str(ROOT))
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_pipeline", "--worker", str(accounts), "--url", url,
+         "--duration", str(duration)],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"прогон на {accounts} аккаунтах упал:\n{proc.stderr[-2000:]}")
+    worker = json.loads(proc.stdout.strip().splitlines()[-1])
+    stats = _http(f"{url}/stats")
+    latencies = [lat for offers in stats["offers"].values() for lat in offers.values()]
+    expected = stats["published"] * accounts
+    return {
+        "accounts": accounts,
+        "published": stats["published"],
+        "bids": len(latencies),
+        "coverage": len(latencies) / expected if expected else 0.0,
+        "bids_per_min": len(latencies) / duration * 60,
+        "p50": _percentile(latencies, 0.5),
+        "p95": _percentile(latencies, 0.95),
+        "max": max(latencies) if latencies else float("nan"),
+        "requests": sum(stats["requests"].values()),
+        "sent_kb": sum(stats["received"].values()) / 1024,
+        "cpu_per_acc": worker["cpu"] / accounts,
+        "cpu_share": worker["cpu"] / duration,
+        "mem_per_acc": worker["rss"] / accounts,
+        "rss": worker["rss_total"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", default="1,10,100", help="Число аккаунтов в прогонах через запятую")
+    parser.add_argument("--duration", type=float, default=60.0, help="Длительность одного прогона, с")
+    parser.add_argument("--rate", type=float, default=0.1, help="Новых заказов в секунду")
+    parser.add_argument("--worker", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--url", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        print(json.dumps(run_worker(args.worker, args.url, args.duration)))
+        return
+
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    mock = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.mock_graphql", "--port", str(port), "--rate", str(args.rate)],
+        cwd=ROOT, stdout=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(100):
+            try:
+                _http(f"{url}/stats")
+                break
+            except OSError:
+                time.sleep(0.1)
+        print(f"заказов в секунду: {args.rate}, прогон: {args.duration:.0f} с")
+        print(f"{'акк.':>5} {'заказов':>7} {'ставок':>6} {'охват':>6} {'ставок/мин':>10} "
+              f"{'p50, с':>7} {'p95, с':>7} {'max, с':>7} {'запросов':>8} {'КБ':>7} {'CPU/акк, с':>10} {'CPU, %':>6} "
+              f"{'МБ/акк':>7} {'RSS, МБ':>8}")
+        for n in (int(x) for x in args.accounts.split(",")):
+            with tempfile.TemporaryDirectory() as data_home:
+                r = run_scenario(n, url, args.duration, args.rate, data_home)
+            print(f"{r['accounts']:>5} {r['published']:>7} {r['bids']:>6} {r['coverage']:>6.0%} {r['bids_per_min']:>10.1f} "
+                  f"{r['p50']:>7.2f} {r['p95']:>7.2f} {r['max']:>7.2f} {r['requests']:>8} {r['sent_kb']:>7.0f} {r['cpu_per_acc']:>10.3f} "
+                  f"{r['cpu_share']:>6.0%} {r['mem_per_acc']:>7.2f} {r['rss']:>8.0f}", flush=True)
+    finally:
+        mock.terminate()
+        mock.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Цена ставки: офлайн‑оценка стратегий по истории и стоимость расчёта на горячем пути.
+
+История синтетическая: `days` суток ленты, заказчики части типов работ
+предлагают заметно меньше рекомендованного бюджета, по части заказов бот ставил
+95% рекомендации (как прежде), и сайт иногда ставку не принимал. Последние
+`eval_days` суток проигрываются через стратегии `fixed`, `rules` и `history`
+(`pricing.evaluate`): статистика строится только по данным до начала проигрывания
+и пополняется по ходу, как в работе бота. Отдельно меряется загрузка
+статистики из базы и время одного расчёта цены и одного обновления статистики.
+
+Запуск: `python -m benchmarks.bench_pricing [суток] [заказов_в_сутки]`
+"""
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sloggers.bot.pricing import MarketRange, PriceInput, PricingStats, evaluate, load_pricer
+from sloggers.core.database import Database
+from sloggers.core.history import OUTCOME_FAILED, OUTCOME_PLACED, HistoryStore
+from sloggers.core.orders import parse_orders
+
+from .common import bench, make_order
+
+PAGE = 30
+ACCOUNT = "bench"
+# Заказчики этих типов работ обычно предлагают ~60% рекомендации сайта
+CHEAP_TYPES = {"2", "21", "9"}
+
+SETTINGS = {
+    "fixed": {},
+    "rules": {"pricing": {"strategy": "fixed", "rules": [
+        {"types": sorted(int(t) for t in CHEAP_TYPES), "ratio": 0.6, "per_offer": 0.01},
+    ]}},
+    "history": {"pricing": {"strategy": "history", "min_samples": 30, "cap_to_budget": True}},
+}
+
+
+def fill_history(db: Database, days: int, per_day: int, now: float) -> None:
+    rng = random.Random(17)
+    store = HistoryStore(ACCOUNT, db=db)
+    start = now - days * 86400
+    step = 86400 / per_day
+    oid = 11_000_000
+    for n in range(days * per_day // PAGE):
+        at = start + n * PAGE * step
+        page = []
+        for i in range(PAGE):
+            raw = make_order(rng, oid + i, int(at))
+            raw["creation"] = int(at + i * step)
+            if raw["type"]["id"] in CHEAP_TYPES:
+                raw["budget"] = int(raw["recommendedBudget"] * rng.uniform(0.45, 0.75))
+            page.append(raw)
+        oid += PAGE
+        orders = parse_orders(page)
+        matched = [o for o in orders if rng.random() < 0.1]
+        store.record_seen(orders, (o.id for o in matched), now=at)
+        for o in matched:
+            bid = max(1, int(o.recommended_budget * 0.95))
+            # Ставки заметно выше бюджета заказчика сайт принимает хуже
+            failed = o.budget and bid > o.budget * 1.3 and rng.random() < 0.3
+            store.record_bid(o, bid, OUTCOME_FAILED if failed else OUTCOME_PLACED, now=at + 5)
+
+
+def main() -> None:
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    eval_days = 7
+    now = time.time()
+    since = now - eval_days * 86400
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(Path(tmp) / "bench.db")
+        t0 = time.perf_counter()
+        fill_history(db, days, per_day, now)
+        print(f"история: {days} сут. по {per_day} заказов, {time.perf_counter() - t0:.1f} с")
+
+        print(f"проигрывание последних {eval_days} сут.:")
+        print(f"{'стратегия':>10} {'ставок':>7} {'изменено':>9} {'|Δ|, ₽':>8} {'цена/рек.':>10} {'выше бюджета':>13}  стратегии")
+        for name, settings in SETTINGS.items():
+            ev = evaluate(ACCOUNT, settings, since, db)
+            print(
+                f"{name:>10} {ev.bids:7d} {ev.changed:9d} {ev.mean_abs_delta:8.0f} {ev.mean_ratio:10.2f} "
+                f"{ev.above_budget_share * 100:12.0f}%  {ev.by_strategy}"
+            )
+
+        t0 = time.perf_counter()
+        stats = PricingStats.load(ACCOUNT, now - 30 * 86400, db)
+        print(f"загрузка статистики: {len(stats)} сегментов за {(time.perf_counter() - t0) * 1e3:.1f} мс")
+        orders = parse_orders([make_order(random.Random(3), 12_000_000 + i, int(now)) for i in range(PAGE)])
+        market = MarketRange(300, 8000)
+        for name, settings in SETTINGS.items():
+            pricer = load_pricer(ACCOUNT, settings, db)
+            inputs = [PriceInput.build(o, {}, market) for o in orders]
+            t_quote = bench(lambda: [pricer.quote(i) for i in inputs], number=200) / PAGE
+            t_seen = bench(lambda: pricer.observe_orders(orders), number=200) / PAGE
+            print(f"{name:>10}: расчёт цены {t_quote * 1e6:5.2f} мкс | учёт заказа {t_seen * 1e6:5.2f} мкс")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Оценка кандидатов и очередь по оценке: стоимость оценки страницы и что выигрывают ставки.
+
+1. Время `OrderScorer.score_batch` на страницу из 30 и 300 заказов.
+2. Настоящий `BidPipeline` с ограничителем темпа, которому ставок не хватает:
+   каждые 0.25 с опрос приносит страницу кандидатов, а ставок в минуту
+   меньше, чем кандидатов. Сравниваются очередь в порядке поступления (все
+   оценки равны — как прежде) и очередь по оценке: средняя оценка заказов,
+   по которым ушла ставка, их возраст и доля заказов с числом откликов не больше 2.
+
+Запуск: `python -m benchmarks.bench_scoring [секунд]`
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import sys
+import time
+from typing import List
+
+from sloggers.bot.pipeline import BidPipeline, PipelineConfig
+from sloggers.bot.scoring import OrderScorer, ScoringConfig
+from sloggers.core.orders import Order, parse_orders
+
+from .common import bench, make_order
+
+PAGE = 30
+
+
+def make_page(rng: random.Random, start_id: int, now: float) -> List[Order]:
+    page = [make_order(rng, start_id + i, int(now)) for i in range(PAGE)]
+    for raw in page:
+        raw["creation"] = int(now - rng.uniform(0, 600))
+    return parse_orders(page)
+
+
+async def simulate(scorer: OrderScorer, by_score: bool, seconds: float) -> dict:
+    rng = random.Random(9)
+    placed: List[tuple] = []
+
+    async def prefetch(order: Order) -> dict:
+        await asyncio.sleep(0.005)
+        return {}
+
+    async def place(order: Order, info: dict) -> bool:
+        now = time.time()
+        placed.append((scorer.score_batch([order], now)[0], now - order.creation, order.count_offers))
+        return True
+
+    config = PipelineConfig(per_minute=600, burst=1, prefetch_concurrency=2, queue_size=60, queue_polls=5)
+    pipeline = BidPipeline(prefetch, place, config)
+    pipeline.start()
+    next_id = 12_000_000
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pipeline.begin_poll()
+        # Подходит каждый третий заказ страницы
+        matched = make_page(rng, next_id, time.time())[::3]
+        next_id += PAGE
+        scores = scorer.score_batch(matched) if by_score else [0.0] * len(matched)
+        for order, score in zip(matched, scores):
+            pipeline.submit(order, score)
+        await asyncio.sleep(0.25)
+    await pipeline.aclose()
+    n = max(1, len(placed))
+    return {
+        "bids": len(placed),
+        "score": sum(p[0] for p in placed) / n,
+        "age": sum(p[1] for p in placed) / n,
+        "few_offers": sum(1 for p in placed if 0 <= p[2] <= 2) / n,
+        "dropped": pipeline.stats.dropped,
+    }
+
+
+def main() -> None:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    logging.disable(logging.WARNING)  # пропуски кандидатов здесь ожидаемы — без строки на каждый
+    # Доли предметов — как после месяца истории
+    rng = random.Random(4)
+    rates = {}
+    for category in range(1, 220):
+        bids = rng.randint(1, 40)
+        rates[category] = (bids, rng.randint(0, bids))
+    scorer = OrderScorer(ScoringConfig(), rates)
+    now = time.time()
+    for size in (PAGE, PAGE * 10):
+        orders = parse_orders([make_order(rng, 11_000_000 + i, int(now)) for i in range(size)])
+        t = bench(lambda: scorer.score_batch(orders, now), number=200)
+        print(f"оценка {size:3d} заказов: {t * 1e6:7.1f} мкс ({t / size * 1e9:.0f} нс на заказ)")
+
+    print(f"ставки при нехватке темпа ({seconds:.0f} с, 10 ставок/с против ~40 кандидатов/с):")
+    for label, by_score in (("по поступлению", False), ("по оценке", True)):
+        r = asyncio.run(simulate(scorer, by_score, seconds))
+        print(
+            f"{label:>15}: ставок {r['bids']:4d} | средняя оценка {r['score']:4.2f} | возраст {r['age']:4.0f} с | "
+            f"≤2 откликов {r['few_offers'] * 100:3.0f}% | пропущено {r['dropped']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Поиск ключевых слов: наивный перебор `in` против скомпилированного `KeywordMatcher`.
+
+Запуск: `python -m benchmarks.bench_textmatch`
+"""
+from __future__ import annotations
+
+import random
+from typing import List
+
+from sloggers.bot.textmatch import KeywordMatcher, normalize_text, order_text
+from sloggers.core.orders import parse_orders
+
+from .common import bench, make_orders
+
+SYLLABLES = ["ма", "те", "ри", "ко", "ла", "ст", "ин", "фор", "пра", "во", "ге", "о", "эко", "но", "ми", "ка", "лог", "ия", "сис", "тем"]
+
+
+def make_keywords(n: int, seed: int = 7) -> List[str]:
+    """Синтетические слова из русских слогов (совпадения редки, как в реальных списках)."""
+    rng = random.Random(seed)
+    words = {"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5))) for _ in range(n * 2)}
+    return sorted(words)[:n]
+
+
+def naive_matches(text: str, include: List[str], exclude: List[str]) -> bool:
+    norm = normalize_text(text)
+    if any(w in norm for w in exclude):
+        return False
+    return not include or any(w in norm for w in include)
+
+
+def main() -> None:
+    orders = parse_orders(make_orders(300))
+    texts = [order_text(o) for o in orders]
+    for n in (100, 1000, 5000):
+        words = make_keywords(n)
+        include, exclude = words[: n // 2] + ["практике"], words[n // 2:]
+        inc_norm, exc_norm = [normalize_text(w) for w in include], [normalize_text(w) for w in exclude]
+        matcher = KeywordMatcher(include, exclude)
+        assert [naive_matches(t, inc_norm, exc_norm) for t in texts] == [matcher.matches(t) for t in texts]
+        t_naive = bench(lambda: [naive_matches(t, inc_norm, exc_norm) for t in texts], repeat=3)
+        t_fast = bench(lambda: [matcher.matches(t) for t in texts], repeat=3)
+        t_compile = bench(lambda: KeywordMatcher(include, exclude), repeat=3)
+        print(
+            f"слов {n:5d}, заказов {len(texts)}: перебор {t_naive * 1e3:8.2f} мс | матчер {t_fast * 1e3:6.2f} мс | "
+            f"ускорение x{t_naive / t_fast:5.1f} | компиляция {t_compile * 1e3:.1f} мс"
+        )
+
+
+if __name__ == "__main__":
+    main()
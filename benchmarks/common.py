@@ -0,0 +1,75 @@
+"""Общие утилиты бенчмарков: синтетические заказы в формате ответа аукциона и замер времени."""
+from __future__ import annotations
+
+import random
+import time
+from typing import Callable, List
+
+# Фрагменты реальных заголовков/описаний (по мотивам api.txt)
+TITLES = [
+    "Развитие семантической стороны речи у детей",
+    "Контрольная по высшей математике, 5 задач",
+    "Отчет по практике официант",
+    "Презентация: подсистемы и характеристики САПР",
+    "Курсовая по гражданскому праву",
+    "Лабораторная работа по информатике (Python)",
+    "Эссе по философии, 3 страницы",
+    "Решение задач по теоретической механике",
+]
+DESCRIPTIONS = [
+    "Основной акцент на решениях комплексной автоматизации компаний АСКОН и CSoft. 12 слайдов на 10 мин.",
+    "Нужно оформить по ГОСТ, оригинальность от 70% по антиплагиат.вуз.",
+    "Хотелось бы взять за основу их + доработать при необходимости, так как хотела бы получить скидку.",
+    "Методичка во вложении, вариант 7. Срок сдачи — пятница.",
+    "",
+]
+TYPE_IDS = ["2", "21", "9", "11", "5", "3", "6", "1", "7", "4"]
+CATEGORY_IDS = [str(i) for i in range(1, 220)]
+
+
+def make_order(rng: random.Random, oid: int, now: int) -> dict:
+    """Заказ с тем же набором полей, что и `orderDataFragment`."""
+    files = [
+        {"id": str(rng.randint(1, 10**8)), "name": "Задание.docx", "path": "https://cdn.a24.cloud/order-files/x",
+         "hash": "f976c076d17fb4187433145f69c475b0", "sizeInMb": 0.43, "readableCreationUnixtime": now, "type": "docx",
+         "__typename": "file"}
+        for _ in range(rng.choice([0, 0, 1, 2]))
+    ]
+    return {
+        "id": str(oid),
+        "type": {"id": rng.choice(TYPE_IDS), "name": "Тип", "__typename": "worktypes"},
+        "category": {"id": rng.choice(CATEGORY_IDS), "name": "Предмет", "__typename": "workcategories"},
+        "customer": {"id": str(rng.randint(1, 10**7)), "isOnline": rng.random() < 0.3, "isTelegramEnabled": False,
+                     "nickName": f"user{rng.randint(1, 10**5)}", "__typename": "customer"},
+        "badges": [{"id": 3, "name": "Успешно оплачивал", "__typename": "badge"}],
+        "title": rng.choice(TITLES),
+        "description": " ".join(rng.choice(DESCRIPTIONS) for _ in range(rng.randint(1, 6))),
+        "budget": rng.choice([0, 0, 500, 1500, 5000]),
+        "recommendedBudget": rng.randint(300, 8000),
+        "isFavorite": False, "isConsult": False, "isInviteOrder": False,
+        "isPremium": rng.random() < 0.1, "isHidden": False, "isPaid": False, "isRead": False,
+        "creation": now - rng.randint(0, 3600),
+        "deadline": str(now + rng.randint(1, 30) * 86400),
+        "customerFiles": files,
+        "authorFiles": [],
+        "countOffers": rng.choice([0, 0, 1, 2, 5, 14, 19]),
+        "isMatchFilter": True, "isMatchQualification": False, "authorHasOffer": False,
+        "isExpressOrder": rng.random() < 0.05, "authorOffer": None, "__typename": "order",
+    }
+
+
+def make_orders(n: int, seed: int = 1, start_id: int = 11_700_000) -> List[dict]:
+    rng = random.Random(seed)
+    now = int(time.time())
+    return [make_order(rng, start_id + i, now) for i in range(n)]
+
+
+def bench(fn: Callable[[], object], repeat: int = 5, number: int = 1) -> float:
+    """Лучшее время одного вызова `fn` (секунды) из `repeat` серий по `number` вызовов."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best
@@ -0,0 +1,357 @@
+"""Локальная замена GraphQL avtor24.ru для прогонов бота без сайта и cookies.
+
+Сервер понимает операции, которые шлёт `AccountBot` (проба, лента, детали
+заказа, ставка, комментарий), и генерирует поток заказов с заданной частотой
+(пуассоновский процесс). Остальные операции отвечают записанными ответами из
+дампа `api.txt` (словарь, шаблоны фильтров и т. п.), если они там есть.
+
+Аккаунт определяется по cookie `bench_account` — у каждого бота свой ключ, и
+задержка «публикация заказа → makeOffer» считается по каждому аккаунту.
+
+Persisted queries (APQ) поддерживаются как у Apollo: запрос с одним хэшем
+без известного серверу текста получает `PersistedQueryNotFound`.
+
+`GET /stats` — счётчики, байты тел запросов и задержки ставок (JSON), `POST /reset` — сброс ленты и
+счётчиков перед очередным прогоном.
+
+Отдельный запуск (например, чтобы направить окно аккаунта с base_url
+`http://127.0.0.1:8124` на локальный сервер):
+`python -m benchmarks.mock_graphql --port 8124 --rate 0.5`
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .common import make_order
+
+API_DUMP = Path(__file__).resolve().parent.parent / "api.txt"
+
+# Строка‑заголовок сообщения в выгрузке чата: «Имя, [9/21/25 12:28 AM]»
+_CHAT_HEADER = re.compile(r"^[^\[\n]{1,40}, \[\d{1,2}/\d{1,2}/\d{2} [^\]]+\]\n", re.M)
+_TITLE = re.compile(r'"title":"((?:[^"\\\n]|\\.){8,160})","description"')
+
+# Сколько заказов держит лента (как и сайт, старые уходят со страниц)
+FEED_SIZE = 300
+PAGE_SIZE = 30
+
+
+def load_recording(path: Path = API_DUMP) -> Dict[str, dict]:
+    """Ответы из дампа по имени операции.
+
+    Дамп — выгрузка чата: пакеты запросов (`[{"operationName": ...}]`) и следом
+    пакеты ответов (`[{"data": ...}]`) в том же порядке, разрезанные на
+    сообщения. Сообщения склеиваются обратно; испорченные куски (неэкранированные
+    кавычки, обрезанные строки) пропускаются.
+    """
+    if not path.is_file():
+        return {}
+    text = "".join(part.rstrip("\n") for part in _CHAT_HEADER.split(path.read_text(encoding="utf-8")))
+    decoder = json.JSONDecoder()
+    batches: List[list] = []
+    pos = 0
+    while True:
+        pos = text.find("[{", pos)
+        if pos < 0:
+            break
+        try:
+            value, end = decoder.raw_decode(text, pos)
+        except ValueError:
+            pos += 2
+            continue
+        if isinstance(value, list) and all(isinstance(x, dict) for x in value):
+            batches.append(value)
+        pos = end
+
+    recorded: Dict[str, dict] = {}
+    pending: List[str] = []
+    for batch in batches:
+        if all("operationName" in x for x in batch):
+            pending = [x["operationName"] for x in batch]
+        elif all("data" in x for x in batch) and len(batch) == len(pending):
+            for op, resp in zip(pending, batch):
+                recorded[op] = resp
+            pending = []
+    return recorded
+
+
+def recorded_titles(path: Path = API_DUMP) -> List[str]:
+    """Заголовки заказов из дампа — чтобы синтетические заказы были похожи на настоящие."""
+    if not path.is_file():
+        return []
+    titles = {m.group(1) for m in _TITLE.finditer(path.read_text(encoding="utf-8"))}
+    return sorted(t.replace('\\"', '"') for t in titles)
+
+
+def recorded_orders(path: Path = API_DUMP) -> List[dict]:
+    """Целые объекты заказов из ответов ленты в дампе (испорченные куски пропускаются)."""
+    if not path.is_file():
+        return []
+    text = "".join(part.rstrip("\n") for part in _CHAT_HEADER.split(path.read_text(encoding="utf-8")))
+    decoder = json.JSONDecoder()
+    orders: List[dict] = []
+    pos = 0
+    while True:
+        pos = text.find('{"id":"', pos)
+        if pos < 0:
+            break
+        try:
+            value, end = decoder.raw_decode(text, pos)
+        except ValueError:
+            pos += 2
+            continue
+        if isinstance(value, dict) and "creation" in value and "countOffers" in value:
+            orders.append(value)
+            pos = end
+        else:
+            pos += 2
+    return orders
+
+
+class OrderStream:
+    """Лента заказов: новые появляются в случайные моменты со средней частотой `rate` в секунду."""
+
+    def __init__(self, rate: float, seed: int = 7, titles: Optional[List[str]] = None, start_id: int = 11_900_000):
+        self.rate = rate
+        self._rng = random.Random(seed)
+        self._titles = titles or []
+        self._next_id = start_id
+        self._lock = threading.Lock()
+        self.orders: List[dict] = []  # новые — в начале
+        self.published: Dict[str, float] = {}
+        self._next_at = time.time()
+        self._schedule()
+
+    def _schedule(self) -> None:
+        self._next_at += self._rng.expovariate(self.rate) if self.rate > 0 else float("inf")
+
+    def advance(self, now: Optional[float] = None) -> None:
+        """Публикует все заказы, время которых пришло."""
+        now = time.time() if now is None else now
+        with self._lock:
+            while self._next_at <= now:
+                at = self._next_at
+                order = make_order(self._rng, self._next_id, int(at))
+                order["creation"] = int(at)
+                order["countOffers"] = 0
+                if self._titles:
+                    order["title"] = self._rng.choice(self._titles)
+                self.orders.insert(0, order)
+                self.published[order["id"]] = at
+                self._next_id += 1
+                self._schedule()
+            del self.orders[FEED_SIZE:]
+
+    def page(self, page: int) -> List[dict]:
+        self.advance()
+        start = (max(1, page) - 1) * PAGE_SIZE
+        with self._lock:
+            return self.orders[start:start + PAGE_SIZE]
+
+    def get(self, oid: str) -> Optional[dict]:
+        with self._lock:
+            return next((o for o in self.orders if o["id"] == str(oid)), None)
+
+    def reset(self, rate: Optional[float] = None, seed: int = 7) -> None:
+        """Пустая лента; с тем же `seed` заказы приходят в те же моменты, что и в прошлом прогоне."""
+        with self._lock:
+            if rate is not None:
+                self.rate = rate
+            self._rng = random.Random(seed)
+            self.orders.clear()
+            self.published.clear()
+            self._next_at = time.time()
+            self._schedule()
+
+
+class MockState:
+    """Лента и счётчики сервера (общие для всех потоков‑обработчиков)."""
+
+    def __init__(self, stream: OrderStream, recording: Dict[str, dict]):
+        self.stream = stream
+        self.recording = recording
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.received: Dict[str, int] = defaultdict(int)  # байт тел запросов по операциям
+        self.documents: Dict[str, str] = {}  # хэш → текст (APQ)
+        self.offers: Dict[str, Dict[str, float]] = defaultdict(dict)  # аккаунт → заказ → задержка
+
+    def count(self, op: str, size: int = 0) -> None:
+        with self._lock:
+            self.requests[op] += 1
+            self.received[op] += size
+
+    def persisted(self, payload: dict) -> Optional[dict]:
+        """Разбор APQ: ответ с ошибкой, если хэш неизвестен, иначе None."""
+        ext = (payload.get("extensions") or {}).get("persistedQuery")
+        if not ext:
+            return None
+        digest = ext.get("sha256Hash", "")
+        query = payload.get("query")
+        with self._lock:
+            if query is None:
+                if digest in self.documents:
+                    return None
+                return {"errors": [{"message": "PersistedQueryNotFound", "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"}}]}
+            if hashlib.sha256(query.encode("utf-8")).hexdigest() != digest:
+                return {"errors": [{"message": "provided sha does not match query"}]}
+            self.documents[digest] = query
+        return None
+
+    def offer(self, account: str, oid: str) -> None:
+        published = self.stream.published.get(str(oid))
+        if published is None:
+            return
+        with self._lock:
+            self.offers[account].setdefault(str(oid), time.time() - published)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "published": len(self.stream.published),
+                "requests": dict(self.requests),
+                "received": dict(self.received),
+                "offers": {acc: dict(v) for acc, v in self.offers.items()},
+            }
+
+    def reset(self, rate: Optional[float] = None, seed: int = 7) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.received.clear()
+            self.offers.clear()
+        self.stream.reset(rate, seed)
+
+    def respond(self, op: str, variables: dict, account: str) -> dict:
+        stream = self.stream
+        if op == "GetAuctionProbe":
+            stream.advance()
+            return {"data": {"auctionFilteredCount": len(stream.published), "hasNewPrivateOrders": False}}
+        if op in ("GetAuctionIds", "GetAuctionOrders", "GetAuctionWithConstraints"):
+            page = int((variables.get("pagination") or {}).get("pageTo") or 1)
+            orders = stream.page(page)
+            if op == "GetAuctionIds":
+                orders = [{"id": o["id"], "creation": o["creation"], "__typename": "order"} for o in orders]
+            total = len(stream.orders)
+            data = {
+                "auctionFilteredCount": len(stream.published),
+                "orders": {"total": total, "captcha": False, "pages": -(-total // PAGE_SIZE), "orders": orders},
+            }
+            if op == "GetAuctionWithConstraints":
+                recorded = (self.recording.get(op) or {}).get("data") or {}
+                data["auctionFilterConstraint"] = recorded.get("auctionFilterConstraint")
+                data["recommendedOrdersForExpert"] = {"orders": []}
+            elif op == "GetAuctionOrders":
+                # Бот запрашивает диапазон бюджетов, когда цена ставки ограничивается им
+                budgets = [o["budget"] for o in list(stream.orders) if o.get("budget")]
+                data["auctionFilterConstraint"] = {"minBudget": min(budgets, default=0), "maxBudget": max(budgets, default=0)}
+            return {"data": data}
+        if op == "getOrderForBid":
+            order = stream.get(variables.get("id"))
+            if order is None:
+                return {"data": {"getOrderForBid": None}}
+            node = {k: order[k] for k in ("id", "budget", "recommendedBudget", "countOffers")}
+            return {"data": {"getOrderForBid": node}}
+        if op == "makeOffer":
+            self.offer(account, variables.get("orderId"))
+            return {"data": {"makeOffer": {"id": str(random.randint(1, 10**8)), "bid": variables.get("bid")}}}
+        if op == "addComment":
+            return {"data": {"addComment": {"id": str(random.randint(1, 10**8))}}}
+        if op in self.recording:
+            return self.recording[op]
+        return {"errors": [{"message": f"mock: неизвестная операция {op}"}]}
+
+
+def _make_handler(state: MockState):
+    class Handler(BaseHTTPRequestHandler):
+        # HTTP/1.1 с Content-Length — соединения переиспользуются, как у настоящего сайта
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if self.path.startswith("/reset"):
+                params = json.loads(body or b"{}")
+                state.reset(params.get("rate"), int(params.get("seed", 7)))
+                self._send({"ok": True})
+                return
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                self._send({"errors": [{"message": "mock: тело не JSON"}]}, status=400)
+                return
+            op = payload.get("operationName") or ""
+            state.count(op, len(body))
+            error = state.persisted(payload)
+            if error is not None:
+                self._send(error)
+                return
+            cookie = SimpleCookie(self.headers.get("Cookie") or "")
+            account = cookie["bench_account"].value if "bench_account" in cookie else "-"
+            self._send(state.respond(op, payload.get("variables") or {}, account))
+
+        def do_GET(self) -> None:
+            if self.path.startswith("/stats"):
+                self._send(state.stats())
+            else:
+                self._send({"error": "not found"}, status=404)
+
+        def _send(self, obj: dict, status: int = 200) -> None:
+            data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    return Handler
+
+
+def make_server(host: str = "127.0.0.1", port: int = 0, rate: float = 0.2, seed: int = 7) -> ThreadingHTTPServer:
+    """Сервер (ещё не запущенный); `server.state` — его лента и счётчики."""
+    state = MockState(OrderStream(rate, seed=seed, titles=recorded_titles()), load_recording())
+    server = ThreadingHTTPServer((host, port), _make_handler(state))
+    server.daemon_threads = True
+    server.state = state  # type: ignore[attr-defined]
+    return server
+
+
+def start_in_thread(rate: float = 0.2, seed: int = 7) -> ThreadingHTTPServer:
+    """Запускает сервер в фоновом потоке на свободном порту; адрес — `server.server_address`."""
+    server = make_server(rate=rate, seed=seed)
+    threading.Thread(target=server.serve_forever, name="mock-graphql", daemon=True).start()
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Локальный GraphQL‑сервер для прогонов бота")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8124)
+    parser.add_argument("--rate", type=float, default=0.2, help="Новых заказов в секунду (в среднем)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+    server = make_server(args.host, args.port, args.rate, args.seed)
+    recorded = sorted(server.state.recording)  # type: ignore[attr-defined]
+    print(f"mock GraphQL на http://{args.host}:{args.port}, заказов в секунду: {args.rate}", flush=True)
+    print(f"записанные ответы: {', '.join(recorded) or 'нет'}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
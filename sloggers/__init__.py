@@ -3,7 +3,8 @@
 
 Важные свойства:
 - Лаунчер аккаунтов и отдельные окна аккаунтов (каждый — отдельный процесс);
-- Встроенный браузер (PySide6.QtWebEngine) для логина и копирования cookies;
+- Встроенный браузер (PySide6.QtWebEngine) для логина: у каждого аккаунта свой профиль,
+  cookies из него сохраняются и передаются боту автоматически;
 - Асинхронный мониторинг заказов (GraphQL), фильтрация, автоотклики и сообщения.
 
 Все исходники снабжены русскими комментариями и аккуратной структурой.
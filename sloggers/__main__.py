@@ -2,6 +2,9 @@
 
 Без аргументов — запускает лаунчер аккаунтов.
 С аргументом `--account <id>` — открывает окно конкретного аккаунта.
+С флагом `--headless` — запускает всех включённых ботов в одном процессе без GUI
+(вместе с `--account <id>` — только указанный аккаунт). PySide6 при этом не грузится.
+`--metrics-port <порт>` в фоновом режиме включает HTTP‑экспорт метрик.
 
 Дополнительный блок внизу позволяет корректно работать в режиме одиночного
 скрипта (PyInstaller), когда `__package__` не определён.
@@ -12,8 +15,6 @@ import sys
 from argparse import ArgumentParser
 from pathlib import Path
 
-from PySide6.QtWidgets import QApplication
-
 
 if __package__ in (None, ""):
     # Когда модуль запускается как обычный скрипт (например, в exe), нужно вручную
@@ -24,8 +25,7 @@ if __package__ in (None, ""):
         sys.path.insert(0, str(parent))
     __package__ = "sloggers"
 
-from .launcher_window import LauncherWindow
-from .account_window import AccountWindow
+from .core import startup
 from .core.settings import ensure_app_dirs
 
 
@@ -35,16 +35,46 @@ def main() -> int:
 
     parser = ArgumentParser(description="Sloggers — лаунчер и окна аккаунтов")
     parser.add_argument("--account", dest="account_id", help="ID аккаунта для запуска окна", default=None)
+    parser.add_argument("--headless", action="store_true", help="Запустить ботов без GUI в одном процессе")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Порт HTTP для метрик (только с --headless)")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="Адрес HTTP для метрик")
     args = parser.parse_args()
 
-    app = QApplication(sys.argv)
+    if args.headless:
+        # Фоновый режим: Qt не нужен, импортируем только движок ботов
+        from .headless import run_headless
+
+        return run_headless(
+            [args.account_id] if args.account_id else None,
+            metrics_port=args.metrics_port,
+            metrics_host=args.metrics_host,
+        )
+
+    # Тяжёлые модули (QtWebEngine, httpx, движок бота) импортируются не здесь, а при
+    # первом использовании: лаунчеру они не нужны, окну аккаунта — не сразу
+    with startup.stage("Qt"):
+        from PySide6.QtCore import QCoreApplication, Qt, QTimer
+        from PySide6.QtWidgets import QApplication
+
+        if args.account_id:
+            # QtWebEngine подгружается позже (с вкладкой «Браузер») — общий GL‑контекст
+            # нужно разрешить до создания приложения
+            QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+        app = QApplication(sys.argv)
 
     if args.account_id:
         # Запускаем окно аккаунта (отдельный экземпляр)
-        win = AccountWindow(account_id=args.account_id)
-        win.show()
+        with startup.stage("импорт окна"):
+            from .account_window import AccountWindow
+        with startup.stage("окно"):
+            win = AccountWindow(account_id=args.account_id)
+            win.show()
+        # Первый проход цикла событий — окно уже отрисовано; отчёт уходит в лог окна
+        QTimer.singleShot(0, lambda: startup.log_report(f"окна аккаунта {args.account_id}"))
     else:
         # Запускаем лаунчер (управление аккаунтами)
+        from .launcher_window import LauncherWindow
+
         win = LauncherWindow()
         win.show()
 
@@ -3,20 +3,26 @@ from __future__ import annotations
 """Окно аккаунта с логическими вкладками.
 
 Вкладки:
-- Браузер: встроенный QWebEngineView для логина на сайте и кнопка «Скопировать куки»;
+- Браузер: встроенный QWebEngineView для логина на сайте в собственном профиле аккаунта;
+  cookies из него сами сохраняются в базу и передаются работающему боту
+  (создаётся при первом открытии вкладки; с сохранёнными cookies окно открывается на вкладке «Бот»);
 - Бот: старт/стоп, интервал, задержка догоняющего, лог событий;
-- Шаблоны: выбор .txt файлов для приветствия и догоняющего сообщения;
-- Фильтры: типы работ и предметы (ID списки, на этапе MVP — вручную через поля).
+- Шаблоны: выбор .txt файлов для приветствия и догоняющего сообщения и их проверка;
+- Фильтры: типы работ и предметы (ID списки, на этапе MVP — вручную через поля),
+  слова‑включения и слова‑исключения для заголовка и описания;
+- Статистика: сводка истории бота по типам, предметам и часам.
 
-Примечание: все операции записи/чтения — в папке аккаунта.
+Примечание: настройки, куки и прочие данные аккаунта хранятся в базе приложения.
 """
 
-import json
 import logging
+import re
+import time
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from PySide6.QtCore import Qt, QUrl, Signal, QThread
+from PySide6.QtCore import Qt, QUrl, QThread, QTimer, Signal
 from PySide6.QtGui import QDesktopServices
 from PySide6.QtWidgets import (
     QWidget,
@@ -33,28 +39,60 @@ from PySide6.QtWidgets import (
     QCheckBox,
     QListWidget,
     QListWidgetItem,
+    QComboBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
 )
-from PySide6.QtWebEngineCore import QWebEngineProfile
-from PySide6.QtWebEngineWidgets import QWebEngineView
-
-from .core.logging_setup import QtLogProxyHandler, setup_logging
+from .core.logging_setup import BufferedLogHandler, LogBuffer, setup_logging
 from .core.storage import (
-    account_cookies_path,
-    account_settings_path,
     load_account_settings,
     save_account_settings,
     load_account_cookies,
 )
-from .bot.worker import BotWorker
-from .network.dictionary import fetch_dictionary
+from .core.history import HistoryStore
+from .bot.filters import keyword_matcher
+from .bot.followups import load_pending_followups
+from .bot.messages import PLACEHOLDERS, TemplateError, check_template_file
+from .bot.textmatch import split_keywords
+from .log_view import LogPanel
+
+# QtWebEngine, httpx и движок бота импортируются при первом использовании:
+# окно открывается быстрее, а браузер многим запускам не нужен вовсе
+if TYPE_CHECKING:
+    from .bot.worker import BotWorker
+    from .network.dictionary import CachedDictionary
+
+
+log = logging.getLogger(__name__)
+
+
+class _DictionaryLoader(QThread):
+    """Загрузка справочников в фоне: окно не замирает на время запроса."""
+
+    loaded = Signal(object, bool)  # CachedDictionary, изменилось ли содержимое
+    failed = Signal(str)
+
+    def __init__(self, base_url: str, cookies: list, jar_key: str):
+        super().__init__()
+        self._base_url = base_url
+        self._cookies = cookies
+        self._jar_key = jar_key
+
+    def run(self) -> None:  # QThread API
+        from .network.dictionary import refresh_dictionary
+
+        try:
+            entry, changed = refresh_dictionary(self._base_url, self._cookies, self._jar_key)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.loaded.emit(entry, changed)
 
 
 class AccountWindow(QWidget):
     """Окно конкретного аккаунта."""
 
-    # Сигнал для получения логов от бота
-    log_signal = Signal(str)
-
     def __init__(self, account_id: str) -> None:
         super().__init__()
         self._account_id = account_id
@@ -65,19 +103,21 @@ class AccountWindow(QWidget):
 
         self._tabs = QTabWidget()
 
-        # Вкладка Браузер
-        self._browser = QWebEngineView()
-        self._browser_profile = QWebEngineProfile.defaultProfile()
-        self._btn_copy_cookies = QPushButton("Скопировать куки")
+        # Вкладка Браузер: сам QWebEngineView создаётся при первом открытии вкладки
+        self._browser = None
+        self._browser_profile = None
+        self._cookie_sync = None
+        self._cookie_status = QLabel()
         self._btn_open_site = QPushButton("Открыть avtor24.ru во внешнем браузере")
 
         browser_tab = QWidget()
+        self._browser_tab = browser_tab
         v1 = QVBoxLayout(browser_tab)
-        v1.addWidget(self._browser)
+        self._browser_layout = v1
         rowb = QHBoxLayout()
         rowb.addWidget(self._btn_open_site)
         rowb.addStretch(1)
-        rowb.addWidget(self._btn_copy_cookies)
+        rowb.addWidget(self._cookie_status)
         v1.addLayout(rowb)
 
         # Вкладка Бот
@@ -97,6 +137,8 @@ class AccountWindow(QWidget):
         self._chk_nobids.setChecked(True)
         self._chk_less3.setChecked(True)
         self._chk_contractual.setChecked(True)
+        self._chk_enabled = QCheckBox("Запускать в фоновом режиме (--headless)")
+        self._chk_enabled.setChecked(True)
 
         self._types_ids = QLineEdit()
         self._types_ids.setPlaceholderText("ID типов работ через запятую, напр. 9,11")
@@ -106,9 +148,12 @@ class AccountWindow(QWidget):
         self._btn_start = QPushButton("Запустить бота")
         self._btn_stop = QPushButton("Остановить бота")
         self._btn_stop.setEnabled(False)
+        self._btn_followups = QPushButton("Отложенные догоняющие…")
+        self._health_label = QLabel()
 
-        self._log_view = QTextEdit()
-        self._log_view.setReadOnly(True)
+        # Журнал: хендлер кладёт строки в буфер, панель забирает их пачками
+        self._log_buffer = LogBuffer()
+        self._log_view = LogPanel(self._log_buffer)
 
         # Разметка вкладки Бот
         row1 = QHBoxLayout()
@@ -118,6 +163,7 @@ class AccountWindow(QWidget):
         row1.addWidget(QLabel("Догоняющее (мин):"))
         row1.addWidget(self._followup_delay)
         row1.addStretch(1)
+        row1.addWidget(self._chk_enabled)
         v2.addLayout(row1)
 
         row2 = QHBoxLayout()
@@ -134,7 +180,10 @@ class AccountWindow(QWidget):
         row3 = QHBoxLayout()
         row3.addWidget(self._btn_start)
         row3.addWidget(self._btn_stop)
+        row3.addSpacing(20)
+        row3.addWidget(self._health_label)
         row3.addStretch(1)
+        row3.addWidget(self._btn_followups)
         v2.addLayout(row3)
 
         v2.addWidget(QLabel("Журнал событий:"))
@@ -153,62 +202,175 @@ class AccountWindow(QWidget):
         roww.addWidget(self._welcome_path)
         roww.addWidget(self._btn_choose_welcome)
         v3.addLayout(roww)
+        self._welcome_status = QLabel()
+        self._welcome_status.setWordWrap(True)
+        v3.addWidget(self._welcome_status)
         rowf = QHBoxLayout()
         rowf.addWidget(self._followup_path)
         rowf.addWidget(self._btn_choose_followup)
         v3.addLayout(rowf)
+        self._followup_status = QLabel()
+        self._followup_status.setWordWrap(True)
+        v3.addWidget(self._followup_status)
+        self._btn_check_templates = QPushButton("Проверить шаблоны")
+        v3.addWidget(self._btn_check_templates)
+        help_lines = [f"{{{name}}} — {descr}" for name, descr in PLACEHOLDERS.items()]
+        help_lines.append("{вариант 1|вариант 2} — случайный вариант; {{ и }} — фигурные скобки")
+        tmpl_help = QLabel("Переменные шаблона:\n" + "\n".join(help_lines))
+        tmpl_help.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        v3.addWidget(tmpl_help)
+        v3.addStretch(1)
 
         # Вкладка Фильтры (справочники)
         filters_tab = QWidget()
         v4 = QVBoxLayout(filters_tab)
         self._btn_reload_dict = QPushButton("Обновить справочники")
+        self._dict_status = QLabel()
         self._types_list = QListWidget()
         self._types_list.setSelectionMode(self._types_list.MultiSelection)
         self._cats_list = QListWidget()
         self._cats_list.setSelectionMode(self._cats_list.MultiSelection)
+        self._include_keywords = QTextEdit()
+        self._include_keywords.setAcceptRichText(False)
+        self._include_keywords.setPlaceholderText("По одному слову или фразе в строке; re:<выражение> — регулярное выражение")
+        self._exclude_keywords = QTextEdit()
+        self._exclude_keywords.setAcceptRichText(False)
+        self._exclude_keywords.setPlaceholderText("Заказы с этими словами пропускаются")
         self._btn_save_filters = QPushButton("Сохранить фильтры")
-        v4.addWidget(self._btn_reload_dict)
+        rowd = QHBoxLayout()
+        rowd.addWidget(self._btn_reload_dict)
+        rowd.addWidget(self._dict_status, 1)
+        v4.addLayout(rowd)
         v4.addWidget(QLabel("Типы работ:"))
         v4.addWidget(self._types_list)
         v4.addWidget(QLabel("Предметы/категории:"))
         v4.addWidget(self._cats_list)
+        rowk = QHBoxLayout()
+        colk = QVBoxLayout()
+        colk.addWidget(QLabel("Слова‑включения (хотя бы одно):"))
+        colk.addWidget(self._include_keywords)
+        rowk.addLayout(colk)
+        colx = QVBoxLayout()
+        colx.addWidget(QLabel("Слова‑исключения:"))
+        colx.addWidget(self._exclude_keywords)
+        rowk.addLayout(colx)
+        v4.addLayout(rowk)
         v4.addWidget(self._btn_save_filters)
 
+        # Вкладка Статистика
+        stats_tab = QWidget()
+        v5 = QVBoxLayout(stats_tab)
+        self._stats_period = QComboBox()
+        for label, seconds in (("24 часа", 86400), ("7 дней", 7 * 86400), ("30 дней", 30 * 86400), ("всё время", 0)):
+            self._stats_period.addItem(label, seconds)
+        self._stats_group = QComboBox()
+        for label, key in (("по типам работ", "type"), ("по предметам", "category"), ("по часам", "hour")):
+            self._stats_group.addItem(label, key)
+        self._btn_stats = QPushButton("Обновить")
+        rowst = QHBoxLayout()
+        rowst.addWidget(QLabel("Период:"))
+        rowst.addWidget(self._stats_period)
+        rowst.addWidget(QLabel("Группировка:"))
+        rowst.addWidget(self._stats_group)
+        rowst.addStretch(1)
+        rowst.addWidget(self._btn_stats)
+        v5.addLayout(rowst)
+        self._stats_summary = QLabel()
+        self._stats_summary.setWordWrap(True)
+        v5.addWidget(self._stats_summary)
+        self._stats_table = QTableWidget(0, 7)
+        self._stats_table.setHorizontalHeaderLabels(
+            ["Группа", "Увидено", "Прошло фильтр", "Попыток ставок", "Ставок принято", "Средняя ставка", "До ставки, с"]
+        )
+        self._stats_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self._stats_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self._stats_table.setSortingEnabled(True)
+        v5.addWidget(self._stats_table)
+
         self._tabs.addTab(browser_tab, "Браузер")
         self._tabs.addTab(bot_tab, "Бот")
         self._tabs.addTab(tmpl_tab, "Шаблоны")
         self._tabs.addTab(filters_tab, "Фильтры")
+        self._tabs.addTab(stats_tab, "Статистика")
 
         layout = QVBoxLayout(self)
         layout.addWidget(self._tabs)
 
         # Сигналы UI
         self._btn_open_site.clicked.connect(self._open_external)
-        self._btn_copy_cookies.clicked.connect(self._copy_cookies)
         self._btn_choose_welcome.clicked.connect(lambda: self._choose_file(self._welcome_path))
         self._btn_choose_followup.clicked.connect(lambda: self._choose_file(self._followup_path))
         self._btn_start.clicked.connect(self._start_bot)
         self._btn_stop.clicked.connect(self._stop_bot)
-        self.log_signal.connect(self._append_log)
+        self._btn_followups.clicked.connect(self._show_followups)
+        self._btn_check_templates.clicked.connect(self._check_templates)
         self._btn_reload_dict.clicked.connect(self._on_reload_dict)
         self._btn_save_filters.clicked.connect(self._on_save_filters)
+        self._btn_stats.clicked.connect(self._refresh_stats)
+        self._stats_tab = stats_tab
+        self._tabs.currentChanged.connect(self._on_tab_changed)
 
         # Загрузка настроек аккаунта
         self._load_settings()
-        # Первичная загрузка сайта во встроенном браузере
-        self._browser.setUrl(QUrl("https://avtor24.ru/"))
 
         # Логгер в UI
-        self._qt_handler = QtLogProxyHandler(self.log_signal.emit)
-        self._qt_handler.setLevel(logging.INFO)
-        logging.getLogger().addHandler(self._qt_handler)
+        self._log_handler = BufferedLogHandler(self._log_buffer, logging.INFO)
+        logging.getLogger().addHandler(self._log_handler)
 
         self._worker: Optional[BotWorker] = None
         self._dict_cache = None
+        self._dict_loader: Optional[_DictionaryLoader] = None
+        # С сохранёнными cookies окно открывается на вкладке бота — браузер не нужен
+        if load_account_cookies(self._account_id):
+            self._tabs.setCurrentWidget(bot_tab)
+        else:
+            self._ensure_browser()
+        # Справочники из общего кэша — сразу после первой отрисовки; устаревшие обновятся в фоне
+        QTimer.singleShot(0, self._show_cached_dictionary)
+
+    def _on_tab_changed(self, idx: int) -> None:
+        tab = self._tabs.widget(idx)
+        if tab is self._browser_tab:
+            self._ensure_browser()
+        elif tab is self._stats_tab:
+            self._refresh_stats()
+
+    def _ensure_browser(self) -> None:
+        """Создаёт встроенный браузер при первой необходимости (QtWebEngine грузится долго)."""
+        if self._browser is not None:
+            return
+        t0 = time.perf_counter()
+        from PySide6.QtWebEngineCore import QWebEnginePage
+        from PySide6.QtWebEngineWidgets import QWebEngineView
+
+        from .browser import CookieSync, create_account_profile, site_host
+        from .core.storage import get_account
+
+        acc = get_account(self._account_id)
+        base_url = acc.base_url if acc else "https://avtor24.ru"
+        # Профиль — дочерний объект окна, созданный позже вкладок: страница удаляется раньше профиля
+        self._browser_profile = create_account_profile(self._account_id, self)
+        self._cookie_sync = CookieSync(self._account_id, self._browser_profile, site_host(base_url), parent=self)
+        self._cookie_sync.changed.connect(self._on_cookies_changed)
+        self._browser = QWebEngineView()
+        self._browser.setPage(QWebEnginePage(self._browser_profile, self._browser))
+        self._browser_layout.insertWidget(0, self._browser)
+        self._browser.setUrl(QUrl(base_url))
+        self._update_cookie_status()
+        log.info("Встроенный браузер создан за %.0f мс", (time.perf_counter() - t0) * 1000)
+
+    def closeEvent(self, event) -> None:
+        if self._cookie_sync is not None:
+            self._cookie_sync.flush()
+        # Поток загрузки справочников нельзя уничтожить на ходу — дожидаемся (ограничен таймаутом запроса)
+        if self._dict_loader is not None and self._dict_loader.isRunning():
+            self._dict_loader.wait()
+        super().closeEvent(event)
 
     # Загрузка/сохранение настроек
     def _load_settings(self) -> None:
         data = load_account_settings(self._account_id)
+        self._chk_enabled.setChecked(bool(data.get("enabled", True)))
         self._interval.setValue(int(data.get("interval_seconds", 3)))
         self._followup_delay.setValue(int(data.get("followup_delay_minutes", 5)))
         filters = data.get("filters", {})
@@ -220,74 +382,65 @@ class AccountWindow(QWidget):
         self._chk_nobids.setChecked(bool(filters.get("noBids", True)))
         self._chk_less3.setChecked(bool(filters.get("less3bids", True)))
         self._chk_contractual.setChecked(bool(filters.get("contractual", True)))
+        self._include_keywords.setPlainText("\n".join(split_keywords(filters.get("include_keywords", []))))
+        self._exclude_keywords.setPlainText("\n".join(split_keywords(filters.get("exclude_keywords", []))))
         tmpl = data.get("templates", {})
         self._welcome_path.setText(tmpl.get("welcome_path", ""))
         self._followup_path.setText(tmpl.get("followup_path", ""))
+        self._check_templates()
 
-    def _save_settings(self) -> None:
+    def _save_settings(self) -> bool:
+        """Сохраняет настройки из окна. False — слова‑фильтры с ошибкой, ничего не сохранено."""
         filters = {
             "types": [s.strip() for s in self._types_ids.text().split(",") if s.strip()],
             "categories": [s.strip() for s in self._categories_ids.text().split(",") if s.strip()],
             "noBids": self._chk_nobids.isChecked(),
             "less3bids": self._chk_less3.isChecked(),
             "contractual": self._chk_contractual.isChecked(),
+            "include_keywords": split_keywords(self._include_keywords.toPlainText(), "\n"),
+            "exclude_keywords": split_keywords(self._exclude_keywords.toPlainText(), "\n"),
         }
-        data = {
+        # Обновляем поверх сохранённых настроек: ключи без виджетов в окне не теряются
+        data = load_account_settings(self._account_id)
+        merged = {**data.get("filters", {}), **filters}
+        try:
+            # Неверный `re:`‑шаблон не должен попасть в базу: с ним не запустится ни окно, ни фоновый режим
+            keyword_matcher(merged)
+        except re.error as e:
+            QMessageBox.warning(self, "Ошибка", f"Неверное регулярное выражение: {e}")
+            return False
+        data.update({
+            "enabled": self._chk_enabled.isChecked(),
             "interval_seconds": int(self._interval.value()),
             "followup_delay_minutes": int(self._followup_delay.value()),
-            "filters": filters,
             "templates": {
                 "welcome_path": self._welcome_path.text(),
                 "followup_path": self._followup_path.text(),
             },
-        }
+        })
+        data["filters"] = merged
         save_account_settings(self._account_id, data)
+        return True
 
     # Вкладка Браузер
     def _open_external(self) -> None:
         QDesktopServices.openUrl(QUrl("https://avtor24.ru/"))
 
-    def _copy_cookies(self) -> None:
-        """Считывает cookies из профиля QWebEngine и сохраняет их в файл аккаунта."""
-        store = self._browser_profile.cookieStore()
-
-        collected = []
-
-        def on_cookie_added(cookie):
-            # Преобразуем cookie в простой словарь для дальнейшего использования
-            domain = cookie.domain()
-            name = bytes(cookie.name()).decode("utf-8", errors="ignore")
-            value = bytes(cookie.value()).decode("utf-8", errors="ignore")
-            path = cookie.path()
-            secure = cookie.isSecure()
-            http_only = cookie.isHttpOnly()
-            collected.append({
-                "domain": domain,
-                "name": name,
-                "value": value,
-                "path": path,
-                "secure": secure,
-                "httpOnly": http_only,
-            })
-
-        def on_loaded():
-            # После загрузки всех — сохраняем и показываем сообщение
-            path = account_cookies_path(self._account_id)
-            path.parent.mkdir(parents=True, exist_ok=True)
-            path.write_text(json.dumps({"cookies": collected}, ensure_ascii=False, indent=2), encoding="utf-8")
-            QMessageBox.information(self, "Готово", f"Куки сохранены: {path}")
-            store.cookieAdded.disconnect(on_cookie_added)
-            store.loaded.disconnect(on_loaded)
-
-        # Подписываемся, инициируем загрузку
-        store.cookieAdded.connect(on_cookie_added)
-        store.loaded.connect(on_loaded)
-        store.loadAllCookies()
+    def _on_cookies_changed(self, upserts: list, removed: list) -> None:
+        """Cookies браузера изменились (уже записаны в базу) — обновляем сессию бота."""
+        if self._worker is not None and self._worker.isRunning():
+            self._worker.update_cookies(upserts, removed)
+        self._update_cookie_status()
+
+    def _update_cookie_status(self) -> None:
+        if self._cookie_sync is not None:
+            self._cookie_status.setText(f"Cookies сайта сохранены: {self._cookie_sync.count} шт.")
 
     # Вкладка Бот
     def _start_bot(self) -> None:
-        # Сохраняем настройки перед стартом
-        self._save_settings()
+        # Сохраняем настройки перед стартом (с ошибкой в словах‑фильтрах бот не запускается)
+        if not self._save_settings():
+            return
 
         # Проверяем шаблоны
         if not Path(self._welcome_path.text()).exists():
@@ -307,13 +460,19 @@ class AccountWindow(QWidget):
                 settings["base_url"] = acc.base_url
         except Exception:
             pass
+        if self._cookie_sync is not None:
+            # Недавние изменения из браузера ещё могут ждать записи
+            self._cookie_sync.flush()
         cookies = load_account_cookies(self._account_id)
         if not cookies:
-            QMessageBox.warning(self, "Куки", "Сначала авторизуйтесь во вкладке 'Браузер' и сохраните куки")
+            QMessageBox.warning(self, "Куки", "Сначала войдите на сайт во вкладке «Браузер»")
             return
 
+        from .bot.worker import BotWorker
+
         self._worker = BotWorker(account_id=self._account_id, settings=settings, cookies=cookies)
         self._worker.finished.connect(self._on_worker_finished)
+        self._worker.health_changed.connect(self._on_health_changed)
         self._worker.start()
 
         self._btn_start.setEnabled(False)
@@ -327,14 +486,49 @@ class AccountWindow(QWidget):
         self._btn_start.setEnabled(True)
         self._append_log("Остановка бота…")
 
+    def _on_health_changed(self, state: str, reason: str) -> None:
+        from .bot.health import HEALTH_AUTH, HEALTH_LABELS, HEALTH_OK, HEALTH_STOPPED
+
+        label = HEALTH_LABELS.get(state, state)
+        self._health_label.setText("" if state in (HEALTH_OK, HEALTH_STOPPED) else f"Сессия: {label}")
+        self._health_label.setToolTip(reason)
+        if state == HEALTH_AUTH and not self._worker_stopping():
+            # Перезагрузка страницы обновляет сессию, если сайт ещё помнит браузер; новые
+            # cookies сразу уйдут боту и снимут паузу. Иначе нужен вход во вкладке «Браузер»
+            self._ensure_browser()
+            self._browser.reload()
+            self._log_view.add_message(
+                "Сессия сайта истекла — опрос на паузе. Обновляю сессию во встроенном браузере; "
+                "если бот не продолжит, войдите на сайт во вкладке «Браузер»",
+                logging.WARNING,
+            )
+
+    def _worker_stopping(self) -> bool:
+        return self._worker is None or not self._btn_stop.isEnabled()
+
     def _on_worker_finished(self) -> None:
         self._append_log("Бот остановлен")
         self._btn_stop.setEnabled(False)
         self._btn_start.setEnabled(True)
 
+    def _show_followups(self) -> None:
+        """Показывает ожидающие догоняющие сообщения аккаунта."""
+        jobs = load_pending_followups(self._account_id)
+        if not jobs:
+            QMessageBox.information(self, "Догоняющие", "Отложенных догоняющих сообщений нет")
+            return
+        lines = []
+        for job in jobs[:50]:
+            when = datetime.fromtimestamp(job.due).strftime("%d.%m %H:%M:%S")
+            title = job.ctx.get("order_title", "")
+            lines.append(f"{when} — заказ {job.job_id} {title}".rstrip())
+        if len(jobs) > 50:
+            lines.append(f"… и ещё {len(jobs) - 50}")
+        QMessageBox.information(self, f"Догоняющие ({len(jobs)})", "\n".join(lines))
+
     # Логи в UI
     def _append_log(self, text: str) -> None:
-        self._log_view.append(text)
+        self._log_view.add_message(text)
 
     # Вкладка Шаблоны
     def _choose_file(self, target: QLineEdit) -> None:
@@ -342,23 +536,131 @@ class AccountWindow(QWidget):
         if path:
             target.setText(path)
             self._save_settings()
+            self._check_templates()
+
+    # Вкладка Статистика
+    def _refresh_stats(self) -> None:
+        period = int(self._stats_period.currentData())
+        group = str(self._stats_group.currentData())
+        since = time.time() - period if period else None
+        try:
+            store = HistoryStore(self._account_id)
+            total = store.summary(since)
+            rows = store.aggregate(group, since)
+        except Exception as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось прочитать историю: {e}")
+            return
+        latency = f"{total.avg_latency:.0f} с" if total.avg_latency is not None else "—"
+        self._stats_summary.setText(
+            f"Увидено заказов: {total.seen}, прошло фильтр: {total.matched} ({total.match_ratio:.0%}), "
+            f"попыток ставок: {total.bids}, принято: {total.placed} ({total.placed_ratio:.0%}), "
+            f"среднее время от создания заказа до ставки: {latency}"
+        )
+        names = self._group_names(group)
+        self._stats_table.setSortingEnabled(False)
+        self._stats_table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            if group == "hour":
+                label = f"{row.key:02d}:00" if row.key is not None else "—"
+            else:
+                label = names.get(row.key, str(row.key))
+            values = [row.seen, row.matched, row.bids, row.placed, row.avg_bid, row.avg_latency]
+            self._stats_table.setItem(r, 0, QTableWidgetItem(label))
+            for c, value in enumerate(values, start=1):
+                item = QTableWidgetItem()
+                # Числа через DisplayRole — сортировка по значению, а не по строке
+                item.setData(Qt.DisplayRole, round(value, 1) if isinstance(value, float) else (value if value is not None else ""))
+                self._stats_table.setItem(r, c, item)
+        self._stats_table.setSortingEnabled(True)
+
+    def _group_names(self, group: str) -> dict:
+        """ID типа/предмета → название из загруженных справочников (если они есть)."""
+        data = self._dict_cache or {}
+        names = {}
+        if group == "type":
+            for t in data.get("worktypes", []):
+                names[int(t.get("id"))] = f"{t.get('name')} — {t.get('id')}"
+        elif group == "category":
+            for g in data.get("workcategoriesgroup", []):
+                for it in g.get("items", []):
+                    names[int(it.get("id"))] = f"{it.get('name')} — {it.get('id')}"
+        return names
+
+    def _check_templates(self) -> None:
+        """Компилирует выбранные шаблоны и показывает результат под полями."""
+        for path_edit, status in ((self._welcome_path, self._welcome_status), (self._followup_path, self._followup_status)):
+            path = path_edit.text().strip()
+            if not path:
+                status.setText("Шаблон не выбран — будет отправлен текст по умолчанию")
+                continue
+            try:
+                compiled = check_template_file(path)
+            except TemplateError as e:
+                status.setText(f"Ошибка в шаблоне: {e}. Будет отправлен текст по умолчанию")
+                continue
+            except OSError as e:
+                status.setText(f"Не удалось прочитать файл: {e}")
+                continue
+            names = ", ".join(compiled.placeholders) or "нет"
+            status.setText(f"Шаблон в порядке. Переменные: {names}")
 
     # Вкладка Фильтры — работа со справочниками
+    def _show_cached_dictionary(self) -> None:
+        from .core.storage import get_account
+        from .network.dictionary import load_cached_dictionary
+        acc = get_account(self._account_id)
+        if acc is None:
+            return
+        cached = load_cached_dictionary(acc.base_url)
+        if cached is not None:
+            self._apply_dictionary(cached, changed=True)
+        if cached is None or not cached.is_fresh():
+            self._reload_dict(silent=True)
+
     def _on_reload_dict(self) -> None:
-        # Загружаем словари синхронно в простом вызове (на короткое время возможно подвисание UI)
-        try:
-            from .core.storage import get_account, load_account_cookies
-            acc = get_account(self._account_id)
-            cookies = load_account_cookies(self._account_id)
-            if not acc or not cookies:
+        self._reload_dict(silent=False)
+
+    def _reload_dict(self, silent: bool) -> None:
+        """Запускает загрузку справочников в фоне. `silent` — без окон с сообщениями."""
+        if self._dict_loader is not None and self._dict_loader.isRunning():
+            return
+        from .core.storage import get_account, load_account_cookies
+        acc = get_account(self._account_id)
+        cookies = load_account_cookies(self._account_id)
+        if not acc or not cookies:
+            if not silent:
                 QMessageBox.information(self, "Информация", "Сначала авторизуйтесь и сохраните куки")
-                return
-            data = fetch_dictionary(acc.base_url, cookies)
-            self._dict_cache = data
-            self._fill_filters_from_dict(data)
-            QMessageBox.information(self, "Готово", "Справочники обновлены")
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить справочники: {e}")
+            return
+        loader = _DictionaryLoader(acc.base_url, cookies, self._account_id)
+        loader.loaded.connect(lambda entry, changed: self._on_dict_loaded(entry, changed, silent))
+        loader.failed.connect(lambda error: self._on_dict_failed(error, silent))
+        self._dict_loader = loader
+        self._btn_reload_dict.setEnabled(False)
+        self._dict_status.setText("Справочники обновляются…")
+        loader.start()
+
+    def _on_dict_loaded(self, entry: CachedDictionary, changed: bool, silent: bool) -> None:
+        self._btn_reload_dict.setEnabled(True)
+        self._apply_dictionary(entry, changed)
+        if not silent:
+            QMessageBox.information(self, "Готово", "Справочники обновлены" if changed else "Справочники не изменились")
+
+    def _on_dict_failed(self, error: str, silent: bool) -> None:
+        self._btn_reload_dict.setEnabled(True)
+        self._dict_status.setText("Не удалось обновить справочники")
+        if silent:
+            log.warning("Не удалось загрузить справочники: %s", error)
+        else:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить справочники: {error}")
+
+    def _apply_dictionary(self, entry: CachedDictionary, changed: bool) -> None:
+        self._dict_cache = entry.data
+        # Списки перестраиваются, только если содержимое изменилось (выбор пользователя не сбивается)
+        if changed or not self._types_list.count():
+            self._fill_filters_from_dict(entry.data)
+        updated = datetime.fromtimestamp(entry.changed).strftime("%d.%m.%Y %H:%M")
+        checked = datetime.fromtimestamp(entry.fetched).strftime("%d.%m.%Y %H:%M")
+        self._dict_status.setText(f"Справочники от {updated} (проверены {checked})")
 
     def _fill_filters_from_dict(self, data: dict) -> None:
         # Сохраняем выбранные до перезагрузки
@@ -390,5 +692,6 @@ class AccountWindow(QWidget):
         cats = [self._cats_list.item(i).data(Qt.UserRole) for i in range(self._cats_list.count()) if self._cats_list.item(i).isSelected()]
         self._types_ids.setText(",".join(types))
         self._categories_ids.setText(",".join(cats))
-        self._save_settings()
+        if not self._save_settings():
+            return
         QMessageBox.information(self, "Сохранено", "Фильтры обновлены")
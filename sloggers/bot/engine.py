@@ -0,0 +1,548 @@
+from __future__ import annotations
+
+"""Движок бота для одного аккаунта — без зависимостей от Qt.
+
+Движок содержит всю логику опроса ленты и откликов и работает как обычная
+asyncio‑корутина. Его запускают:
+- `BotWorker` (QThread) — в окне аккаунта;
+- `Supervisor` — в фоновом режиме (`python -m sloggers --headless`), когда
+  десятки аккаунтов работают задачами одного цикла событий.
+
+Примечание: схема GraphQL может отличаться; при интеграции проверьте в инструментах сети.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from ..network.graphql_client import GraphQLClient
+from ..network.transport import TransportConfig
+from ..core.history import OUTCOME_FAILED, OUTCOME_PLACED, HistoryStore
+from ..core.metrics import METRICS
+from ..core.orders import Order, parse_orders
+from ..core.storage import load_account_cookies
+from ..network.queries import (
+    GET_AUCTION_IDS,
+    GET_AUCTION_PROBE,
+    GET_ORDER_FOR_BID,
+    MAKE_OFFER,
+    ADD_COMMENT,
+    auction_orders_query,
+)
+from .filters import build_graphql_filters, compile_filters, order_fields
+from .followups import FollowupJob, FollowupScheduler, FollowupStore
+from .health import HEALTH_AUTH, HEALTH_CAPTCHA, HEALTH_RATE_LIMITED, HealthConfig, HealthState, HealthStore, SessionHealth
+from .messages import build_context, get_template
+from .pipeline import BidPipeline, PipelineConfig
+from .pricing import MarketRange, PriceInput, Pricer, PricingConfig, load_pricer
+from .scheduler import TickResult, make_scheduler
+from .scoring import OrderScorer, load_scorer
+from .seen_index import SeenOrderIndex, open_seen_index
+
+
+log = logging.getLogger(__name__)
+
+
+class AccountLogAdapter(logging.LoggerAdapter):
+    """Добавляет к сообщениям метку аккаунта — в общем логе фонового режима
+    иначе не понять, к какому аккаунту относится строка."""
+
+    def process(self, msg, kwargs):
+        return f"[{self.extra['account']}] {msg}", kwargs
+
+
+def poll_interval(settings: dict) -> float:
+    """Интервал опроса из настроек аккаунта в секундах (минимум 3)."""
+    return float(max(3, int(settings.get("interval_seconds", 3))))
+
+
+def tick_interval(settings: dict) -> float:
+    """Шаг основного цикла: интервал пробы в двухступенчатом режиме, иначе интервал опроса."""
+    if settings.get("two_stage_polling", True):
+        return float(max(1.0, float(settings.get("probe_interval_seconds", 3))))
+    return poll_interval(settings)
+
+
+@dataclass
+class ProbeStats:
+    """Эффективность пробы: какая доля дешёвых запросов привела к полному опросу."""
+
+    probes: int = 0
+    hits: int = 0  # проба показала изменение
+    forced: int = 0  # полный опрос без сигнала пробы (плановое обновление, листание страниц)
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+
+@dataclass
+class _Runtime:
+    seen: SeenOrderIndex
+    page: int
+    probe: ProbeStats = field(default_factory=ProbeStats)
+    last_count: Optional[int] = None
+    pending_full: bool = False
+    last_full_at: float = float("-inf")
+
+
+class AccountBot:
+    """Цикл опроса и откликов одного аккаунта.
+
+    Параметры конструктора передаются из окна аккаунта или супервизора.
+    `run()` возвращается после установки `stop_event`; неожиданные исключения
+    пробрасываются наружу — перезапуском занимается вызывающая сторона.
+    """
+
+    def __init__(
+        self,
+        account_id: str,
+        settings: dict,
+        cookies: List[Dict],
+        label: Optional[str] = None,
+        on_health: Optional[Callable[[HealthState], None]] = None,
+    ):
+        self._account_id = account_id
+        self._settings = settings
+        self._cookies = cookies
+        self._label = label or account_id
+        self._log = AccountLogAdapter(log, {"account": self._label})
+        # Локальный фильтр компилируется один раз на запуск
+        self._filter = compile_filters(settings)
+        # Лента — только с полями, которые бот читает при этих фильтрах
+        # (и диапазоном бюджетов, если цена ставки ограничивается им)
+        self._orders_query = auction_orders_query(
+            order_fields(settings), market=PricingConfig.from_settings(settings).needs_market
+        )
+        self._stop_event: Optional[asyncio.Event] = None
+        self._client: Optional[GraphQLClient] = None
+        self._chat_client: Optional[GraphQLClient] = None
+        self._pipeline: Optional[BidPipeline] = None
+        self._followups: Optional[FollowupScheduler] = None
+        self._history: Optional[HistoryStore] = None
+        self._pricer: Optional[Pricer] = None
+        self._scorer: Optional[OrderScorer] = None
+        # Диапазон бюджетов ленты из последнего полного опроса
+        self._market: Optional[MarketRange] = None
+        # Смена состояния сессии (истекла, капча, …) — окну аккаунта
+        self._on_health = on_health
+        self._health: Optional[SessionHealth] = None
+
+    @property
+    def account_id(self) -> str:
+        return self._account_id
+
+    @property
+    def interval(self) -> float:
+        return tick_interval(self._settings)
+
+    def _stage(self, stage: str):
+        """Гистограмма длительности этапа горячего пути (пустышка при выключенных метриках)."""
+        return METRICS.histogram("sloggers_stage_seconds", "Длительность этапов бота", stage=stage, account=self._label)
+
+    async def run(self, stop_event: asyncio.Event, start_delay: float = 0.0) -> None:
+        """Основной цикл опроса.
+
+        `start_delay` сдвигает фазу опроса: супервизор разносит аккаунты по
+        интервалу, чтобы они не стреляли запросами одновременно.
+        """
+        self._stop_event = stop_event
+        if start_delay > 0 and await self._sleep(start_delay):
+            return
+
+        base_url = self._settings.get("base_url", "https://avtor24.ru")
+        # Оба endpoint'а аккаунта работают через один транспорт (HTTP/2‑соединение) из реестра
+        net = TransportConfig.from_settings(self._settings)
+        # Основной клиент для аукциона
+        client = GraphQLClient(base_url=base_url, cookies=self._cookies, endpoint="/graphql", jar_key=self._account_id, config=net)
+        # Клиент чата/комментариев — отдельный endpoint
+        self._chat_client = GraphQLClient(base_url=base_url, cookies=self._cookies, endpoint="/graphqlapi", jar_key=self._account_id, config=net)
+        self._client = client
+        self._health = health = SessionHealth(
+            self._account_id, HealthConfig.from_settings(self._settings), HealthStore(), self._on_health, self._log
+        )
+
+        self._history = HistoryStore(self._account_id)
+        # Статистика для цен читается из истории один раз; дальше пополняется на ходу
+        self._pricer = load_pricer(self._account_id, self._settings)
+        self._scorer = load_scorer(self._account_id, self._settings, self._history)
+        pipeline = BidPipeline(
+            self._fetch_bid_info,
+            self._try_make_offer,
+            PipelineConfig.from_settings(self._settings),
+            self._log,
+            on_skip=self._record_skip,
+            label=self._label,
+        )
+        pipeline.start()
+        self._pipeline = pipeline
+
+        # Отложенные догоняющие: поднимаем из базы (в т.ч. просроченные за время простоя)
+        self._followups = FollowupScheduler(FollowupStore(self._account_id))
+        restored = self._followups.load()
+        if restored:
+            self._log.info("Восстановлено отложенных догоняющих: %s", restored)
+        followup_task = asyncio.create_task(self._followups.run(self._send_followup, stop_event))
+
+        runtime = _Runtime(seen=open_seen_index(self._account_id, self._settings), page=1)
+        loop = asyncio.get_running_loop()
+        scheduler = make_scheduler(self._settings, self.interval, runtime.seen.creations(), now=loop.time())
+
+        try:
+            while not stop_event.is_set():
+                started = loop.time()
+                sent_before = client.transport.stats.requests
+                try:
+                    with self._stage("tick").time():
+                        result = await self._tick(client, runtime)
+                except Exception as e:
+                    # Истёкшая сессия и 429 — не «проблема опроса», а пауза (пишет health)
+                    if health.record_exception(e) not in (HEALTH_AUTH, HEALTH_RATE_LIMITED):
+                        self._log.warning("Проблема при опросе: %s", e)
+                    result = TickResult(error=True)
+                # Считаем реальные запросы к хосту (вместе с повторами) — для бюджета
+                result.requests = max(client.transport.stats.requests - sent_before, int(result.error))
+                if result.captcha:
+                    health.record_failure(HEALTH_CAPTCHA, "сайт запросил капчу")
+                elif not result.error and result.requests:
+                    health.record_ok()
+
+                if health.paused:
+                    # На паузе запросов нет вовсе; новые cookies из окна снимают её досрочно
+                    if await health.wait_resume(stop_event):
+                        break
+                    self._reload_cookies()
+                    continue
+
+                # Пауза отсчитывается от начала шага: длительность опроса не сдвигает расписание
+                delay = scheduler.next_delay(result, loop.time())
+                self._stage("poll_wait").observe(max(0.0, started + delay - loop.time()))
+                if await self._sleep(started + delay - loop.time()):
+                    break
+        finally:
+            # Заказы, до ставки по которым не дошло, при следующем запуске оценим заново
+            for order in await pipeline.aclose():
+                runtime.seen.discard(order.id)
+            followup_task.cancel()
+            await asyncio.gather(followup_task, return_exceptions=True)
+            health.stop()
+            runtime.seen.save()
+            ps = pipeline.stats
+            if ps.submitted:
+                self._log.info(
+                    "Конвейер откликов: кандидатов %s, ставок %s, неудачных %s, пропущено %s",
+                    ps.submitted, ps.placed, ps.failed + ps.prefetch_failed, ps.dropped,
+                )
+            probe = runtime.probe
+            if probe.probes:
+                self._log.info(
+                    "Проба: запросов %s, сработала %s (%.0f%%), плановых полных опросов %s",
+                    probe.probes, probe.hits, probe.hit_ratio * 100, probe.forced,
+                )
+            stats = client.transport.stats
+            self._log.info(
+                "Соединения: запросов %s, новых соединений %s, переиспользовано %.0f%%",
+                stats.requests, stats.connections_opened, stats.reuse_ratio * 100,
+            )
+            if METRICS.enabled:
+                self._log_stage_timings()
+            await client.aclose()
+            await self._chat_client.aclose()
+
+    def apply_cookie_changes(self, upserts: List[Dict], removed: List[Dict]) -> None:
+        """Изменения cookies из браузера аккаунта — в живую сессию, без перезапуска.
+
+        Вызывать из потока цикла событий бота (воркер передаёт через `call_soon_threadsafe`).
+        """
+        def key(c: Dict) -> tuple:
+            return (c.get("domain") or "", c.get("name"), c.get("path") or "/")
+
+        changed = {key(c) for c in upserts} | {key(c) for c in removed}
+        self._cookies = [c for c in self._cookies if key(c) not in changed] + list(upserts)
+        if self._client is not None:
+            # Оба клиента аккаунта работают через один транспорт и одну банку cookies
+            transport = self._client.transport
+            transport.delete_cookies(removed)
+            transport.set_cookies(upserts)
+        if self._health is not None:
+            self._health.wake()
+        self._log.debug("Cookies обновлены из браузера: +%s −%s", len(upserts), len(removed))
+
+    def _reload_cookies(self) -> None:
+        """Перед перепроверкой сессии — cookies из базы: их мог обновить браузер окна аккаунта."""
+        try:
+            fresh = load_account_cookies(self._account_id)
+        except Exception as e:
+            self._log.warning("Не удалось перечитать cookies: %s", e)
+            return
+        if fresh and fresh != self._cookies:
+            self.apply_cookie_changes(fresh, [])
+
+    async def _sleep(self, seconds: float) -> bool:
+        """Пауза, прерываемая остановкой. Возвращает True, если запрошена остановка."""
+        assert self._stop_event is not None
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=max(0.0, seconds))
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def _tick(self, client: GraphQLClient, rt: _Runtime) -> TickResult:
+        """Один шаг цикла: в двухступенчатом режиме — проба, и при изменении — полный опрос.
+
+        Ступень 1 (`GetAuctionProbe`) — число заказов под фильтром и флаг новых
+        приватных заказов, несколько десятков байт. Ступень 2 (`_poll_once`)
+        выполняется, когда проба показала изменение, при листании страниц и
+        планово раз в `full_refresh_seconds` (число заказов может не измениться,
+        если один заказ пришёл, а другой ушёл). Между полными опросами
+        выдерживается `interval_seconds`.
+        """
+        if not self._settings.get("two_stage_polling", True):
+            return await self._poll_once(client, rt)
+
+        now = asyncio.get_running_loop().time()
+        refresh = float(self._settings.get("full_refresh_seconds", 30))
+        if rt.page == 1 and not rt.pending_full:
+            if now - rt.last_full_at < refresh:
+                if not await self._probe(client, rt):
+                    return TickResult()
+                rt.probe.hits += 1
+            else:
+                rt.probe.forced += 1
+            rt.pending_full = True
+
+        if now - rt.last_full_at < poll_interval(self._settings):
+            # Изменение запомнено — полный опрос на ближайшем разрешённом шаге
+            return TickResult()
+        rt.last_full_at = now
+        # При ошибке флаг остаётся: сигнал пробы не теряется, опрос повторится
+        result = await self._poll_once(client, rt)
+        rt.pending_full = False
+        return result
+
+    async def _probe(self, client: GraphQLClient, rt: _Runtime) -> bool:
+        """Дешёвая проба ленты. True — есть изменения и нужен полный опрос."""
+        f_filter, _ = build_graphql_filters(self._settings)
+        data = await client.call(GET_AUCTION_PROBE, {"filter": f_filter}, operation_name="GetAuctionProbe")
+        rt.probe.probes += 1
+        count = data.get("auctionFilteredCount")
+        # Первая проба только запоминает базу: перед ней всегда был плановый полный опрос
+        changed = bool(data.get("hasNewPrivateOrders")) or (rt.last_count is not None and count != rt.last_count)
+        rt.last_count = count
+        return changed
+
+    async def _poll_once(self, client: GraphQLClient, rt: _Runtime) -> TickResult:
+        """Один цикл опроса ленты заказов и попытка отклика.
+
+        В инкрементальном режиме сначала запрашиваются только ID и время создания
+        заказов страницы; полный запрос с описаниями уходит, лишь если среди них
+        есть заказы, которых нет в индексе увиденных.
+        """
+        f_filter, _ = build_graphql_filters(self._settings)
+        pagination = {"pageTo": rt.page}
+
+        if self._settings.get("incremental_polling", True):
+            with self._stage("auction_ids").time():
+                light = await client.call(
+                    GET_AUCTION_IDS,
+                    {"filter": f_filter, "limit": 30, "pagination": pagination, "skip": None},
+                    operation_name="GetAuctionIds",
+                )
+            light_block = light.get("orders", {})
+            if light_block.get("captcha"):
+                return TickResult(captcha=True)
+            stubs: List[dict] = light_block.get("orders", [])
+            if not stubs:
+                self._log.info("Заказы не найдены на странице %s", rt.page)
+                rt.page = 1
+                return TickResult()
+            if all(rt.seen.is_seen(o.get("id"), o.get("creation", 0)) for o in stubs):
+                # Новых нет — полный запрос не нужен
+                self._next_page(rt, processed_any=False)
+                return TickResult()
+
+        variables = {"filter": f_filter, "limit": 30, "pagination": pagination, "skip": None}
+
+        with self._stage("auction_full").time():
+            data = await client.call(self._orders_query, variables)
+        if data.get("auctionFilteredCount") is not None:
+            rt.last_count = data["auctionFilteredCount"]
+        self._market = MarketRange.from_response(data.get("auctionFilterConstraint")) or self._market
+        block = data.get("orders", {})
+        if block.get("captcha"):
+            return TickResult(captcha=True)
+        # Страница сразу разбирается в компактные `Order` — дальше только они
+        orders = parse_orders(block.get("orders") or ())
+        if not orders:
+            self._log.info("Заказы не найдены на странице %s", rt.page)
+            # Переходим на первую страницу снова
+            rt.page = 1
+            return TickResult()
+
+        is_seen = rt.seen.is_seen
+        fresh = [o for o in orders if not is_seen(o.id, o.creation)]
+
+        # Все подходящие заказы страницы уходят в конвейер откликов; темп ставок
+        # ограничивает он сам, а не шаг опроса
+        assert self._pipeline is not None
+        processed_any = False
+        if METRICS.enabled and fresh:
+            self._observe_discovery(fresh)
+        # Решение по заказу принимается один раз — дальше он считается увиденным
+        with self._stage("filter").time():
+            matched = self._filter.filter_batch(fresh)
+        with self._stage("persist").time():
+            for order in fresh:
+                rt.seen.add(order.id, order.creation)
+                # Описание нужно было только фильтру слов — в очереди конвейера оно лишнее
+                order.description = ""
+            rt.seen.save()
+            assert self._history is not None
+            self._history.record_seen(fresh, (o.id for o in matched))
+            assert self._pricer is not None
+            self._pricer.observe_orders(fresh)
+        # Порядок ставок задаёт оценка: очередь конвейера общая для последних опросов
+        self._pipeline.begin_poll()
+        assert self._scorer is not None
+        with self._stage("score").time():
+            scores = self._scorer.score_batch(matched)
+        for order, score in zip(matched, scores):
+            processed_any = self._pipeline.submit(order, score) or processed_any
+
+        self._next_page(rt, processed_any)
+        return TickResult(new_orders=len(fresh))
+
+    def _log_stage_timings(self) -> None:
+        parts = []
+        for labels, hist in METRICS.iter_histograms("sloggers_stage_seconds"):
+            if labels.get("account") == self._label and hist.count:
+                parts.append(
+                    f"{labels['stage']} p50={hist.percentile(0.5) * 1000:.0f}мс p95={hist.percentile(0.95) * 1000:.0f}мс"
+                )
+        if parts:
+            self._log.info("Этапы: %s", "; ".join(parts))
+
+    def _observe_discovery(self, fresh: List[Order]) -> None:
+        """Сколько новые заказы провисели на сайте до того, как бот их увидел."""
+        now = time.time()
+        hist = METRICS.histogram("sloggers_order_discovery_seconds", "От создания заказа до его обнаружения", account=self._label)
+        seen = METRICS.counter("sloggers_orders_seen_total", "Новых заказов увидено", account=self._label)
+        for o in fresh:
+            creation = o.creation
+            if creation:
+                hist.observe(max(0.0, now - creation))
+        seen.inc(len(fresh))
+
+    @staticmethod
+    def _next_page(rt: _Runtime, processed_any: bool) -> None:
+        # Если на текущей странице не было подходящих — перелистываем
+        if not processed_any:
+            rt.page = 1 if rt.page >= 10 else rt.page + 1
+        else:
+            # После успешной обработки — вернёмся к началу, чтобы ловить новые
+            rt.page = 1
+
+    async def _fetch_bid_info(self, order: Order) -> dict:
+        """Уточняет параметры для ставки (выполняется конвейером параллельно)."""
+        assert self._client is not None and self._health is not None
+        # Пока сессия под подозрением, заказ ждёт в конвейере, а не тратит запрос
+        await self._health.wait_ready()
+        try:
+            with self._stage("prefetch").time():
+                bid_info = await self._client.call(GET_ORDER_FOR_BID, {"id": str(order.id)}, operation_name="getOrderForBid")
+        except Exception as e:
+            self._health.record_exception(e)
+            raise
+        return bid_info.get("getOrderForBid", {}) or {}
+
+    async def _try_make_offer(self, order: Order, node: dict) -> bool:
+        """Пробует отправить отклик по заказу и запланировать догоняющее сообщение.
+
+        `node` — ответ `getOrderForBid`; ставку вызывает конвейер, когда разрешает ограничитель темпа.
+        """
+        oid = order.id
+        if oid <= 0:
+            return False
+        client = self._client
+        assert client is not None and self._pricer is not None and self._scorer is not None
+
+        # Цена — цепочкой стратегий из настроек `pricing` (по умолчанию 95% рекомендованного бюджета)
+        price = PriceInput.build(order, node, self._market)
+        quote = self._pricer.quote(price)
+        bid = quote.bid
+
+        # Формируем приветственное сообщение из шаблона (скомпилирован и закэширован)
+        with self._stage("render").time():
+            ctx = build_context(order, bid=bid)
+            welcome = get_template(self._settings.get("templates", {}).get("welcome_path", ""))
+            msg = (welcome.render(ctx) if welcome else "") or "Здравствуйте! Готов выполнить ваш заказ."
+
+        try:
+            variables = {"orderId": str(oid), "bid": bid, "message": msg, "expired": None, "subscribe": False}
+            with self._stage("make_offer").time():
+                resp = await client.call(MAKE_OFFER, variables, operation_name="makeOffer")
+            _ = resp.get("makeOffer")
+        except Exception as e:
+            self._log.warning("Не удалось отправить отклик по %s: %s", oid, e)
+            assert self._health is not None
+            self._health.record_exception(e)
+            assert self._history is not None
+            self._history.record_bid(order, bid, OUTCOME_FAILED)
+            self._pricer.observe_bid(order, bid, price.recommended, OUTCOME_FAILED)
+            self._scorer.observe_bid(order, OUTCOME_FAILED)
+            self._count_bid(OUTCOME_FAILED)
+            return False
+
+        self._log.info("Отклик отправлен по заказу %s (ставка %s, цена: %s)", oid, bid, quote.strategy)
+        if METRICS.enabled and order.creation:
+            METRICS.histogram("sloggers_order_to_bid_seconds", "От создания заказа до ответа makeOffer", account=self._label).observe(
+                max(0.0, time.time() - order.creation)
+            )
+        assert self._history is not None and self._followups is not None
+        self._history.record_bid(order, bid, OUTCOME_PLACED)
+        self._pricer.observe_bid(order, bid, price.recommended, OUTCOME_PLACED)
+        self._scorer.observe_bid(order, OUTCOME_PLACED)
+        self._count_bid(OUTCOME_PLACED)
+        # Планируем догоняющее сообщение: задание сохраняется в базе аккаунта.
+        # Контекст заказа сохраняется в задании: к моменту отправки заказа может не быть в ленте
+        delay_min = int(self._settings.get("followup_delay_minutes", 5))
+        self._followups.schedule(str(oid), max(1, delay_min) * 60, ctx)
+        return True
+
+    def _record_skip(self, order: Order, outcome: str) -> None:
+        """Заказ прошёл фильтр, но до ставки не дошёл (очередь полна, нет деталей)."""
+        if self._history is not None:
+            self._history.record_bid(order, 0, outcome)
+        self._count_bid(outcome)
+
+    def _count_bid(self, outcome: str) -> None:
+        METRICS.counter("sloggers_bids_total", "Попытки ставок по исходу", account=self._label, outcome=outcome).inc()
+
+    def pending_followups(self) -> List[FollowupJob]:
+        """Ожидающие догоняющие сообщения аккаунта."""
+        return self._followups.pending() if self._followups is not None else []
+
+    async def _send_followup(self, job: FollowupJob) -> bool:
+        """Отправка догоняющего сообщения по сработавшему заданию.
+
+        Реальная мутация чата может отличаться; здесь — заглушка/шаблон.
+        """
+        assert self._health is not None
+        await self._health.wait_ready()
+        followup = get_template(self._settings.get("templates", {}).get("followup_path", ""))
+        # Задания из старых журналов содержат только order_title
+        ctx = {**job.ctx, "order_id": job.job_id}
+        text = (followup.render(ctx) if followup else "") or "Готов обсудить детали и приступить."
+
+        try:
+            variables = {"orderId": job.job_id, "text": text}
+            assert self._chat_client is not None
+            await self._chat_client.call(ADD_COMMENT, variables, operation_name="addComment")
+            self._log.info("Догоняющее сообщение отправлено по заказу %s", job.job_id)
+            return True
+        except Exception as e:
+            self._log.warning("Не удалось отправить догоняющее по %s: %s", job.job_id, e)
+            self._health.record_exception(e)
+            return False
@@ -2,10 +2,32 @@ from __future__ import annotations
 
 """Применение фильтров к заказам.
 
-Фильтры задаются через настройки аккаунта (ID типов и предметов и флаги).
+Фильтры задаются через настройки аккаунта (ID типов и предметов и флаги). Поля
+совпадают с шаблонами фильтров сайта (`auctionFilterTemplates`): диапазоны
+бюджета, срока и числа откликов, `hasFile`, `customerOnline`, поиск по
+заголовку и описанию. Списки слов‑включений и исключений (`include_keywords`,
+`exclude_keywords`) проверяются одним проходом по тексту заказа (см. `textmatch`).
+
+Локальная проверка компилируется один раз на запуск бота (`compile_filters`):
+списки ID превращаются в frozenset целых чисел, а каждое заданное условие — в
+отдельный предикат. Незаданные условия в проверку не попадают вовсе. Предикаты
+читают плоские поля `Order` (`core/orders.py`), а не вложенные словари ответа.
 """
 
-from typing import Any, Dict, List
+import json
+import time
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Union
+
+from ..core.orders import Order
+from .scoring import ScoringConfig
+from .textmatch import KeywordMatcher, normalize_text, order_text, split_keywords
+
+
+# Значения по умолчанию — «без ограничения» (как на сайте)
+BUDGET_RANGE: Tuple[int, int] = (0, 200000)
+DEADLINE_RANGE: Tuple[int, int] = (0, 365)
+BID_COUNT_RANGE: Tuple[int, int] = (0, 200)
 
 
 def build_graphql_filters(settings: dict) -> tuple[dict, dict]:
@@ -18,35 +40,183 @@ def build_graphql_filters(settings: dict) -> tuple[dict, dict]:
         "types": f.get("types", []),
         # Используем категории (как "предметы") при наличии
         "categories": f.get("categories", []),
-        "budgetFrom": 0,
-        "budgetTo": 200000,
-        "deadlineFrom": 0,
-        "deadlineTo": 365,
+        "budgetFrom": int(f.get("budgetFrom", BUDGET_RANGE[0])),
+        "budgetTo": int(f.get("budgetTo", BUDGET_RANGE[1])),
+        "deadlineFrom": int(f.get("deadlineFrom", DEADLINE_RANGE[0])),
+        "deadlineTo": int(f.get("deadlineTo", DEADLINE_RANGE[1])),
         "contractual": bool(f.get("contractual", True)),
         "noBids": bool(f.get("noBids", True)),
         "less3bids": bool(f.get("less3bids", True)),
     }
+    # Дополнительные поля шаблонов сайта передаём, только если они заданы
+    for key in ("bidCountFrom", "bidCountTo"):
+        if key in f:
+            filter_obj[key] = int(f[key])
+    for key in ("hasFile", "customerOnline"):
+        if f.get(key):
+            filter_obj[key] = True
     constraints = {
         "withoutMyBids": True,
     }
     return filter_obj, constraints
 
 
-def order_passes_local_filters(order: dict, settings: dict) -> bool:
-    """Локальная валидация заказа по спискам ID.
+Predicate = Callable[[Order, float], bool]
+
+
+def _int(value: Any, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _id_set(values: Iterable[Any]) -> frozenset:
+    return frozenset(v for v in (_int(x, -1) for x in values) if v >= 0)
+
+
+def _split_words(raw: Any) -> List[str]:
+    """Строка «a, b» или список → список непустых нормализованных слов."""
+    return [normalize_text(w) for w in split_keywords(raw)]
 
-    Минимально: если заданы типы/предметы — проверяем соответствие по id.
+
+class CompiledFilter:
+    """Скомпилированный локальный фильтр аккаунта.
+
+    `matches(order)` — проверка одного заказа; `filter_batch(orders)` — вся
+    страница за один вызов (текущее время и ссылки на предикаты берутся один раз).
     """
-    f = settings.get("filters", {})
-    types: List[str] = [str(x) for x in f.get("types", [])]
-    categories: List[str] = [str(x) for x in f.get("categories", [])]
 
-    if types:
-        t_id = str(order.get("type", {}).get("id"))
-        if t_id and t_id not in types:
+    __slots__ = ("types", "categories", "_predicates")
+
+    def __init__(self, types: frozenset, categories: frozenset, predicates: List[Predicate]):
+        self.types = types
+        self.categories = categories
+        self._predicates = tuple(predicates)
+
+    def matches(self, order: Order, now: Optional[float] = None) -> bool:
+        return self._check(order, time.time() if now is None else now)
+
+    def filter_batch(self, orders: Iterable[Order], now: Optional[float] = None) -> List[Order]:
+        now = time.time() if now is None else now
+        check = self._check
+        return [o for o in orders if check(o, now)]
+
+    def _check(self, order: Order, now: float) -> bool:
+        types = self.types
+        # Заказ без типа (id 0) не отбрасываем — как и прежде
+        if types and order.type_id and order.type_id not in types:
             return False
-    if categories:
-        c_id = str(order.get("category", {}).get("id"))
-        if c_id and c_id not in categories:
+        cats = self.categories
+        if cats and order.category_id and order.category_id not in cats:
             return False
-    return True
+        for pred in self._predicates:
+            if not pred(order, now):
+                return False
+        return True
+
+
+def compile_filters(settings: dict) -> CompiledFilter:
+    """Компилирует секцию `filters` настроек аккаунта в `CompiledFilter`."""
+    f = settings.get("filters", {}) or {}
+    preds: List[Predicate] = []
+
+    # Отклики: «без откликов» строже, чем «меньше 3»
+    if f.get("noBids", True):
+        preds.append(lambda o, now: o.count_offers == 0)
+    elif f.get("less3bids", False):
+        # Неизвестное число откликов (-1) считаем «много»
+        preds.append(lambda o, now: 0 <= o.count_offers < 3)
+
+    lo, hi = _int(f.get("bidCountFrom"), BID_COUNT_RANGE[0]), _int(f.get("bidCountTo"), BID_COUNT_RANGE[1])
+    if (lo, hi) != BID_COUNT_RANGE:
+        preds.append(lambda o, now: lo <= max(o.count_offers, 0) <= hi)
+
+    b_lo, b_hi = _int(f.get("budgetFrom"), BUDGET_RANGE[0]), _int(f.get("budgetTo"), BUDGET_RANGE[1])
+    if (b_lo, b_hi) != BUDGET_RANGE:
+        # Договорные заказы (бюджет 0) диапазоном бюджета не отсекаются
+        def _budget(o: Order, now: float) -> bool:
+            b = o.budget
+            return b == 0 or b_lo <= b <= b_hi
+        preds.append(_budget)
+
+    d_lo, d_hi = _int(f.get("deadlineFrom"), DEADLINE_RANGE[0]), _int(f.get("deadlineTo"), DEADLINE_RANGE[1])
+    if (d_lo, d_hi) != DEADLINE_RANGE:
+        def _deadline(o: Order, now: float) -> bool:
+            ts = o.deadline
+            if not ts:
+                return True
+            days = (ts - now) / 86400.0
+            return d_lo <= days <= d_hi
+        preds.append(_deadline)
+
+    if f.get("hasFile"):
+        preds.append(lambda o, now: o.has_files)
+    if f.get("customerOnline"):
+        preds.append(lambda o, now: o.customer_online)
+
+    title_words = _split_words(f.get("title", ""))
+    if title_words:
+        def _title(o: Order, now: float) -> bool:
+            title = normalize_text(o.title)
+            return all(w in title for w in title_words)
+        preds.append(_title)
+    # `query` сайта (любое из слов) — частный случай слов‑включений
+    matcher = keyword_matcher(f)
+    if matcher:
+        preds.append(lambda o, now: matcher.matches(order_text(o)))
+
+    return CompiledFilter(_id_set(f.get("types", [])), _id_set(f.get("categories", [])), preds)
+
+
+# Поля заказа, которые бот читает всегда: проверка типа/предмета и откликов,
+# переменные шаблонов сообщений, история и индекс увиденных
+BASE_ORDER_FIELDS = frozenset({
+    "id", "creation", "type", "category", "customer", "title",
+    "budget", "recommendedBudget", "deadline", "countOffers",
+})
+
+
+def order_fields(settings: dict) -> frozenset:
+    """Поля заказа, нужные боту с этими фильтрами (для запроса ленты)."""
+    f = settings.get("filters", {}) or {}
+    fields = set(BASE_ORDER_FIELDS)
+    if f.get("hasFile"):
+        fields.add("customerFiles")
+    # Слова‑включения и исключения ищутся и в описании — самом тяжёлом поле заказа
+    if keyword_matcher(f):
+        fields.add("description")
+    # Флаги заказа нужны оценке кандидатов, если их веса не нулевые
+    scoring = ScoringConfig.from_settings(settings)
+    if scoring.enabled:
+        if scoring.weight("premium"):
+            fields.add("isPremium")
+        if scoring.weight("express"):
+            fields.add("isExpressOrder")
+    return frozenset(fields)
+
+
+def keyword_matcher(filters: dict) -> KeywordMatcher:
+    """Матчер слов‑включений/исключений секции `filters` (`re.error` — ошибка в `re:`‑шаблоне)."""
+    return KeywordMatcher(
+        split_keywords(filters.get("query", "")) + split_keywords(filters.get("include_keywords", [])),
+        split_keywords(filters.get("exclude_keywords", [])),
+    )
+
+
+@lru_cache(maxsize=32)
+def _compiled_from_json(raw: str) -> CompiledFilter:
+    return compile_filters({"filters": json.loads(raw)})
+
+
+def order_passes_local_filters(order: Union[Order, dict], settings: dict) -> bool:
+    """Локальная валидация заказа (совместимая обёртка над `compile_filters`).
+
+    Горячий путь бота использует `CompiledFilter` напрямую; здесь фильтр берётся
+    из кэша по содержимому секции `filters`. Заказ можно передать и словарём ответа.
+    """
+    if isinstance(order, dict):
+        order = Order.from_dict(order)
+    raw = json.dumps(settings.get("filters", {}), sort_keys=True, ensure_ascii=False)
+    return _compiled_from_json(raw).matches(order)
+
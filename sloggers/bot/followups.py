@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+"""Отложенные догоняющие сообщения, переживающие перезапуск.
+
+Задания хранятся в таблице `followups` базы приложения: каждая операция
+(добавить / выполнено) — одна строка по первичному ключу (аккаунт, заказ),
+поэтому запись стоит O(log n) и не переписывает остальные задания.
+
+В памяти задания лежат в куче по времени срабатывания: планирование — O(log n),
+ближайшее задание — O(1). Задания, срок которых наступает почти одновременно
+(в пределах `batch_window`), отправляются одной пачкой.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..core.database import Database
+from ..core.storage import get_database
+
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class FollowupJob:
+    """Одно догоняющее сообщение.
+
+    job_id: ID заказа (по одному догоняющему на заказ);
+    due: unix‑время отправки;
+    ctx: данные заказа для шаблона (сохраняются вместе с заданием).
+    """
+
+    job_id: str
+    due: float
+    ctx: Dict[str, str] = field(default_factory=dict)
+    attempts: int = 0
+
+
+class FollowupStore:
+    """Задания аккаунта в базе приложения."""
+
+    def __init__(self, account_id: str, db: Optional[Database] = None):
+        self._account_id = account_id
+        self._db = db or get_database()
+
+    def load(self) -> Dict[str, FollowupJob]:
+        rows = self._db.query(
+            "SELECT job_id, due, ctx, attempts FROM followups WHERE account_id = ? ORDER BY due",
+            (self._account_id,),
+        )
+        return {r[0]: FollowupJob(job_id=r[0], due=r[1], ctx=json.loads(r[2]), attempts=r[3]) for r in rows}
+
+    def put(self, job: FollowupJob) -> None:
+        with self._db.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO followups (account_id, job_id, due, ctx, attempts) VALUES (?, ?, ?, ?, ?)",
+                (self._account_id, job.job_id, job.due, json.dumps(job.ctx, ensure_ascii=False), job.attempts),
+            )
+
+    def remove(self, job_id: str) -> None:
+        with self._db.transaction() as conn:
+            conn.execute("DELETE FROM followups WHERE account_id = ? AND job_id = ?", (self._account_id, job_id))
+
+
+SendFn = Callable[[FollowupJob], Awaitable[bool]]
+
+
+class FollowupScheduler:
+    """Куча отложенных заданий с постоянным хранилищем и отправкой пачками."""
+
+    def __init__(
+        self,
+        store: FollowupStore,
+        batch_window: float = 1.0,
+        max_lateness: float = 24 * 3600,
+        max_attempts: int = 3,
+        retry_delay: float = 60.0,
+        concurrency: int = 4,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._store = store
+        self._batch_window = batch_window
+        self._max_lateness = max_lateness
+        self._max_attempts = max_attempts
+        self._retry_delay = retry_delay
+        self._concurrency = max(1, concurrency)
+        self._clock = clock
+        self._jobs: Dict[str, FollowupJob] = {}
+        # Элементы кучи: (due, seq, job_id); устаревшие записи отбрасываются лениво
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def load(self) -> int:
+        """Поднимает задания из хранилища. Возвращает число ожидающих."""
+        self._jobs = self._store.load()
+        self._heap = [(j.due, next(self._seq), j.job_id) for j in self._jobs.values()]
+        heapq.heapify(self._heap)
+        return len(self._jobs)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def schedule(self, job_id: str, delay: float, ctx: Optional[Dict[str, str]] = None) -> FollowupJob:
+        """Планирует (или переносит) догоняющее по заказу через `delay` секунд."""
+        job = FollowupJob(job_id=str(job_id), due=self._clock() + max(0.0, delay), ctx=dict(ctx or {}))
+        self._put(job)
+        return job
+
+    def pending(self) -> List[FollowupJob]:
+        """Ожидающие задания по времени срабатывания (для отображения)."""
+        return sorted(self._jobs.values(), key=lambda j: j.due)
+
+    def _put(self, job: FollowupJob) -> None:
+        self._jobs[job.job_id] = job
+        self._store.put(job)
+        heapq.heappush(self._heap, (job.due, next(self._seq), job.job_id))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _peek(self) -> Optional[FollowupJob]:
+        while self._heap:
+            due, _, job_id = self._heap[0]
+            job = self._jobs.get(job_id)
+            if job is not None and job.due == due:
+                return job
+            heapq.heappop(self._heap)
+        return None
+
+    def _pop_due(self, now: float) -> List[FollowupJob]:
+        """Снимает с кучи сработавшие задания и заодно те, что наступят в пределах окна пачки."""
+        batch: List[FollowupJob] = []
+        first = self._peek()
+        if first is None or first.due > now:
+            return batch
+        horizon = now + self._batch_window
+        while True:
+            job = self._peek()
+            if job is None or job.due > horizon:
+                return batch
+            heapq.heappop(self._heap)
+            batch.append(job)
+
+    async def run(self, send: SendFn, stop_event: asyncio.Event) -> None:
+        """Ждёт срабатывания заданий и отправляет их до установки `stop_event`."""
+        self._wakeup = asyncio.Event()
+        sem = asyncio.Semaphore(self._concurrency)
+
+        async def _one(job: FollowupJob) -> None:
+            async with sem:
+                await self._deliver(send, job)
+
+        try:
+            while not stop_event.is_set():
+                batch = self._pop_due(self._clock())
+                if batch:
+                    await asyncio.gather(*(_one(j) for j in batch))
+                    continue
+                nxt = self._peek()
+                timeout = None if nxt is None else max(0.0, nxt.due - self._clock())
+                self._wakeup.clear()
+                waiters = [asyncio.ensure_future(self._wakeup.wait()), asyncio.ensure_future(stop_event.wait())]
+                try:
+                    await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for w in waiters:
+                        w.cancel()
+        finally:
+            self._wakeup = None
+
+    async def _deliver(self, send: SendFn, job: FollowupJob) -> None:
+        late = self._clock() - job.due
+        if late > self._max_lateness:
+            log.info("Догоняющее по заказу %s устарело (%.0f ч) — отменено", job.job_id, late / 3600)
+            self._done(job)
+            return
+        try:
+            ok = await send(job)
+        except asyncio.CancelledError:
+            # Остановка посреди отправки: задание остаётся в хранилище
+            raise
+        except Exception as e:
+            log.warning("Ошибка отправки догоняющего по %s: %s", job.job_id, e)
+            ok = False
+        if ok:
+            self._done(job)
+            return
+        job.attempts += 1
+        if job.attempts >= self._max_attempts:
+            log.warning("Догоняющее по заказу %s не отправлено после %s попыток", job.job_id, job.attempts)
+            self._done(job)
+            return
+        retry = FollowupJob(job_id=job.job_id, due=self._clock() + self._retry_delay * job.attempts, ctx=job.ctx, attempts=job.attempts)
+        self._put(retry)
+
+    def _done(self, job: FollowupJob) -> None:
+        current = self._jobs.get(job.job_id)
+        if current is job:
+            del self._jobs[job.job_id]
+            self._store.remove(job.job_id)
+
+
+def load_pending_followups(account_id: str) -> List[FollowupJob]:
+    """Ожидающие задания аккаунта прямо из базы (для окна аккаунта)."""
+    return list(FollowupStore(account_id).load().values())
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+"""Здоровье сессии аккаунта: классификация сбоев и пауза вместо бесполезных запросов.
+
+Каждый сбой запроса относится к одному из видов (`classify_failure`):
+- истёкшая сессия (HTTP 401/403, уход на страницу входа, ошибка авторизации
+  в ответе) — опрос и ставки приостанавливаются до свежих cookies: их
+  присылает браузер окна аккаунта или бот перечитывает из базы при
+  плановой перепроверке раз в `auth_recheck_seconds`;
+- капча (`orders.captcha` в ответе ленты) — пауза, удваивающаяся при повторах;
+- ограничение частоты (HTTP 429) — пауза по `Retry-After`;
+- сетевые и прочие ошибки — без паузы (отступ задаёт планировщик), но после
+  нескольких подряд аккаунт помечается как «сбои».
+
+Смена состояния пишется в таблицу `account_health` (её показывает лаунчер)
+и передаётся в `on_change` — окно аккаунта по ней обновляет сессию браузера.
+Модуль не импортирует httpx и PySide6 при загрузке: лаунчер читает состояния,
+не поднимая сетевой стек.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from ..core.database import Database
+from ..core.storage import get_database
+
+
+log = logging.getLogger(__name__)
+
+HEALTH_OK = "ok"
+HEALTH_DEGRADED = "degraded"  # несколько сетевых/серверных ошибок подряд
+HEALTH_RATE_LIMITED = "rate_limited"
+HEALTH_CAPTCHA = "captcha"
+HEALTH_AUTH = "auth_expired"
+HEALTH_STOPPED = "stopped"
+
+# Виды сбоев без состояния‑паузы
+FAILURE_TRANSPORT = "transport"
+FAILURE_ERROR = "error"
+
+HEALTH_LABELS = {
+    HEALTH_OK: "работает",
+    HEALTH_DEGRADED: "сбои сети",
+    HEALTH_RATE_LIMITED: "ограничение частоты",
+    HEALTH_CAPTCHA: "капча",
+    HEALTH_AUTH: "сессия истекла",
+    HEALTH_STOPPED: "остановлен",
+}
+
+# Сколько сетевых ошибок подряд переводят аккаунт в «сбои»
+DEGRADED_AFTER = 3
+
+
+def classify_failure(exc: BaseException) -> str:
+    """Вид сбоя по исключению запроса: одно из HEALTH_AUTH, HEALTH_RATE_LIMITED, FAILURE_TRANSPORT, FAILURE_ERROR."""
+    import httpx
+
+    from ..network.graphql_client import AuthError, RateLimitError
+
+    if isinstance(exc, AuthError):
+        return HEALTH_AUTH
+    if isinstance(exc, RateLimitError):
+        return HEALTH_RATE_LIMITED
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        if code in (401, 403):
+            return HEALTH_AUTH
+        if code == 429:
+            return HEALTH_RATE_LIMITED
+        return FAILURE_TRANSPORT if code >= 500 else FAILURE_ERROR
+    if isinstance(exc, (httpx.TransportError, asyncio.TimeoutError)):
+        return FAILURE_TRANSPORT
+    return FAILURE_ERROR
+
+
+@dataclass
+class HealthState:
+    state: str = HEALTH_OK
+    reason: str = ""
+    since: float = 0.0
+    resume_at: Optional[float] = None  # unix‑время плановой перепроверки (для пауз)
+
+    @property
+    def label(self) -> str:
+        return HEALTH_LABELS.get(self.state, self.state)
+
+
+class HealthStore:
+    """Последнее состояние аккаунтов в базе приложения."""
+
+    def __init__(self, db: Optional[Database] = None):
+        self._db = db or get_database()
+
+    def save(self, account_id: str, st: HealthState) -> None:
+        with self._db.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO account_health (account_id, state, reason, since, resume_at) VALUES (?, ?, ?, ?, ?)",
+                (account_id, st.state, st.reason, st.since, st.resume_at),
+            )
+
+    def load_all(self) -> Dict[str, HealthState]:
+        rows = self._db.query("SELECT account_id, state, reason, since, resume_at FROM account_health")
+        return {r[0]: HealthState(r[1], r[2], r[3], r[4]) for r in rows}
+
+
+@dataclass(frozen=True)
+class HealthConfig:
+    """Паузы при сбоях (секция `health` в настройках аккаунта)."""
+
+    auth_recheck: float = 300.0
+    captcha_pause: float = 120.0
+    captcha_max_pause: float = 900.0
+    rate_limit_pause: float = 60.0
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "HealthConfig":
+        cfg = settings.get("health", {}) or {}
+        default = cls()
+        return cls(
+            auth_recheck=max(10.0, float(cfg.get("auth_recheck_seconds", default.auth_recheck))),
+            captcha_pause=max(1.0, float(cfg.get("captcha_pause_seconds", default.captcha_pause))),
+            captcha_max_pause=max(1.0, float(cfg.get("captcha_max_pause_seconds", default.captcha_max_pause))),
+            rate_limit_pause=max(1.0, float(cfg.get("rate_limit_pause_seconds", default.rate_limit_pause))),
+        )
+
+
+class SessionHealth:
+    """Состояние сессии одного аккаунта и паузы по сбоям.
+
+    Создаётся внутри цикла событий бота. `wait_ready()` держит ставки и
+    догоняющие, пока опрос на паузе; `wake()` досрочно снимает паузу
+    (пришли новые cookies) — следующий шаг цикла проверит сессию.
+    """
+
+    def __init__(
+        self,
+        account_id: str,
+        config: HealthConfig,
+        store: Optional[HealthStore] = None,
+        on_change: Optional[Callable[[HealthState], None]] = None,
+        logger=None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._account_id = account_id
+        self._config = config
+        self._store = store
+        self._on_change = on_change
+        self._log = logger or log
+        self._clock = clock
+        self.state = HealthState(HEALTH_OK, since=clock())
+        self._last_kind: Optional[str] = None
+        self._streak = 0  # сбоев подряд одного вида
+        self._ready = asyncio.Event()
+        self._ready.set()
+        self._wakeup = asyncio.Event()
+
+    @property
+    def paused(self) -> bool:
+        """Опрос на паузе (до `resume_at`)."""
+        return self.resume_in() > 0
+
+    @property
+    def blocked(self) -> bool:
+        """Сессия под подозрением: ставки ждут успешной перепроверки."""
+        return not self._ready.is_set()
+
+    def resume_in(self) -> float:
+        if self.state.resume_at is None:
+            return 0.0
+        return max(0.0, self.state.resume_at - self._clock())
+
+    def record_ok(self) -> None:
+        """Запрос к сайту прошёл — сессия в порядке."""
+        self._last_kind = None
+        self._streak = 0
+        if self.state.state != HEALTH_OK:
+            self._log.info("Сессия в порядке (было: %s)", self.state.label)
+            self._set(HEALTH_OK, "")
+
+    def record_failure(self, kind: str, reason: str = "", retry_after: Optional[float] = None) -> None:
+        """Учитывает сбой; при истёкшей сессии, капче и 429 ставит опрос на паузу."""
+        group = FAILURE_TRANSPORT if kind in (FAILURE_TRANSPORT, FAILURE_ERROR) else kind
+        self._streak = self._streak + 1 if group == self._last_kind else 1
+        self._last_kind = group
+        cfg = self._config
+        if kind == HEALTH_AUTH:
+            pause = cfg.auth_recheck
+        elif kind == HEALTH_CAPTCHA:
+            pause = min(cfg.captcha_max_pause, cfg.captcha_pause * 2 ** min(self._streak - 1, 20))
+        elif kind == HEALTH_RATE_LIMITED:
+            pause = retry_after or cfg.rate_limit_pause
+        else:
+            if self._streak >= DEGRADED_AFTER and self.state.state == HEALTH_OK:
+                self._log.warning("Запросы к сайту не проходят %s раз подряд: %s", self._streak, reason)
+                self._set(HEALTH_DEGRADED, reason)
+            return
+        if kind != self.state.state:
+            self._log.warning("%s — опрос приостановлен на %.0f с: %s", HEALTH_LABELS[kind].capitalize(), pause, reason)
+        self._set(kind, reason, self._clock() + pause)
+
+    def record_exception(self, exc: BaseException) -> str:
+        """`record_failure` по исключению запроса; возвращает вид сбоя."""
+        kind = classify_failure(exc)
+        self.record_failure(kind, str(exc), getattr(exc, "retry_after", None))
+        return kind
+
+    def wake(self) -> None:
+        """Снимает паузу досрочно: следующий шаг цикла сразу перепроверит сессию."""
+        if self.state.resume_at is not None:
+            self.state.resume_at = self._clock()
+            self._wakeup.set()
+
+    async def wait_resume(self, stop_event: asyncio.Event) -> bool:
+        """Ждёт конца паузы (или `wake()`). True — запрошена остановка."""
+        self._wakeup.clear()
+        waiters = [asyncio.ensure_future(self._wakeup.wait()), asyncio.ensure_future(stop_event.wait())]
+        try:
+            await asyncio.wait(waiters, timeout=self.resume_in(), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for w in waiters:
+                w.cancel()
+        return stop_event.is_set()
+
+    async def wait_ready(self) -> None:
+        """Ждёт, пока сессия не выйдет из паузы (для ставок и догоняющих)."""
+        await self._ready.wait()
+
+    def stop(self) -> None:
+        """Бот остановлен. Истёкшая сессия остаётся видна в лаунчере — её всё равно надо обновить."""
+        if self.state.state == HEALTH_AUTH:
+            self._set(HEALTH_AUTH, self.state.reason)
+        else:
+            self._set(HEALTH_STOPPED, "")
+
+    def _set(self, state: str, reason: str, resume_at: Optional[float] = None) -> None:
+        changed = state != self.state.state
+        moved = resume_at != self.state.resume_at
+        self.state = HealthState(state, reason[:500], self.state.since if not changed else self._clock(), resume_at)
+        if resume_at is None:
+            self._ready.set()
+        else:
+            self._ready.clear()
+        if (changed or moved) and self._store is not None:
+            try:
+                self._store.save(self._account_id, self.state)
+            except Exception as e:
+                self._log.warning("Не удалось сохранить состояние сессии: %s", e)
+        if changed and self._on_change is not None:
+            self._on_change(self.state)
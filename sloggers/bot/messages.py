@@ -2,26 +2,273 @@ from __future__ import annotations
 
 """Загрузка и подготовки текстов сообщений из .txt файлов.
 
-На данном этапе шаблонизация минимальная — просто подстановка переменных по словарю.
+Шаблон компилируется один раз (`compile_template`) в список готовых частей и
+проверяется при компиляции: незакрытые скобки и неизвестные переменные — это
+`TemplateError`, а не отправка «сырого» текста. Скомпилированные шаблоны
+хранятся в кэше по пути файла и перечитываются, только когда у файла меняются
+время изменения или размер.
+
+Синтаксис:
+- `{order_title}` — переменная (список — `PLACEHOLDERS`);
+- `{Здравствуйте|Добрый день}` — случайный вариант (спинтакс), варианты могут
+  содержать переменные и вложенные варианты;
+- `{{` и `}}` — сами фигурные скобки.
 """
 
+import logging
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional, Tuple, Union
+
+from ..core.orders import Order
+
+
+log = logging.getLogger(__name__)
+
+# Переменные шаблонов и их описание (показывается в окне аккаунта)
+PLACEHOLDERS: Dict[str, str] = {
+    "order_id": "ID заказа",
+    "order_title": "заголовок заказа",
+    "type": "тип работы",
+    "category": "предмет",
+    "budget": "бюджет заказчика («договорной», если не указан)",
+    "recommended_budget": "рекомендованный бюджет",
+    "bid": "наша ставка",
+    "deadline": "срок сдачи (дд.мм.гггг)",
+    "days_left": "дней до срока",
+    "customer": "ник заказчика",
+}
+
+_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+
+
+class TemplateError(ValueError):
+    """Ошибка в тексте шаблона (с позицией в тексте)."""
+
+
+# Часть шаблона: строка, переменная (`_Var`) или выбор из вариантов (`_Choice`)
+Part = Union[str, "_Var", "_Choice"]
+
+
+@dataclass(frozen=True)
+class _Var:
+    name: str
+
+
+@dataclass(frozen=True)
+class _Choice:
+    variants: Tuple[Tuple[Part, ...], ...]
+
+
+class _Parser:
+    """Разбор шаблона рекурсивным спуском."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.names: List[str] = []
+
+    def parse(self) -> Tuple[Part, ...]:
+        return self._sequence(top=True)
+
+    def _sequence(self, top: bool) -> Tuple[Part, ...]:
+        text = self.text
+        parts: List[Part] = []
+        buf: List[str] = []
+        while self.pos < len(text):
+            ch = text[self.pos]
+            if ch == "{":
+                if text.startswith("{{", self.pos):
+                    buf.append("{")
+                    self.pos += 2
+                    continue
+                if buf:
+                    parts.append("".join(buf))
+                    buf = []
+                parts.append(self._group())
+                continue
+            if ch == "}":
+                if text.startswith("}}", self.pos):
+                    buf.append("}")
+                    self.pos += 2
+                    continue
+                if top:
+                    raise TemplateError(f"лишняя «}}» в позиции {self.pos + 1}")
+                break
+            if ch == "|" and not top:
+                break
+            buf.append(ch)
+            self.pos += 1
+        if buf:
+            parts.append("".join(buf))
+        return tuple(parts)
+
+    def _group(self) -> Part:
+        start = self.pos
+        self.pos += 1  # «{»
+        variants: List[Tuple[Part, ...]] = []
+        while True:
+            variants.append(self._sequence(top=False))
+            if self.pos >= len(self.text):
+                raise TemplateError(f"не закрыта «{{» в позиции {start + 1}")
+            if self.text[self.pos] == "}":
+                self.pos += 1
+                break
+            self.pos += 1  # «|»
+        if len(variants) > 1:
+            return _Choice(tuple(variants))
+        body = variants[0]
+        name = body[0].strip() if len(body) == 1 and isinstance(body[0], str) else ""
+        if not _NAME.match(name):
+            raw = self.text[start:self.pos]
+            raise TemplateError(f"непонятная конструкция {raw!r} в позиции {start + 1} (для скобок пишите {{{{ и }}}})")
+        if name not in PLACEHOLDERS:
+            raise TemplateError(f"неизвестная переменная {{{name}}} в позиции {start + 1}")
+        self.names.append(name)
+        return _Var(name)
+
+
+class CompiledTemplate:
+    """Разобранный шаблон: `render(ctx)` только склеивает готовые части."""
+
+    __slots__ = ("parts", "placeholders")
+
+    def __init__(self, parts: Tuple[Part, ...], placeholders: Tuple[str, ...]):
+        self.parts = parts
+        self.placeholders = placeholders
+
+    def render(self, ctx: Dict[str, str], rng: Optional[random.Random] = None) -> str:
+        out: List[str] = []
+        _render(self.parts, ctx, rng or random, out)
+        return "".join(out).strip()
+
+
+def _render(parts: Tuple[Part, ...], ctx: Dict[str, str], rng, out: List[str]) -> None:
+    for p in parts:
+        if isinstance(p, str):
+            out.append(p)
+        elif isinstance(p, _Var):
+            out.append(str(ctx.get(p.name, "")))
+        else:
+            _render(rng.choice(p.variants), ctx, rng, out)
+
+
+def compile_template(text: str) -> CompiledTemplate:
+    """Компилирует текст шаблона. Ошибки синтаксиса и неизвестные переменные — `TemplateError`."""
+    parser = _Parser(text)
+    parts = parser.parse()
+    return CompiledTemplate(parts, tuple(dict.fromkeys(parser.names)))
+
+
+class TemplateCache:
+    """Кэш скомпилированных шаблонов по пути файла (проверка по mtime и размеру).
+
+    Кэшируется и ошибка компиляции — испорченный файл не перечитывается и не
+    логируется заново при каждом отклике, пока его не исправят.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Tuple[int, int], Optional[CompiledTemplate], Optional[TemplateError]]] = {}
+
+    def load(self, path: str) -> Optional[CompiledTemplate]:
+        """Шаблон из файла; None — путь не задан или файла нет. Ошибка шаблона — `TemplateError`."""
+        if not path:
+            return None
+        try:
+            st = Path(path).stat()
+        except OSError:
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is None or entry[0] != key:
+            try:
+                compiled, error = _compile_file(path), None
+            except TemplateError as e:
+                compiled, error = None, e
+                log.warning("Шаблон %s не будет использован: %s", path, e)
+            entry = (key, compiled, error)
+            with self._lock:
+                self._entries[path] = entry
+        if entry[2] is not None:
+            raise entry[2]
+        return entry[1]
+
+    def get(self, path: str) -> Optional[CompiledTemplate]:
+        """Как `load`, но ошибка шаблона даёт None (ошибка уже записана в лог)."""
+        try:
+            return self.load(path)
+        except TemplateError:
+            return None
+
+
+_default_cache = TemplateCache()
+
+
+def get_template(path: str) -> Optional[CompiledTemplate]:
+    """Шаблон из общего кэша процесса (None — нет файла или в нём ошибка)."""
+    return _default_cache.get(path)
+
+
+def check_template_file(path: str) -> CompiledTemplate:
+    """Проверка файла шаблона для окна настроек (ошибки — `TemplateError`)."""
+    if not path:
+        raise TemplateError("файл не выбран")
+    if not Path(path).is_file():
+        raise TemplateError("файл не найден")
+    return _compile_file(path)
+
+
+def _compile_file(path: str) -> CompiledTemplate:
+    try:
+        text = load_text_file(path)
+    except UnicodeDecodeError:
+        raise TemplateError("файл не в кодировке UTF-8") from None
+    return compile_template(text)
+
+
+def build_context(order: Order, bid: Optional[int] = None, now: Optional[float] = None) -> Dict[str, str]:
+    """Переменные шаблона по заказу из ленты аукциона (все значения — строки)."""
+    budget = order.budget
+    ctx = {
+        "order_id": str(order.id),
+        "order_title": order.title,
+        "type": order.type_name,
+        "category": order.category_name,
+        "budget": str(budget) if budget else "договорной",
+        "recommended_budget": str(order.recommended_budget or ""),
+        "bid": str(bid) if bid is not None else "",
+        "customer": order.customer_nick,
+        "deadline": "",
+        "days_left": "",
+    }
+    deadline = order.deadline
+    if deadline:
+        ctx["deadline"] = time.strftime("%d.%m.%Y", time.localtime(deadline))
+        ctx["days_left"] = str(max(0, int((deadline - (time.time() if now is None else now)) // 86400)))
+    return ctx
 
 
 def load_text_file(path: str) -> str:
+    if not path:
+        return ""
     p = Path(path)
-    if not p.exists():
+    if not p.is_file():
         return ""
     return p.read_text(encoding="utf-8")
 
 
 def render_template(text: str, ctx: Dict[str, str]) -> str:
-    """Простейшая подстановка переменных вида {var} в тексте."""
+    """Подстановка переменных в текст (без кэша). Ошибка шаблона — пустая строка."""
     if not text:
         return text
     try:
-        return text.format(**ctx)
-    except Exception:
-        return text
-
+        return compile_template(text).render(ctx)
+    except TemplateError as e:
+        log.warning("Ошибка в шаблоне: %s", e)
+        return ""
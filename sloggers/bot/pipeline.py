@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+"""Конвейер откликов: все подходящие заказы страницы — без ожидания следующего опроса.
+
+Опрос кладёт кандидатов в ограниченную очередь. Несколько обработчиков
+получают токены ограничителя «ведро с токенами» и с токеном берут лучшего
+кандидата, запрашивают детали для ставки (`getOrderForBid`) и ставят — так
+реальный темп откликов задаётся настройками (ставок в минуту и размер
+всплеска), а не шагом опроса, а детали к ставке не успевают устареть.
+
+Очередь общая для всех опросов и упорядочена по оценке заказа (`scoring.py`):
+когда ставки упираются в ограничитель, первыми уходят лучшие кандидаты за
+последние `queue_polls` опросов, а не просто пришедшие раньше. Более старые
+кандидаты снимаются, переполненная очередь вытесняет худшего.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..core.history import OUTCOME_DROPPED, OUTCOME_PREFETCH_FAILED
+from ..core.metrics import METRICS
+from ..core.orders import Order
+from .ratelimit import AsyncRateLimiter
+
+
+log = logging.getLogger(__name__)
+
+Prefetch = Callable[[Order], Awaitable[Any]]
+PlaceBid = Callable[[Order, Any], Awaitable[bool]]
+OnSkip = Callable[[Order, str], None]
+
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    """Параметры конвейера (секция `bids` в настройках аккаунта)."""
+
+    per_minute: float = 10.0
+    burst: int = 3
+    prefetch_concurrency: int = 4
+    queue_size: int = 100
+    queue_polls: int = 10  # сколько опросов кандидат ждёт в очереди (0 — без ограничения)
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "PipelineConfig":
+        cfg = settings.get("bids", {}) or {}
+        default = cls()
+        return cls(
+            per_minute=max(0.1, float(cfg.get("per_minute", default.per_minute))),
+            burst=max(1, int(cfg.get("burst", default.burst))),
+            prefetch_concurrency=max(1, int(cfg.get("prefetch_concurrency", default.prefetch_concurrency))),
+            queue_size=max(1, int(cfg.get("queue_size", default.queue_size))),
+            queue_polls=max(0, int(cfg.get("queue_polls", default.queue_polls))),
+        )
+
+
+@dataclass
+class PipelineStats:
+    submitted: int = 0
+    dropped: int = 0  # очередь была полна или кандидат устарел
+    prefetch_failed: int = 0
+    placed: int = 0
+    failed: int = 0
+
+
+# Элемент очереди: (−оценка, порядковый номер, номер опроса, время постановки, заказ)
+_Entry = Tuple[float, int, int, float, Order]
+
+
+class CandidateQueue(asyncio.PriorityQueue):
+    """Очередь кандидатов по убыванию оценки; при равной — в порядке постановки.
+
+    Сверх `asyncio.PriorityQueue` умеет вытеснять худший элемент и снимать
+    элементы старше заданного опроса — обе операции линейны, но очередь
+    ограничена `queue_size` (сотня элементов) и вызываются они раз за опрос.
+    """
+
+    def worst(self) -> Optional[_Entry]:
+        return max(self._queue) if self._queue else None
+
+    def swap_head(self, entry: _Entry) -> _Entry:
+        """Возвращает лучший из `entry` и головы очереди; другой остаётся в очереди."""
+        if self._queue and self._queue[0] < entry:
+            return heapq.heapreplace(self._queue, entry)
+        return entry
+
+    def remove_where(self, predicate: Callable[[_Entry], bool]) -> List[_Entry]:
+        """Убирает элементы, для которых `predicate` истинен, и возвращает их."""
+        removed = [e for e in self._queue if predicate(e)]
+        if removed:
+            self._queue[:] = [e for e in self._queue if not predicate(e)]
+            heapq.heapify(self._queue)
+            for _ in removed:
+                self.task_done()
+        return removed
+
+
+class BidPipeline:
+    """Очередь кандидатов → токен ограничителя → предзагрузка и ставка.
+
+    `prefetch(order)` — запрос деталей для ставки (после получения токена, обработчики работают параллельно);
+    `place_bid(order, info)` — сама ставка, вызывается только с токеном ограничителя;
+    `on_skip(order, outcome)` — заказ выбыл до ставки (`OUTCOME_DROPPED`, `OUTCOME_PREFETCH_FAILED`).
+    """
+
+    def __init__(
+        self,
+        prefetch: Prefetch,
+        place_bid: PlaceBid,
+        config: PipelineConfig,
+        logger=None,
+        on_skip: Optional[OnSkip] = None,
+        label: str = "",
+    ):
+        self._prefetch = prefetch
+        self._place_bid = place_bid
+        self._on_skip = on_skip
+        self._label = label  # метка аккаунта для метрик
+        self._config = config
+        self._log = logger or log
+        self._queue: Optional[CandidateQueue] = None
+        self._seq = itertools.count()
+        self._poll = 0  # номер текущего опроса (`begin_poll`)
+        self._limiter: Optional[AsyncRateLimiter] = None
+        self._workers: List[asyncio.Task] = []
+        self._active: Dict[int, Order] = {}  # заказ в работе у каждого обработчика (до ставки)
+        self.stats = PipelineStats()
+
+    def start(self) -> None:
+        self._queue = CandidateQueue(maxsize=self._config.queue_size)
+        self._limiter = AsyncRateLimiter(self._config.per_minute, self._config.burst)
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"bid-worker-{i}")
+            for i in range(self._config.prefetch_concurrency)
+        ]
+
+    def begin_poll(self) -> None:
+        """Начало нового опроса: кандидаты старше `queue_polls` опросов снимаются с очереди."""
+        assert self._queue is not None, "конвейер не запущен"
+        self._poll += 1
+        keep = self._config.queue_polls
+        if not keep:
+            return
+        for entry in self._queue.remove_where(self._expired):
+            self._drop(entry[4], "устарел в очереди", logging.INFO)
+
+    def _expired(self, entry: _Entry) -> bool:
+        keep = self._config.queue_polls
+        return bool(keep) and entry[2] < self._poll - keep
+
+    def submit(self, order: Order, score: float = 0.0) -> bool:
+        """Ставит заказ в очередь с оценкой `score` (больше — раньше).
+
+        Если очередь заполнена, худший из кандидатов (включая новый) пропускается.
+        False — пропущен сам заказ.
+        """
+        assert self._queue is not None, "конвейер не запущен"
+        # Вместе с заказом — время постановки: ожидание в очереди попадает в метрики
+        entry = (-score, next(self._seq), self._poll, time.perf_counter(), order)
+        if self._queue.full():
+            worst = self._queue.worst()
+            if worst is None or worst[:2] < entry[:2]:
+                self._drop(order, "очередь откликов заполнена")
+                return False
+            self._queue.remove_where(lambda e: e is worst)
+            self._drop(worst[4], "вытеснен лучшим кандидатом")
+        self._queue.put_nowait(entry)
+        self.stats.submitted += 1
+        return True
+
+    def _drop(self, order: Order, reason: str, level: int = logging.WARNING) -> None:
+        self.stats.dropped += 1
+        self._log.log(level, "Заказ %s пропущен: %s", order.id, reason)
+        self._skip(order, OUTCOME_DROPPED)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def join(self) -> None:
+        """Ждёт обработки всех поставленных заказов."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def aclose(self) -> List[Order]:
+        """Останавливает обработчики и возвращает заказы, по которым ставка так и не ушла."""
+        for t in self._workers:
+            t.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        leftover = list(self._active.values())
+        self._active.clear()
+        while self._queue is not None and not self._queue.empty():
+            leftover.append(self._queue.get_nowait()[-1])
+            self._queue.task_done()
+        return leftover
+
+    async def _worker(self, idx: int) -> None:
+        assert self._queue is not None and self._limiter is not None
+        while True:
+            entry = await self._queue.get()
+            self._active[idx] = entry[-1]
+            try:
+                # Токен ограничителя — до предзагрузки: пока обработчик его ждёт, в очередь
+                # могли прийти кандидаты лучше, и ставку получит лучший на момент токена
+                with self._stage("rate_limit_wait").time():
+                    await self._limiter.acquire()
+                entry = self._queue.swap_head(entry)
+                while self._expired(entry) and not self._queue.empty():
+                    self._drop(entry[-1], "устарел в очереди", logging.INFO)
+                    self._queue.task_done()
+                    entry = self._queue.get_nowait()
+                *_, enqueued, order = entry
+                self._active[idx] = order
+                self._stage("queue_wait").observe(time.perf_counter() - enqueued)
+                await self._handle(order, idx)
+            except asyncio.CancelledError:
+                # Заказ остаётся в `_active` — его вернёт aclose()
+                self._queue.task_done()
+                raise
+            except Exception as e:
+                self._log.warning("Ошибка конвейера откликов по %s: %s", entry[-1].id, e)
+            self._active.pop(idx, None)
+            self._queue.task_done()
+
+    async def _handle(self, order: Order, idx: int) -> None:
+        """Предзагрузка и ставка; токен ограничителя уже получен."""
+        try:
+            info = await self._prefetch(order)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats.prefetch_failed += 1
+            self._log.warning("Не удалось получить детали заказа %s: %s", order.id, e)
+            self._skip(order, OUTCOME_PREFETCH_FAILED)
+            return
+        # С этого момента ставка может уйти на сервер — заказ больше не «незавершённый»
+        self._active.pop(idx, None)
+        if await self._place_bid(order, info):
+            self.stats.placed += 1
+        else:
+            self.stats.failed += 1
+
+    def _stage(self, stage: str):
+        return METRICS.histogram("sloggers_stage_seconds", "Длительность этапов бота", stage=stage, account=self._label)
+
+    def _skip(self, order: Order, outcome: str) -> None:
+        if self._on_skip is None:
+            return
+        try:
+            self._on_skip(order, outcome)
+        except Exception as e:
+            self._log.warning("Не удалось записать исход по заказу %s: %s", order.id, e)
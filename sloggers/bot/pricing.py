@@ -0,0 +1,526 @@
+from __future__ import annotations
+
+"""Цена отклика: подключаемые стратегии и статистика по истории аккаунта.
+
+Цену считает `Pricer` — цепочка стратегий (секция `pricing` настроек аккаунта),
+первая, у которой есть мнение о заказе, задаёт цену:
+- `rules` — правила по типам и предметам: доля от рекомендованного бюджета
+  (или бюджета заказчика), скидка за каждый уже поданный отклик, границы ставки;
+- `history` — по истории аккаунта (`PricingStats`): сколько заказчики этого
+  предмета готовы платить относительно рекомендации сайта, сколько откликов
+  обычно собирает заказ и какие наши ставки сайт принимал;
+- `fixed` — доля от рекомендованного бюджета (по умолчанию 0.95, как и прежде).
+
+Общие ограничения поверх любой стратегии: диапазон бюджетов ленты под
+фильтром (`auctionFilterConstraint` из полного опроса), бюджет заказчика,
+округление. Всё считается в памяти, без запросов к сайту: статистика
+загружается из базы один раз при запуске и дальше обновляется по каждому
+увиденному заказу и каждой ставке.
+
+Исхода «заказчик выбрал нас» в истории нет — сайт его не сообщает. Вместо доли
+выигранных заказов стратегия `history` учитывает долю ставок, которые сайт
+принял (`placed`), и опирается на рыночные данные ленты.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..core.database import Database
+from ..core.history import OUTCOME_FAILED, OUTCOME_PLACED
+from ..core.orders import Order
+from ..core.storage import get_database
+
+
+log = logging.getLogger(__name__)
+
+# Ключ сегмента статистики: (тип, предмет); 0 — «любой»
+Segment = Tuple[int, int]
+
+
+def _int(value, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass(frozen=True)
+class MarketRange:
+    """Бюджеты заказов ленты под фильтром аккаунта (`auctionFilterConstraint`)."""
+
+    min_budget: int = 0
+    max_budget: int = 0
+
+    @classmethod
+    def from_response(cls, data) -> Optional["MarketRange"]:
+        if not isinstance(data, dict):
+            return None
+        lo, hi = _int(data.get("minBudget")), _int(data.get("maxBudget"))
+        return cls(lo, hi) if hi > 0 else None
+
+
+@dataclass(frozen=True)
+class PriceInput:
+    """Всё, что известно о заказе к моменту ставки."""
+
+    order: Order
+    recommended: int  # рекомендованный бюджет: свежий из `getOrderForBid`, иначе из ленты
+    offers: int  # уже поданных откликов (-1 — неизвестно)
+    market: Optional[MarketRange] = None
+
+    @classmethod
+    def build(cls, order: Order, details: dict, market: Optional[MarketRange] = None) -> "PriceInput":
+        rec = _int(details.get("recommendedBudget")) or order.recommended_budget or order.budget
+        offers = _int(details.get("countOffers"), order.count_offers)
+        return cls(order, rec, offers, market)
+
+
+# ---- статистика ----------------------------------------------------------------
+
+
+@dataclass
+class SegmentStats:
+    """Накопленные данные одного сегмента (тип × предмет)."""
+
+    orders: int = 0  # заказы с бюджетом заказчика и рекомендацией
+    budget_ratio_sum: float = 0.0  # Σ бюджет / рекомендация
+    offers_seen: int = 0  # заказы с известным числом откликов
+    offers_sum: int = 0
+    attempts: int = 0  # наши попытки ставок (placed + failed)
+    placed: int = 0
+    placed_ratio_sum: float = 0.0  # Σ ставка / рекомендация по принятым ставкам
+
+    @property
+    def budget_ratio(self) -> Optional[float]:
+        return self.budget_ratio_sum / self.orders if self.orders else None
+
+    @property
+    def mean_offers(self) -> Optional[float]:
+        return self.offers_sum / self.offers_seen if self.offers_seen else None
+
+    @property
+    def placed_rate(self) -> Optional[float]:
+        return self.placed / self.attempts if self.attempts else None
+
+    @property
+    def placed_ratio(self) -> Optional[float]:
+        return self.placed_ratio_sum / self.placed if self.placed else None
+
+
+class PricingStats:
+    """Статистика истории по сегментам: (тип, предмет), (тип, любой) и общая (0, 0).
+
+    Загружается из базы одним запросом на таблицу (`load`), дальше обновляется
+    по мере работы (`observe_orders`, `observe_bid`) — без повторных выборок.
+    """
+
+    def __init__(self) -> None:
+        self._segments: Dict[Segment, SegmentStats] = {}
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def segment(self, key: Segment) -> Optional[SegmentStats]:
+        return self._segments.get(key)
+
+    def lookup(self, type_id: int, category_id: int, min_samples: int) -> Optional[SegmentStats]:
+        """Самый точный сегмент, где заказов не меньше `min_samples`."""
+        for key in ((type_id, category_id), (type_id, 0), (0, 0)):
+            seg = self._segments.get(key)
+            if seg is not None and seg.orders >= min_samples:
+                return seg
+        return None
+
+    def _levels(self, type_id: int, category_id: int) -> List[SegmentStats]:
+        """Сегменты, которые пополняет заказ: точный, по типу и общий (без повторов)."""
+        type_id, category_id = max(type_id, 0), max(category_id, 0)
+        keys = dict.fromkeys(((type_id, category_id), (type_id, 0), (0, 0)))
+        segs = self._segments
+        return [segs.setdefault(k, SegmentStats()) for k in keys]
+
+    def observe_order(self, type_id: int, category_id: int, budget: int, recommended: int, offers: int) -> None:
+        for seg in self._levels(type_id, category_id):
+            if budget > 0 and recommended > 0:
+                seg.orders += 1
+                seg.budget_ratio_sum += budget / recommended
+            if offers >= 0:
+                seg.offers_seen += 1
+                seg.offers_sum += offers
+
+    def observe_orders(self, orders: Iterable[Order]) -> None:
+        for o in orders:
+            self.observe_order(o.type_id, o.category_id, o.budget, o.recommended_budget, o.count_offers)
+
+    def observe_bid(self, type_id: int, category_id: int, bid: int, recommended: int, outcome: str) -> None:
+        if outcome not in (OUTCOME_PLACED, OUTCOME_FAILED):
+            return  # заказ выбыл до ставки — о цене это ничего не говорит
+        for seg in self._levels(type_id, category_id):
+            seg.attempts += 1
+            if outcome == OUTCOME_PLACED:
+                seg.placed += 1
+                if recommended > 0:
+                    seg.placed_ratio_sum += bid / recommended
+
+    @classmethod
+    def load(
+        cls, account_id: str, since: float, db: Optional[Database] = None, until: Optional[float] = None
+    ) -> "PricingStats":
+        """Статистика истории аккаунта за [`since`, `until`) (unix‑время; без `until` — до сих пор)."""
+        db = db or get_database()
+        stats = cls()
+        params = {"acc": account_id, "since": int(since), "until": int(until) if until is not None else 1 << 62}
+        rows = db.query(
+            """
+            SELECT type_id, category_id,
+                   SUM(budget > 0 AND recommended > 0),
+                   SUM(CASE WHEN budget > 0 AND recommended > 0 THEN CAST(budget AS REAL) / recommended ELSE 0 END),
+                   COUNT(*), SUM(offers)
+            FROM order_history
+            WHERE account_id = :acc AND seen_at >= :since AND seen_at < :until
+            GROUP BY type_id, category_id
+            """,
+            params,
+        )
+        for type_id, category_id, n, ratio_sum, seen, offers in rows:
+            for seg in stats._levels(type_id, category_id):
+                seg.orders += n or 0
+                seg.budget_ratio_sum += ratio_sum or 0.0
+                # В истории неизвестное число откликов записано нулём — считаем все заказы
+                seg.offers_seen += seen or 0
+                seg.offers_sum += offers or 0
+        # Ставки сопоставляются с заказами по индексу (аккаунт, заказ), как в сводках истории
+        rows = db.query(
+            """
+            SELECT h.type_id, h.category_id, COUNT(*), SUM(b.outcome = 'placed'),
+                   SUM(CASE WHEN b.outcome = 'placed' AND h.recommended > 0 THEN CAST(b.bid AS REAL) / h.recommended ELSE 0 END)
+            FROM (
+                SELECT CAST(order_id AS INTEGER) AS oid, bid, outcome
+                FROM bids
+                WHERE account_id = :acc AND placed_at >= :since AND placed_at < :until
+                      AND outcome IN ('placed', 'failed')
+            ) b
+            CROSS JOIN order_history h ON h.account_id = :acc AND h.order_id = b.oid
+            GROUP BY h.type_id, h.category_id
+            """,
+            params,
+        )
+        for type_id, category_id, attempts, placed, ratio_sum in rows:
+            for seg in stats._levels(type_id, category_id):
+                seg.attempts += attempts or 0
+                seg.placed += placed or 0
+                seg.placed_ratio_sum += ratio_sum or 0.0
+        return stats
+
+
+# ---- стратегии -----------------------------------------------------------------
+
+
+class FixedRatio:
+    """Доля от рекомендованного бюджета."""
+
+    name = "fixed"
+
+    def __init__(self, ratio: float = 0.95):
+        self.ratio = ratio
+
+    def price(self, inp: PriceInput) -> Optional[float]:
+        return inp.recommended * self.ratio if inp.recommended > 0 else None
+
+
+@dataclass(frozen=True)
+class PriceRule:
+    """Правило цены для типов/предметов (пустой набор — любые)."""
+
+    types: frozenset = frozenset()
+    categories: frozenset = frozenset()
+    ratio: float = 0.95
+    base: str = "recommended"  # "recommended" или "budget" (бюджет заказчика, если указан)
+    per_offer: float = 0.0  # скидка за каждый поданный отклик (доля)
+    max_discount: float = 0.3
+    min_bid: int = 0
+    max_bid: int = 0  # 0 — без ограничения
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "PriceRule":
+        return cls(
+            types=frozenset(_int(x, -1) for x in raw.get("types", []) or []),
+            categories=frozenset(_int(x, -1) for x in raw.get("categories", []) or []),
+            ratio=float(raw.get("ratio", cls.ratio)),
+            base="budget" if raw.get("base") == "budget" else "recommended",
+            per_offer=max(0.0, float(raw.get("per_offer", cls.per_offer))),
+            max_discount=min(0.9, max(0.0, float(raw.get("max_discount", cls.max_discount)))),
+            min_bid=max(0, _int(raw.get("min_bid"))),
+            max_bid=max(0, _int(raw.get("max_bid"))),
+        )
+
+    def applies(self, order: Order) -> bool:
+        return (not self.types or order.type_id in self.types) and (
+            not self.categories or order.category_id in self.categories
+        )
+
+
+class RuleBased:
+    """Первое подходящее правило из `pricing.rules`."""
+
+    name = "rules"
+
+    def __init__(self, rules: Iterable[PriceRule]):
+        self.rules = tuple(rules)
+
+    def price(self, inp: PriceInput) -> Optional[float]:
+        for rule in self.rules:
+            if not rule.applies(inp.order):
+                continue
+            base = inp.order.budget if rule.base == "budget" and inp.order.budget > 0 else inp.recommended
+            if base <= 0:
+                return None
+            discount = min(rule.max_discount, rule.per_offer * max(inp.offers, 0))
+            value = base * rule.ratio * (1.0 - discount)
+            if rule.min_bid:
+                value = max(value, rule.min_bid)
+            if rule.max_bid:
+                value = min(value, rule.max_bid)
+            return value
+        return None
+
+
+class HistoryBased:
+    """Цена по истории аккаунта.
+
+    Отправная точка — `ratio` от рекомендации. Если заказчики сегмента обычно
+    предлагают меньше рекомендации, цена опускается к их уровню (с запасом
+    `undercut`). За отклики сверх обычного для сегмента — скидка `per_offer`
+    каждый. Если сайт в сегменте часто не принимал ставки, цена возвращается
+    к уровню, который он принимал.
+    """
+
+    name = "history"
+
+    def __init__(
+        self,
+        stats: PricingStats,
+        ratio: float = 0.95,
+        min_samples: int = 20,
+        undercut: float = 0.05,
+        per_offer: float = 0.01,
+        max_discount: float = 0.2,
+    ):
+        self.stats = stats
+        self.ratio = ratio
+        self.min_samples = min_samples
+        self.undercut = undercut
+        self.per_offer = per_offer
+        self.max_discount = max_discount
+
+    def price(self, inp: PriceInput) -> Optional[float]:
+        order = inp.order
+        seg = self.stats.lookup(order.type_id, order.category_id, self.min_samples)
+        if seg is None or inp.recommended <= 0:
+            return None  # данных мало — решает следующая стратегия
+        ratio = self.ratio
+        market = seg.budget_ratio
+        if market is not None:
+            ratio = min(ratio, market * (1.0 - self.undercut))
+        usual = seg.mean_offers
+        if usual is not None and inp.offers > usual:
+            ratio *= 1.0 - min(self.max_discount, self.per_offer * (inp.offers - usual))
+        rate, accepted = seg.placed_rate, seg.placed_ratio
+        if rate is not None and rate < 0.5 and seg.attempts >= 5 and accepted is not None:
+            ratio = max(ratio, accepted)
+        return inp.recommended * max(ratio, 0.05)
+
+
+# ---- цепочка -------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class PricingConfig:
+    """Секция `pricing` настроек аккаунта."""
+
+    strategy: str = "fixed"  # "fixed", "rules" или "history" (правила всегда проверяются первыми)
+    ratio: float = 0.95
+    rules: Tuple[PriceRule, ...] = ()
+    history_days: int = 30
+    min_samples: int = 20
+    undercut: float = 0.05
+    per_offer: float = 0.01
+    clamp_to_market: bool = False  # держать цену в диапазоне бюджетов ленты
+    cap_to_budget: bool = False  # не выше бюджета заказчика, если он указан
+    round_to: int = 1
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "PricingConfig":
+        cfg = settings.get("pricing", {}) or {}
+        default = cls()
+        return cls(
+            strategy=str(cfg.get("strategy", default.strategy)),
+            ratio=min(2.0, max(0.05, float(cfg.get("ratio", default.ratio)))),
+            rules=tuple(PriceRule.from_dict(r) for r in cfg.get("rules", []) or [] if isinstance(r, dict)),
+            history_days=max(1, int(cfg.get("history_days", default.history_days))),
+            min_samples=max(1, int(cfg.get("min_samples", default.min_samples))),
+            undercut=min(0.5, max(0.0, float(cfg.get("undercut", default.undercut)))),
+            per_offer=min(0.2, max(0.0, float(cfg.get("per_offer", default.per_offer)))),
+            clamp_to_market=bool(cfg.get("clamp_to_market", default.clamp_to_market)),
+            cap_to_budget=bool(cfg.get("cap_to_budget", default.cap_to_budget)),
+            round_to=max(1, int(cfg.get("round_to", default.round_to))),
+        )
+
+    @property
+    def needs_market(self) -> bool:
+        return self.clamp_to_market
+
+    @property
+    def needs_history(self) -> bool:
+        return self.strategy == "history"
+
+
+@dataclass
+class Quote:
+    bid: int
+    strategy: str  # какая стратегия назначила цену
+
+
+@dataclass
+class Pricer:
+    """Цепочка стратегий и общие ограничения цены."""
+
+    config: PricingConfig
+    strategies: List[object] = field(default_factory=list)
+    stats: Optional[PricingStats] = None
+
+    def quote(self, inp: PriceInput) -> Quote:
+        value, name = None, "fixed"
+        for strategy in self.strategies:
+            value = strategy.price(inp)
+            if value is not None:
+                name = strategy.name
+                break
+        if value is None:
+            value = float(inp.order.budget or 1)
+        cfg = self.config
+        market = inp.market
+        if cfg.clamp_to_market and market is not None:
+            value = min(max(value, market.min_budget), market.max_budget)
+        if cfg.cap_to_budget and inp.order.budget > 0:
+            value = min(value, inp.order.budget)
+        bid = int(value)
+        if cfg.round_to > 1:
+            bid -= bid % cfg.round_to
+        return Quote(max(1, bid), name)
+
+    def observe_orders(self, orders: Iterable[Order]) -> None:
+        if self.stats is not None:
+            self.stats.observe_orders(orders)
+
+    def observe_bid(self, order: Order, bid: int, recommended: int, outcome: str) -> None:
+        if self.stats is not None:
+            self.stats.observe_bid(order.type_id, order.category_id, bid, recommended, outcome)
+
+
+def make_pricer(config: PricingConfig, stats: Optional[PricingStats] = None) -> Pricer:
+    """Цепочка по настройкам: правила → выбранная стратегия → фиксированная доля."""
+    strategies: List[object] = []
+    if config.rules:
+        strategies.append(RuleBased(config.rules))
+    if config.strategy == "history" and stats is not None:
+        strategies.append(
+            HistoryBased(stats, config.ratio, config.min_samples, config.undercut, config.per_offer)
+        )
+    strategies.append(FixedRatio(config.ratio))
+    return Pricer(config, strategies, stats if config.needs_history else None)
+
+
+def load_pricer(account_id: str, settings: dict, db: Optional[Database] = None) -> Pricer:
+    """Цепочка для аккаунта; статистика истории читается, только если она нужна."""
+    config = PricingConfig.from_settings(settings)
+    stats = None
+    if config.needs_history:
+        started = time.perf_counter()
+        stats = PricingStats.load(account_id, time.time() - config.history_days * 86400, db)
+        log.debug("Статистика цен: %s сегментов за %.0f мс", len(stats), (time.perf_counter() - started) * 1000)
+    return make_pricer(config, stats)
+
+
+# ---- офлайн‑оценка -------------------------------------------------------------
+
+
+@dataclass
+class Evaluation:
+    """Сравнение стратегии с реальными ставками истории."""
+
+    bids: int = 0
+    changed: int = 0  # цена отличается от поставленной
+    abs_delta_sum: float = 0.0
+    ratio_sum: float = 0.0  # Σ цена / рекомендация
+    above_budget: int = 0  # выше бюджета заказчика (когда он указан)
+    budgeted: int = 0
+    by_strategy: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def mean_abs_delta(self) -> float:
+        return self.abs_delta_sum / self.bids if self.bids else 0.0
+
+    @property
+    def mean_ratio(self) -> float:
+        return self.ratio_sum / self.bids if self.bids else 0.0
+
+    @property
+    def above_budget_share(self) -> float:
+        return self.above_budget / self.budgeted if self.budgeted else 0.0
+
+
+def evaluate(account_id: str, settings: dict, since: float, db: Optional[Database] = None) -> Evaluation:
+    """Проигрывает ставки истории с `since` через стратегию из `settings`.
+
+    Статистика строится только по данным до `since` и пополняется по ходу
+    проигрывания в хронологическом порядке — стратегия не «подглядывает» в будущее.
+    """
+    db = db or get_database()
+    config = PricingConfig.from_settings(settings)
+    stats = None
+    if config.needs_history:
+        # Статистика — строго до `since`; дальнейшие данные поступят по ходу проигрывания
+        stats = PricingStats.load(account_id, since - config.history_days * 86400, db, until=since)
+    pricer = make_pricer(config, stats)
+    rows = db.query(
+        """
+        SELECT h.order_id, h.creation, h.type_id, h.category_id, h.budget, h.recommended, h.offers,
+               b.bid, b.outcome, b.placed_at
+        FROM (
+            SELECT CAST(order_id AS INTEGER) AS oid, bid, outcome, placed_at
+            FROM bids
+            WHERE account_id = :acc AND placed_at >= :since AND outcome IN ('placed', 'failed')
+        ) b
+        CROSS JOIN order_history h ON h.account_id = :acc AND h.order_id = b.oid
+        ORDER BY b.placed_at
+        """,
+        {"acc": account_id, "since": int(since)},
+    )
+    seen_rows = db.query(
+        "SELECT seen_at, type_id, category_id, budget, recommended, offers FROM order_history "
+        "WHERE account_id = ? AND seen_at >= ? ORDER BY seen_at",
+        (account_id, int(since)),
+    )
+    result = Evaluation()
+    pos = 0
+    for oid, creation, type_id, category_id, budget, rec, offers, bid, outcome, placed_at in rows:
+        if stats is not None:
+            while pos < len(seen_rows) and seen_rows[pos][0] <= placed_at:
+                stats.observe_order(*seen_rows[pos][1:])
+                pos += 1
+        order = Order(oid, creation, type_id, "", category_id, "", budget=budget, recommended_budget=rec, count_offers=offers)
+        quote = pricer.quote(PriceInput(order, rec or budget, offers))
+        result.bids += 1
+        result.by_strategy[quote.strategy] = result.by_strategy.get(quote.strategy, 0) + 1
+        result.changed += int(quote.bid != bid)
+        result.abs_delta_sum += abs(quote.bid - bid)
+        if rec:
+            result.ratio_sum += quote.bid / rec
+        if budget > 0:
+            result.budgeted += 1
+            result.above_budget += int(quote.bid > budget)
+        pricer.observe_bid(order, bid, rec, outcome)
+    return result
+
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+"""Ограничитель скорости «ведро с токенами».
+
+Используется для жёсткого бюджета запросов аккаунта в планировщике опроса и
+для темпа ставок в конвейере откликов. Время в `TokenBucket` передаётся явно
+(монотонные секунды), поэтому сам алгоритм не зависит от asyncio.
+"""
+
+import asyncio
+
+
+class TokenBucket:
+    """Ведро ёмкостью `capacity`, пополняется со скоростью `rate` токенов в секунду.
+
+    `consume()` может увести баланс в минус — это «долг», который отрабатывается
+    ожиданием: так учитываются запросы, уже сделанные сверх бюджета (повторы, ошибки).
+    """
+
+    def __init__(self, rate: float, capacity: float, now: float = 0.0):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate и capacity должны быть положительными")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = now
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def tokens(self, now: float) -> float:
+        self._refill(now)
+        return self._tokens
+
+    def try_consume(self, n: float, now: float) -> bool:
+        """Забирает `n` токенов, если они есть."""
+        self._refill(now)
+        if self._tokens >= n:
+            self._tokens -= n
+            return True
+        return False
+
+    def consume(self, n: float, now: float) -> None:
+        """Безусловно списывает `n` токенов (баланс может стать отрицательным)."""
+        self._refill(now)
+        self._tokens -= n
+
+    def time_until(self, n: float, now: float) -> float:
+        """Сколько секунд ждать, пока в ведре наберётся `n` токенов."""
+        self._refill(now)
+        missing = n - self._tokens
+        return max(0.0, missing / self.rate)
+
+
+class AsyncRateLimiter:
+    """Асинхронная обёртка над `TokenBucket`: `await acquire()` ждёт свободный токен.
+
+    Время берётся из часов текущего цикла событий.
+    """
+
+    def __init__(self, per_minute: float, burst: float):
+        self._bucket = TokenBucket(rate=float(per_minute) / 60.0, capacity=max(1.0, float(burst)), now=self._now())
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _now() -> float:
+        return asyncio.get_running_loop().time()
+
+    async def acquire(self) -> None:
+        # Замок сохраняет очередность: кто раньше пришёл, тот раньше получит токен
+        async with self._lock:
+            while not self._bucket.try_consume(1.0, self._now()):
+                await asyncio.sleep(self._bucket.time_until(1.0, self._now()))
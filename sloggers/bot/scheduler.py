@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+"""Планировщики опроса ленты.
+
+Планировщик решает, через сколько секунд делать следующий шаг цикла бота, по
+итогам предыдущего шага (`TickResult`). Выбирается секцией `scheduler` в
+настройках аккаунта:
+
+- `fixed` — постоянный шаг (прежнее поведение);
+- `adaptive` — шаг сокращается, когда заказы идут часто (не ниже `min_seconds`,
+  по умолчанию — штатного шага), растёт экспоненциально при ошибках и капче, учитывает профиль активности по часам суток (по истории
+  собственных увиденных заказов), добавляет джиттер и никогда не выходит за
+  жёсткий бюджет запросов в час.
+"""
+
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from .ratelimit import TokenBucket
+
+
+@dataclass
+class TickResult:
+    """Итог одного шага цикла бота."""
+
+    requests: int = 0  # фактически отправлено HTTP‑запросов (с повторами)
+    new_orders: int = 0  # новых (не увиденных ранее) заказов
+    error: bool = False
+    captcha: bool = False
+
+
+class PollScheduler:
+    """Базовый планировщик: постоянный шаг `base`."""
+
+    def __init__(self, base: float):
+        self.base = float(base)
+
+    def next_delay(self, result: TickResult, now: float) -> float:
+        return self.base
+
+
+class FixedScheduler(PollScheduler):
+    """Постоянный интервал — как до появления планировщиков."""
+
+
+def hourly_profile(creations: Iterable[int], smoothing: float = 1.0) -> List[float]:
+    """Относительная активность по часам суток (локальное время) — 24 значения, среднее 1.
+
+    Строится по времени создания увиденных заказов; `smoothing` — добавка к
+    каждому часу, чтобы пустые часы не давали деления на ноль.
+    """
+    counts = [0.0] * 24
+    for ts in creations:
+        if ts:
+            counts[time.localtime(int(ts)).tm_hour] += 1
+    total = sum(counts)
+    if total == 0:
+        return [1.0] * 24
+    counts = [c + smoothing for c in counts]
+    mean = sum(counts) / 24
+    return [c / mean for c in counts]
+
+
+class AdaptiveScheduler(PollScheduler):
+    """Адаптивный шаг опроса в пределах [min_delay, max_delay] и бюджета запросов."""
+
+    def __init__(
+        self,
+        base: float,
+        min_delay: float,
+        max_delay: float,
+        max_requests_per_hour: float,
+        jitter: float = 0.15,
+        max_backoff: float = 300.0,
+        captcha_backoff: float = 120.0,
+        profile: Optional[List[float]] = None,
+        rng: Optional[random.Random] = None,
+        now: float = 0.0,
+    ):
+        super().__init__(base)
+        self.min_delay = float(min_delay)
+        self.max_delay = float(max(max_delay, min_delay))
+        self.jitter = max(0.0, min(0.5, float(jitter)))
+        self.max_backoff = float(max_backoff)
+        self.captcha_backoff = float(captcha_backoff)
+        self.profile = profile or [1.0] * 24
+        self._rng = rng or random.Random()
+        # Бюджет: ведро на час, допускаем всплеск в 5 минут запросов
+        rate = float(max_requests_per_hour) / 3600.0
+        self.budget = TokenBucket(rate=rate, capacity=max(1.0, rate * 300), now=now)
+        self._rate = 0.0  # EWMA новых заказов в секунду
+        self._failures = 0
+        self._last = now
+
+    @property
+    def arrival_rate(self) -> float:
+        return self._rate
+
+    def next_delay(self, result: TickResult, now: float) -> float:
+        self.budget.consume(result.requests, now)
+        dt = max(1e-3, now - self._last)
+        self._last = now
+
+        if result.error or result.captcha:
+            self._failures += 1
+            # Показатель ограничен: за долгий простой 2 ** n не должно переполнить float
+            delay = min(self.max_backoff, self.base * (2 ** min(self._failures, 20)))
+            if result.captcha:
+                delay = max(delay, self.captcha_backoff)
+        else:
+            self._failures = 0
+            # EWMA скорости прихода с «памятью» около минуты
+            alpha = 1.0 - math.exp(-dt / 60.0)
+            self._rate += alpha * (result.new_orders / dt - self._rate)
+            # Чем чаще заказы (в штуках за базовый шаг), тем короче шаг
+            delay = self.base / (1.0 + self._rate * self.base)
+            # Профиль суток: в активные часы чаще, в тихие — реже
+            activity = self.profile[time.localtime().tm_hour]
+            delay /= max(0.25, min(4.0, activity))
+            delay = min(self.max_delay, max(self.min_delay, delay))
+            delay *= 1.0 + self._rng.uniform(-self.jitter, self.jitter)
+
+        # Жёсткий бюджет: без токена на следующий запрос — ждём пополнения
+        return max(delay, self.budget.time_until(1.0, now))
+
+
+def make_scheduler(settings: dict, base: float, creations: Iterable[int] = (), now: float = 0.0) -> PollScheduler:
+    """Создаёт планировщик по секции `scheduler` настроек аккаунта.
+
+    `base` — штатный шаг цикла; `creations` — времена создания увиденных заказов
+    для профиля суток.
+    """
+    cfg = settings.get("scheduler", {}) or {}
+    kind = cfg.get("kind", "adaptive")
+    if kind == "fixed":
+        return FixedScheduler(base)
+    if kind != "adaptive":
+        raise ValueError(f"Неизвестный планировщик опроса: {kind}")
+    profile = hourly_profile(creations) if cfg.get("use_time_profile", True) else None
+    return AdaptiveScheduler(
+        base=base,
+        min_delay=float(cfg.get("min_seconds", base)),  # чаще штатного шага — только если задано явно
+        max_delay=float(cfg.get("max_seconds", base * 10)),
+        max_requests_per_hour=float(cfg.get("max_requests_per_hour", 1200)),
+        jitter=float(cfg.get("jitter", 0.15)),
+        max_backoff=float(cfg.get("max_backoff_seconds", 300)),
+        captcha_backoff=float(cfg.get("captcha_backoff_seconds", 120)),
+        profile=profile,
+        now=now,
+    )
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+"""Оценка кандидатов на ставку: в каком порядке конвейер берёт заказы.
+
+Когда узкое место — ограничитель темпа ставок, в очереди конвейера копятся
+кандидаты с нескольких опросов, и важно, какие из них уйдут первыми. Каждый
+заказ, прошедший фильтр, получает взвешенную оценку (секция `scoring`
+настроек аккаунта, веса `weights`):
+- `freshness` — свежесть: 1 для только что созданного, половина за каждые
+  `half_life_seconds` возраста;
+- `budget` — бюджет (рекомендованный, иначе заказчика) относительно `budget_scale`, не больше 1;
+- `offers` — мало конкурентов: 1 / (1 + число откликов), 0.5 — если число неизвестно;
+- `premium`, `express`, `online` — флаги заказа и «заказчик в сети»;
+- `category` — доля принятых сайтом ставок в предмете по истории аккаунта
+  (сглаженная к общей доле, пока ставок в предмете мало).
+
+Страница оценивается одним проходом (`OrderScorer.score_batch`): веса и
+константы нормировки считаются один раз при создании, нулевые веса не считаются
+вовсе. Выключенная оценка (`enabled: false`) возвращает время создания —
+конвейер берёт сначала самые свежие, как раньше.
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..core.history import OUTCOME_FAILED, OUTCOME_PLACED, HistoryStore
+from ..core.orders import Order
+
+
+log = logging.getLogger(__name__)
+
+# Веса по умолчанию: свежесть важнее всего, остальное — поправки
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "freshness": 3.0,
+    "budget": 1.0,
+    "offers": 1.0,
+    "premium": 0.5,
+    "express": 0.5,
+    "online": 0.5,
+    "category": 1.0,
+}
+
+
+@dataclass(frozen=True)
+class ScoringConfig:
+    """Секция `scoring` настроек аккаунта."""
+
+    enabled: bool = True
+    weights: Tuple[Tuple[str, float], ...] = tuple(DEFAULT_WEIGHTS.items())
+    half_life_seconds: float = 300.0
+    budget_scale: float = 5000.0
+    history_days: int = 30
+    prior_bids: int = 10  # «вес» общей доли при сглаживании доли предмета
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "ScoringConfig":
+        cfg = settings.get("scoring", {}) or {}
+        default = cls()
+        weights = dict(DEFAULT_WEIGHTS)
+        for name, value in (cfg.get("weights", {}) or {}).items():
+            if name not in DEFAULT_WEIGHTS:
+                log.warning("Неизвестный вес оценки заказа: %s", name)
+                continue
+            weights[name] = max(0.0, float(value))
+        return cls(
+            enabled=bool(cfg.get("enabled", default.enabled)),
+            weights=tuple(weights.items()),
+            half_life_seconds=max(1.0, float(cfg.get("half_life_seconds", default.half_life_seconds))),
+            budget_scale=max(1.0, float(cfg.get("budget_scale", default.budget_scale))),
+            history_days=max(1, int(cfg.get("history_days", default.history_days))),
+            prior_bids=max(0, int(cfg.get("prior_bids", default.prior_bids))),
+        )
+
+    def weight(self, name: str) -> float:
+        return dict(self.weights).get(name, 0.0)
+
+
+class OrderScorer:
+    """Оценка страницы кандидатов; доли предметов обновляются по исходам ставок."""
+
+    def __init__(self, config: ScoringConfig, category_rates: Optional[Dict[int, Tuple[int, int]]] = None):
+        self.config = config
+        w = config.weight
+        self._w_fresh = w("freshness")
+        self._w_budget = w("budget")
+        self._w_offers = w("offers")
+        self._w_premium = w("premium")
+        self._w_express = w("express")
+        self._w_online = w("online")
+        self._w_category = w("category")
+        # exp(k · возраст) = 0.5 ** (возраст / half_life)
+        self._decay = -math.log(2) / config.half_life_seconds
+        self._budget_k = 1.0 / config.budget_scale
+        # Предмет → (ставок, принято) и сглаженная доля, пересчитываемая при каждом исходе
+        self._counts: Dict[int, Tuple[int, int]] = dict(category_rates or {})
+        self._total = [sum(b for b, _ in self._counts.values()), sum(p for _, p in self._counts.values())]
+        self._rates: Dict[int, float] = {}
+        self._prior = 0.5
+        self._refresh_rates()
+
+    def _refresh_rates(self) -> None:
+        bids, placed = self._total
+        self._prior = prior = placed / bids if bids else 0.5
+        m = self.config.prior_bids
+        self._rates = {cat: (p + prior * m) / (b + m) if b + m else prior for cat, (b, p) in self._counts.items()}
+
+    def category_rate(self, category_id: int) -> float:
+        return self._rates.get(category_id, self._prior)
+
+    def observe_bid(self, order: Order, outcome: str) -> None:
+        """Исход ставки — в долю предмета (учитываются только принятые и отклонённые ставки)."""
+        if not self._w_category or outcome not in (OUTCOME_PLACED, OUTCOME_FAILED):
+            return
+        placed = int(outcome == OUTCOME_PLACED)
+        b, p = self._counts.get(order.category_id, (0, 0))
+        self._counts[order.category_id] = (b + 1, p + placed)
+        self._total[0] += 1
+        self._total[1] += placed
+        self._refresh_rates()
+
+    def score_batch(self, orders: Iterable[Order], now: Optional[float] = None) -> List[float]:
+        """Оценки заказов страницы в том же порядке (больше — раньше в очереди)."""
+        if not self.config.enabled:
+            return [float(o.creation) for o in orders]
+        now = time.time() if now is None else now
+        exp = math.exp
+        decay, budget_k = self._decay, self._budget_k
+        w_fresh, w_budget, w_offers = self._w_fresh, self._w_budget, self._w_offers
+        w_premium, w_express, w_online = self._w_premium, self._w_express, self._w_online
+        w_category = self._w_category
+        rates, prior = self._rates, self._prior
+        scores = []
+        for o in orders:
+            s = 0.0
+            if w_fresh:
+                age = now - o.creation if o.creation else 0.0
+                s += w_fresh * exp(decay * age) if age > 0 else w_fresh
+            if w_budget:
+                s += w_budget * min(1.0, (o.recommended_budget or o.budget) * budget_k)
+            if w_offers:
+                n = o.count_offers
+                s += w_offers * (1.0 / (1 + n) if n >= 0 else 0.5)
+            if o.is_premium:
+                s += w_premium
+            if o.is_express:
+                s += w_express
+            if o.customer_online:
+                s += w_online
+            if w_category:
+                s += w_category * rates.get(o.category_id, prior)
+            scores.append(s)
+        return scores
+
+
+def load_scorer(account_id: str, settings: dict, history: Optional[HistoryStore] = None) -> OrderScorer:
+    """Оценщик для аккаунта; доли предметов читаются из истории, только если их вес не нулевой."""
+    config = ScoringConfig.from_settings(settings)
+    rates: Dict[int, Tuple[int, int]] = {}
+    if config.enabled and config.weight("category"):
+        store = history or HistoryStore(account_id)
+        for row in store.aggregate("category", time.time() - config.history_days * 86400):
+            if row.key is not None and row.bids:
+                rates[row.key] = (row.bids, row.placed)
+    return OrderScorer(config, rates)
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+"""Постоянный индекс увиденных заказов аккаунта.
+
+Индекс хранит high‑water mark — самый свежий увиденный заказ (creation, id) — и
+компактный набор целочисленных ID заказов в окне `window_seconds` до этой отметки.
+Всё, что старше окна, считается увиденным без поиска по набору, поэтому таблица
+не растёт бесконечно. Кроме окна набор ограничен и по числу заказов
+(`max_orders`): при переполнении вытесняются заказы с самым ранним временем
+создания (куча по `creation` — страницы ленты обходятся от новых к старым, и
+порядок добавления с ним не совпадает), а нижняя граница (`floor`) поднимается
+до их времени создания — заказы старше неё тоже считаются увиденными. Так
+память аккаунта не зависит ни от времени работы, ни от потока заказов.
+
+Индекс хранится в базе приложения (таблицы `seen_state` и `seen_orders`) и
+переживает перезапуск: бот не оценивает повторно заказы, которые уже видел.
+Сохранение пишет только изменения с прошлого сохранения.
+
+ID заказа — целое число, как и в `Order`; заказ с нечисловым ID бот
+отбрасывает при разборе ленты, и индекс его не отслеживает.
+
+Если фильтры аккаунта изменились, набор ID сбрасывается — заказы нужно оценить заново.
+"""
+
+import hashlib
+import heapq
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..core.database import Database
+from ..core.storage import get_database
+
+
+log = logging.getLogger(__name__)
+
+
+def order_key(order_id) -> int:
+    """ID заказа сайта ("11729499") → int; нечисловой ID → -1 (такие заказы не отслеживаются)."""
+    try:
+        return int(order_id)
+    except (TypeError, ValueError):
+        return -1
+
+
+def filters_fingerprint(settings: dict) -> str:
+    """Отпечаток фильтров аккаунта: при его смене увиденные заказы оцениваются заново."""
+    raw = json.dumps(settings.get("filters", {}), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class SeenOrderIndex:
+    """Набор увиденных заказов с high‑water mark и окном хранения."""
+
+    def __init__(
+        self,
+        db: Database,
+        account_id: str,
+        fingerprint: str = "",
+        window_seconds: int = 3 * 24 * 3600,
+        max_orders: int = 20000,
+    ):
+        self._db = db
+        self._account_id = account_id
+        self._fingerprint = fingerprint
+        self._window = int(window_seconds)
+        self._max = max(1, int(max_orders))
+        # id → creation и куча (creation, id) для вытеснения самых ранних;
+        # устаревшие записи кучи (заказ убран или пересоздан) пропускаются при извлечении
+        self._ids: Dict[int, int] = {}
+        self._heap: List[Tuple[int, int]] = []
+        self._hw: Tuple[int, int] = (0, 0)  # (creation, id) самого свежего заказа
+        self._floor = 0  # заказы с creation ниже — увиденные (вытеснены из набора)
+        self._border = 0  # max(floor, отметка − окно): ниже — увиденные без поиска
+        # Изменения с прошлого сохранения
+        self._added: Dict[int, int] = {}
+        self._removed: Set[int] = set()
+        self._reset = False
+        self._dirty = False
+
+    @property
+    def high_water(self) -> Tuple[int, int]:
+        return self._hw
+
+    @property
+    def floor(self) -> int:
+        return self._floor
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def load(self) -> "SeenOrderIndex":
+        acc = self._account_id
+        state = self._db.query_one("SELECT filters, hw_creation, hw_id, floor FROM seen_state WHERE account_id = ?", (acc,))
+        if state is None:
+            return self
+        self._hw = (int(state[1]), int(state[2]))
+        self._floor = int(state[3])
+        self._update_border()
+        if state[0] != self._fingerprint:
+            # Фильтры поменялись: отметка остаётся (старые заказы неинтересны), набор — нет
+            self._ids = {}
+            self._heap = []
+            self._reset = True
+            self._dirty = True
+            return self
+        rows = self._db.query(
+            "SELECT order_id, creation FROM seen_orders WHERE account_id = ? ORDER BY creation, order_id", (acc,)
+        )
+        self._ids = {int(i): int(c) for i, c in rows}
+        # Строки уже по возрастанию (creation, id) — это готовая куча
+        self._heap = [(c, i) for i, c in self._ids.items()]
+        if len(self._ids) > self._max:
+            # Лимит уменьшили в настройках — лишнее уйдёт из базы при сохранении
+            self._prune()
+            self._dirty = True
+        return self
+
+    def save(self) -> None:
+        """Сохраняет изменения одной транзакцией, если они были."""
+        if not self._dirty:
+            return
+        acc = self._account_id
+        border = self._prune()
+        with self._db.transaction() as conn:
+            if self._reset:
+                conn.execute("DELETE FROM seen_orders WHERE account_id = ?", (acc,))
+            if self._removed:
+                conn.executemany(
+                    "DELETE FROM seen_orders WHERE account_id = ? AND order_id = ?",
+                    [(acc, i) for i in self._removed],
+                )
+            if self._added:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO seen_orders (account_id, order_id, creation) VALUES (?, ?, ?)",
+                    [(acc, i, c) for i, c in self._added.items()],
+                )
+            if border:
+                conn.execute("DELETE FROM seen_orders WHERE account_id = ? AND creation < ?", (acc, border))
+            conn.execute(
+                "INSERT OR REPLACE INTO seen_state (account_id, filters, hw_creation, hw_id, floor) VALUES (?, ?, ?, ?, ?)",
+                (acc, self._fingerprint, self._hw[0], self._hw[1], self._floor),
+            )
+        self._added.clear()
+        self._removed.clear()
+        self._reset = False
+        self._dirty = False
+
+    def is_seen(self, order_id, creation: int = 0) -> bool:
+        key = order_key(order_id)
+        if key in self._ids:
+            return True
+        # Заказы старше окна хранения (или вытесненных) не отслеживаются поштучно
+        return int(creation or 0) < self._border
+
+    def creations(self) -> List[int]:
+        """Времена создания отслеживаемых заказов (для профиля активности по часам)."""
+        return list(self._ids.values())
+
+    def add(self, order_id, creation: int = 0) -> None:
+        key = order_key(order_id)
+        creation = int(creation or 0)
+        if key < 0 or self._ids.get(key) == creation:
+            return
+        self._ids[key] = creation
+        heapq.heappush(self._heap, (creation, key))
+        self._added[key] = creation
+        self._removed.discard(key)
+        if (creation, key) > self._hw:
+            self._hw = (creation, key)
+            self._update_border()
+        self._dirty = True
+        if len(self._ids) > self._max:
+            self._evict(len(self._ids) - self._max)
+
+    def discard(self, order_id) -> None:
+        """Снова делает заказ «новым» (например, ставка не успела уйти до остановки)."""
+        key = order_key(order_id)
+        if self._ids.pop(key, None) is not None:
+            self._added.pop(key, None)
+            self._removed.add(key)
+            self._dirty = True
+
+    def add_many(self, items: Iterable[Tuple[object, int]]) -> None:
+        for order_id, creation in items:
+            self.add(order_id, creation)
+
+    def _update_border(self) -> None:
+        window = self._hw[0] - self._window if self._hw[0] else 0
+        self._border = max(self._floor, window, 0)
+
+    def _pop_oldest(self) -> Tuple[int, int]:
+        """Снимает с кучи самый ранний отслеживаемый заказ: (creation, id)."""
+        heap, ids = self._heap, self._ids
+        while True:
+            creation, key = heapq.heappop(heap)
+            if ids.get(key) == creation:
+                return creation, key
+
+    def _evict(self, count: int) -> None:
+        """Вытесняет `count` заказов с самым ранним временем создания и поднимает `floor`."""
+        ids = self._ids
+        floor = self._floor
+        for _ in range(count):
+            creation, key = self._pop_oldest()
+            del ids[key]
+            self._added.pop(key, None)
+            floor = max(floor, creation + 1)
+        self._floor = floor
+        self._update_border()
+
+    def _prune(self) -> int:
+        """Убирает из памяти заказы ниже границы и сверх лимита; возвращает границу (0 — её ещё нет)."""
+        if len(self._ids) > self._max:
+            self._evict(len(self._ids) - self._max)
+        border = self._border
+        if border <= 0:
+            return 0
+        heap, ids = self._heap, self._ids
+        while heap and heap[0][0] < border:
+            creation, key = heapq.heappop(heap)
+            if ids.get(key) == creation:
+                del ids[key]
+        if len(heap) > 2 * len(ids) + 64:
+            # Записи убранных и пересозданных заказов копятся — пересобираем кучу
+            self._heap = [(c, i) for i, c in ids.items()]
+            heapq.heapify(self._heap)
+        return border
+
+
+def open_seen_index(account_id: str, settings: dict, db: Optional[Database] = None) -> SeenOrderIndex:
+    """Загружает индекс аккаунта с учётом текущих фильтров."""
+    window_hours = int(settings.get("seen_window_hours", 72))
+    return SeenOrderIndex(
+        db or get_database(),
+        account_id,
+        fingerprint=filters_fingerprint(settings),
+        window_seconds=window_hours * 3600,
+        max_orders=int(settings.get("seen_max_orders", 20000)),
+    ).load()
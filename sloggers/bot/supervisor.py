@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+"""Супервизор фонового режима: много аккаунтов в одном процессе.
+
+Каждый включённый аккаунт работает задачей `AccountBot.run` на общем asyncio‑цикле.
+Супервизор:
+- разносит старты аккаунтов по интервалу опроса, чтобы запросы шли ровно;
+- перезапускает упавшую задачу аккаунта с экспоненциальной паузой;
+- при перезапуске перечитывает настройки и cookies из хранилища.
+
+Модуль не импортирует PySide6.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from ..core.storage import get_account, list_accounts, load_account_cookies, load_account_settings
+from .engine import AccountBot, tick_interval
+
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class AccountSpec:
+    """Что нужно супервизору, чтобы поднять бота аккаунта."""
+
+    account_id: str
+    name: str
+    settings: dict
+    cookies: List[Dict] = field(default_factory=list)
+
+
+def load_account_spec(acc_id: str) -> Optional[AccountSpec]:
+    """Собирает настройки и cookies аккаунта из хранилища.
+
+    Возвращает None, если аккаунта нет, он выключен или у него нет cookies.
+    """
+    acc = get_account(acc_id)
+    if acc is None:
+        return None
+    settings = load_account_settings(acc_id)
+    if not settings.get("enabled", True):
+        return None
+    cookies = load_account_cookies(acc_id)
+    if not cookies:
+        return None
+    settings["base_url"] = acc.base_url
+    return AccountSpec(account_id=acc.id, name=acc.name, settings=settings, cookies=cookies)
+
+
+def collect_enabled_accounts(only: Optional[List[str]] = None) -> List[AccountSpec]:
+    """Список аккаунтов для фонового режима (с пояснениями в логе о пропущенных)."""
+    specs: List[AccountSpec] = []
+    for acc in list_accounts():
+        if only and acc.id not in only:
+            continue
+        spec = load_account_spec(acc.id)
+        if spec is None:
+            log.warning("Аккаунт %s пропущен: выключен или нет сохранённых cookies", acc.name)
+            continue
+        specs.append(spec)
+    return specs
+
+
+class Supervisor:
+    """Запускает и сторожит задачи аккаунтов на одном цикле событий."""
+
+    def __init__(
+        self,
+        accounts: List[AccountSpec],
+        restart_delay: float = 5.0,
+        max_restart_delay: float = 300.0,
+        stable_after: float = 60.0,
+    ):
+        self._accounts = accounts
+        self._restart_delay = restart_delay
+        self._max_restart_delay = max_restart_delay
+        # Сколько секунд аккаунт должен проработать, чтобы пауза перезапуска сбросилась
+        self._stable_after = stable_after
+        self.restarts: Dict[str, int] = {a.account_id: 0 for a in accounts}
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """Работает до установки `stop_event`, затем дожидается остановки всех аккаунтов."""
+        if not self._accounts:
+            log.warning("Нет аккаунтов для запуска в фоновом режиме")
+            return
+        total = len(self._accounts)
+        tasks = []
+        for idx, spec in enumerate(self._accounts):
+            # Фаза старта: равномерно по интервалу опроса аккаунта
+            offset = tick_interval(spec.settings) * idx / total
+            tasks.append(asyncio.create_task(self._supervise(spec, offset, stop_event), name=f"account:{spec.name}"))
+        log.info("Фоновый режим: запущено аккаунтов — %s", total)
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _supervise(self, spec: AccountSpec, offset: float, stop_event: asyncio.Event) -> None:
+        loop = asyncio.get_running_loop()
+        delay = self._restart_delay
+        start_delay = offset
+        while not stop_event.is_set():
+            started = loop.time()
+            try:
+                # Конструктор компилирует фильтры и запросы из настроек — ошибка в них
+                # (например, неверный `re:`‑шаблон) должна остановить только этот аккаунт
+                bot = AccountBot(spec.account_id, spec.settings, spec.cookies, label=spec.name)
+                await bot.run(stop_event, start_delay=start_delay)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception("[%s] Задача аккаунта упала: %s", spec.name, e)
+
+            self.restarts[spec.account_id] += 1
+            if loop.time() - started >= self._stable_after:
+                delay = self._restart_delay
+            log.info("[%s] Перезапуск через %.0f с", spec.name, delay)
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+            delay = min(self._max_restart_delay, delay * 2)
+            start_delay = 0.0
+
+            # Свежие настройки и cookies (могли обновиться из окна аккаунта)
+            fresh = load_account_spec(spec.account_id)
+            if fresh is None:
+                log.warning("[%s] Аккаунт выключен или потерял cookies — задача завершена", spec.name)
+                return
+            spec = fresh
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+"""Поиск ключевых слов в заголовке и описании заказа.
+
+Сотни слов‑включений и слов‑исключений аккаунта компилируются в два
+регулярных выражения (по одному на список). Обычные слова сначала
+складываются в префиксное дерево, а оно разворачивается в одну альтернативу
+без повторяющихся префиксов — движок `re` сканирует текст за один проход,
+не перебирая слова по очереди. Слова вида `re:<выражение>` добавляются как
+есть и применяются к уже нормализованному тексту (строчные буквы, «е» вместо «ё»).
+
+Сравнение без учёта регистра (`casefold`) и без различия «ё»/«е»; пробелы
+внутри фраз совпадают с любым количеством пробелов и переводов строк.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from ..core.orders import Order
+
+
+REGEX_PREFIX = "re:"
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Приводит текст к виду, в котором ищутся слова."""
+    return text.casefold().replace("ё", "е")
+
+
+def _normalize_word(word: str) -> str:
+    return _SPACES.sub(" ", normalize_text(word).strip())
+
+
+def split_keywords(raw: Any, separators: str = ",\n") -> List[str]:
+    """Список слов из настроек: список строк или строка с разделителями `separators`.
+
+    Для ввода с `re:`‑шаблонами используйте только перевод строки — в выражении
+    может встретиться запятая.
+    """
+    if isinstance(raw, (list, tuple)):
+        items = [str(x) for x in raw]
+    else:
+        items = re.split("[" + re.escape(separators) + "]", str(raw or ""))
+    return [w.strip() for w in items if w.strip()]
+
+
+def _escape(ch: str) -> str:
+    # Пробел в фразе совпадает с любой последовательностью пробельных символов текста
+    return r"\s+" if ch == " " else re.escape(ch)
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Одна альтернатива по префиксному дереву слов.
+
+    Для проверки «есть ли вхождение» слово, продолжающее другое слово, лишнее:
+    его вхождение всегда содержит вхождение короткого. Такие ветки отбрасываются.
+    """
+    trie: Dict[str, dict] = {}
+    for w in sorted(set(words), key=len):
+        node = trie
+        for ch in w:
+            if "" in node:
+                break  # уже есть более короткое слово‑префикс
+            node = node.setdefault(ch, {})
+        else:
+            node.clear()
+            node[""] = {}
+
+    def _emit(node: Dict[str, dict]) -> str:
+        if "" in node:
+            return ""
+        branches = [_escape(ch) + _emit(child) for ch, child in sorted(node.items())]
+        if len(branches) == 1:
+            return branches[0]
+        singles = [b for b in branches if len(b) == 1]
+        rest = [b for b in branches if len(b) != 1]
+        if len(singles) > 1:
+            rest.append("[" + "".join(singles) + "]")
+        else:
+            rest.extend(singles)
+        return "(?:" + "|".join(rest) + ")"
+
+    return _emit(trie) if trie else ""
+
+
+def compile_patterns(patterns: Iterable[str]) -> Optional[Pattern[str]]:
+    """Компилирует слова и `re:`‑выражения в одно регулярное выражение.
+
+    Пустой список — None. Ошибочное выражение — `re.error` с указанием шаблона.
+    """
+    words: List[str] = []
+    regexes: List[str] = []
+    for p in patterns:
+        if p.startswith(REGEX_PREFIX):
+            expr = p[len(REGEX_PREFIX):].strip()
+            try:
+                re.compile(expr)
+            except re.error as e:
+                raise re.error(f"{p!r}: {e}") from None
+            if expr:
+                regexes.append(f"(?:{expr})")
+        else:
+            w = _normalize_word(p)
+            if w:
+                words.append(w)
+    parts = regexes
+    if words:
+        parts = [_trie_regex(words)] + regexes
+    if not parts:
+        return None
+    return re.compile("|".join(parts))
+
+
+class KeywordMatcher:
+    """Слова‑включения (хотя бы одно) и слова‑исключения (ни одного).
+
+    Без включений подходит любой текст, в котором нет исключений.
+    """
+
+    __slots__ = ("_include", "_exclude")
+
+    def __init__(self, include: Iterable[str] = (), exclude: Iterable[str] = ()):
+        self._include = compile_patterns(include)
+        self._exclude = compile_patterns(exclude)
+
+    def __bool__(self) -> bool:
+        return self._include is not None or self._exclude is not None
+
+    def matches(self, text: str) -> bool:
+        return self.matches_normalized(normalize_text(text))
+
+    def matches_normalized(self, text: str) -> bool:
+        """То же, что `matches`, для текста, уже прошедшего `normalize_text`."""
+        if self._exclude is not None and self._exclude.search(text):
+            return False
+        return self._include is None or self._include.search(text) is not None
+
+    def explain(self, text: str) -> Tuple[Optional[str], Optional[str]]:
+        """Первое найденное включение и исключение (для логов и окна настроек)."""
+        norm = normalize_text(text)
+        inc = self._include.search(norm) if self._include is not None else None
+        exc = self._exclude.search(norm) if self._exclude is not None else None
+        return (inc.group(0) if inc else None, exc.group(0) if exc else None)
+
+
+def order_text(order: Order) -> str:
+    """Текст заказа для поиска слов: заголовок и описание."""
+    return f"{order.title}\n{order.description}"
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+"""Встроенный браузер аккаунта: собственный постоянный профиль и синхронизация cookies.
+
+У каждого аккаунта свой именованный `QWebEngineProfile` в папке аккаунта
+(`accounts/<id>/browser`): сессии аккаунтов не смешиваются, окна нескольких
+аккаунтов работают одновременно, а логин переживает перезапуск окна.
+
+Cookies профиля не копируются вручную: `CookieSync` слушает
+`cookieAdded`/`cookieRemoved` хранилища профиля и пачками (после короткой
+паузы) записывает в базу только изменившиеся cookies. Те же изменения
+уходят сигналом `changed` — окно передаёт их в сессию работающего бота.
+
+Модуль тянет QtWebEngine — импортировать только при создании браузера.
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from PySide6.QtCore import QByteArray, QDateTime, QObject, QTimer, Signal
+from PySide6.QtNetwork import QNetworkCookie
+from PySide6.QtWebEngineCore import QWebEngineProfile
+
+from .core.storage import account_browser_dir, apply_cookie_changes, load_account_cookies
+
+
+log = logging.getLogger(__name__)
+
+CookieKey = Tuple[str, str, str]  # домен, имя, путь
+
+
+def cookie_to_dict(cookie: QNetworkCookie) -> dict:
+    data = {
+        "domain": cookie.domain(),
+        "name": bytes(cookie.name()).decode("utf-8", errors="ignore"),
+        "value": bytes(cookie.value()).decode("utf-8", errors="ignore"),
+        "path": cookie.path() or "/",
+        "secure": cookie.isSecure(),
+        "httpOnly": cookie.isHttpOnly(),
+    }
+    if not cookie.isSessionCookie():
+        data["expires"] = float(cookie.expirationDate().toSecsSinceEpoch())
+    return data
+
+
+def dict_to_cookie(data: dict) -> QNetworkCookie:
+    cookie = QNetworkCookie(QByteArray(data["name"].encode("utf-8")), QByteArray(data.get("value", "").encode("utf-8")))
+    cookie.setDomain(data.get("domain") or "")
+    cookie.setPath(data.get("path") or "/")
+    cookie.setSecure(bool(data.get("secure")))
+    cookie.setHttpOnly(bool(data.get("httpOnly")))
+    if data.get("expires") is not None:
+        cookie.setExpirationDate(QDateTime.fromSecsSinceEpoch(int(data["expires"])))
+    return cookie
+
+
+def _key(data: dict) -> CookieKey:
+    return (data.get("domain") or "", data["name"], data.get("path") or "/")
+
+
+def site_host(base_url: str) -> str:
+    return urlsplit(base_url).hostname or ""
+
+
+def create_account_profile(account_id: str, parent: Optional[QObject] = None) -> QWebEngineProfile:
+    """Постоянный профиль браузера аккаунта (cookies, хранилище сайта и кэш — в папке аккаунта).
+
+    При первом создании профиль получает cookies, уже сохранённые в базе, —
+    аккаунт, залогиненный до появления профилей, не придётся логинить заново.
+    """
+    root = account_browser_dir(account_id)
+    fresh = not root.exists()
+    root.mkdir(parents=True, exist_ok=True)
+    profile = QWebEngineProfile(f"sloggers-{account_id}", parent)
+    profile.setPersistentStoragePath(str(root / "storage"))
+    profile.setCachePath(str(root / "cache"))
+    # Сессионные cookies тоже на диск: иначе логин теряется при закрытии окна
+    profile.setPersistentCookiesPolicy(QWebEngineProfile.ForcePersistentCookies)
+    if fresh:
+        store = profile.cookieStore()
+        for data in load_account_cookies(account_id):
+            store.setCookie(dict_to_cookie(data))
+    return profile
+
+
+class CookieSync(QObject):
+    """Переносит изменения cookies профиля в базу аккаунта (только изменившиеся).
+
+    `host` — хост сайта аккаунта: cookies сторонних доменов (счётчики, виджеты)
+    не сохраняются и боту не передаются.
+    """
+
+    changed = Signal(list, list)  # добавленные/изменённые, удалённые
+
+    def __init__(self, account_id: str, profile: QWebEngineProfile, host: str, delay_ms: int = 300, parent=None):
+        super().__init__(parent)
+        self._account_id = account_id
+        self._host = host.lower()
+        self._known: Dict[CookieKey, dict] = {_key(c): c for c in load_account_cookies(account_id)}
+        # Последнее событие по каждой cookie: Chromium при перезаписи шлёт «удалена», затем «добавлена»
+        self._pending: Dict[CookieKey, Tuple[bool, dict]] = {}
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self.flush)
+        store = profile.cookieStore()
+        store.cookieAdded.connect(lambda c: self._on_event(c, True))
+        store.cookieRemoved.connect(lambda c: self._on_event(c, False))
+
+    @property
+    def count(self) -> int:
+        return len(self._known)
+
+    def _belongs(self, domain: str) -> bool:
+        domain = domain.lstrip(".").lower()
+        return bool(domain) and (self._host == domain or self._host.endswith("." + domain))
+
+    def _on_event(self, cookie: QNetworkCookie, added: bool) -> None:
+        data = cookie_to_dict(cookie)
+        if not data["name"] or not self._belongs(data["domain"]):
+            return
+        self._pending[_key(data)] = (added, data)
+        self._timer.start()
+
+    def flush(self) -> None:
+        """Записывает накопленные изменения (вызывается таймером и при закрытии окна)."""
+        self._timer.stop()
+        pending, self._pending = self._pending, {}
+        upserts: List[dict] = []
+        removed: List[dict] = []
+        for key, (added, data) in pending.items():
+            if added:
+                if self._known.get(key) != data:
+                    upserts.append(data)
+            elif key in self._known:
+                removed.append(data)
+        if not upserts and not removed:
+            return
+        try:
+            apply_cookie_changes(self._account_id, upserts, removed)
+        except Exception as e:
+            log.warning("Не удалось сохранить cookies аккаунта: %s", e)
+            return
+        for data in upserts:
+            self._known[_key(data)] = data
+        for data in removed:
+            self._known.pop(_key(data), None)
+        self.changed.emit(upserts, removed)
@@ -0,0 +1,233 @@
+"""Встроенная база SQLite приложения.
+
+База открывается в режиме WAL: лаунчер, окна аккаунтов и фоновый режим могут
+одновременно читать её из разных процессов, а запись идёт короткими
+транзакциями `BEGIN IMMEDIATE` (конкурирующий писатель ждёт до `busy_timeout`).
+Соединение своё у каждого потока — бот работает в QThread, окно — в главном.
+
+Схема версионируется через `PRAGMA user_version`: `MIGRATIONS[i]` переводит
+базу из версии i в i + 1. Доменная логика (аккаунты, увиденные заказы,
+догоняющие, история) — в `storage.py`, `history.py` и модулях бота.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Sequence
+
+
+# Все таблицы аккаунта ключуются по account_id — удаление аккаунта чистит их явно
+_SCHEMA_V1 = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS accounts (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    base_url TEXT NOT NULL,
+    position INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS account_settings (
+    account_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS account_cookies (
+    account_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seen_state (
+    account_id TEXT PRIMARY KEY,
+    filters TEXT NOT NULL,
+    hw_creation INTEGER NOT NULL,
+    hw_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seen_orders (
+    account_id TEXT NOT NULL,
+    order_id INTEGER NOT NULL,
+    creation INTEGER NOT NULL,
+    PRIMARY KEY (account_id, order_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS seen_orders_creation ON seen_orders (account_id, creation);
+CREATE TABLE IF NOT EXISTS followups (
+    account_id TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    due REAL NOT NULL,
+    ctx TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (account_id, job_id)
+);
+CREATE INDEX IF NOT EXISTS followups_due ON followups (account_id, due);
+CREATE TABLE IF NOT EXISTS bids (
+    id INTEGER PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    order_id TEXT NOT NULL,
+    bid INTEGER NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    placed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bids_account ON bids (account_id, placed_at);
+"""
+
+# История заказов: одна компактная строка на увиденный заказ (только целые числа),
+# кластеризована по времени — сводки за период читают таблицу подряд, без поиска
+# по индексу. Попытки ставок — в `bids` с исходом и задержкой от создания заказа
+_SCHEMA_V2 = """
+CREATE TABLE IF NOT EXISTS order_history (
+    account_id TEXT NOT NULL,
+    order_id INTEGER NOT NULL,
+    seen_at INTEGER NOT NULL,
+    creation INTEGER NOT NULL,
+    type_id INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    budget INTEGER NOT NULL,
+    recommended INTEGER NOT NULL,
+    offers INTEGER NOT NULL,
+    matched INTEGER NOT NULL,
+    PRIMARY KEY (account_id, seen_at, order_id)
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX IF NOT EXISTS order_history_order ON order_history (account_id, order_id);
+ALTER TABLE bids ADD COLUMN outcome TEXT NOT NULL DEFAULT 'placed';
+ALTER TABLE bids ADD COLUMN latency REAL;
+CREATE INDEX IF NOT EXISTS bids_order ON bids (account_id, order_id);
+"""
+
+# Справочники сайта (типы работ, предметы) — общие для всех аккаунтов одного хоста
+_SCHEMA_V3 = """
+CREATE TABLE IF NOT EXISTS dictionary_cache (
+    host TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    fetched REAL NOT NULL,
+    changed REAL NOT NULL
+);
+"""
+
+# Cookies аккаунта — строка на cookie вместо JSON‑списка: браузер аккаунта
+# присылает изменения по одной, и каждое пишется точечно, без перезаписи всего набора
+_SCHEMA_V4 = """
+CREATE TABLE IF NOT EXISTS cookies (
+    account_id TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    value TEXT NOT NULL,
+    secure INTEGER NOT NULL DEFAULT 0,
+    http_only INTEGER NOT NULL DEFAULT 0,
+    expires REAL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (account_id, domain, name, path)
+) WITHOUT ROWID;
+INSERT OR REPLACE INTO cookies (account_id, domain, name, path, value, secure, http_only, expires, updated)
+SELECT c.account_id,
+       COALESCE(json_extract(j.value, '$.domain'), ''),
+       json_extract(j.value, '$.name'),
+       COALESCE(json_extract(j.value, '$.path'), '/'),
+       COALESCE(json_extract(j.value, '$.value'), ''),
+       COALESCE(json_extract(j.value, '$.secure'), 0),
+       COALESCE(json_extract(j.value, '$.httpOnly'), 0),
+       NULL,
+       c.updated
+FROM (SELECT * FROM account_cookies WHERE json_valid(data)) AS c, json_each(c.data) AS j
+WHERE json_extract(j.value, '$.name') IS NOT NULL;
+DROP TABLE account_cookies;
+"""
+
+# Состояние сессии аккаунта (`bot/health.py`): пишет бот при смене состояния, читает лаунчер
+_SCHEMA_V5 = """
+CREATE TABLE IF NOT EXISTS account_health (
+    account_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    reason TEXT NOT NULL DEFAULT '',
+    since REAL NOT NULL,
+    resume_at REAL
+);
+"""
+
+# Нижняя граница индекса увиденных: заказы, вытесненные из набора по лимиту (`bot/seen_index.py`)
+_SCHEMA_V6 = """
+ALTER TABLE seen_state ADD COLUMN floor INTEGER NOT NULL DEFAULT 0;
+"""
+
+MIGRATIONS = (_SCHEMA_V1, _SCHEMA_V2, _SCHEMA_V3, _SCHEMA_V4, _SCHEMA_V5, _SCHEMA_V6)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+class Database:
+    """Файл базы + соединения по потокам + транзакции."""
+
+    def __init__(self, path: Path, busy_timeout_ms: int = 5000):
+        self.path = path
+        self._busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # isolation_level=None: транзакции открываем явно в transaction()
+            conn = sqlite3.connect(str(self.path), timeout=self._busy_timeout_ms / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self._busy_timeout_ms)}")
+            self._local.conn = conn
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version > SCHEMA_VERSION:
+                raise RuntimeError(f"База {self.path} создана более новой версией приложения (схема {version})")
+            if version < SCHEMA_VERSION:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # Версию перечитываем под блокировкой: другой процесс мог обновить схему раньше
+                    version = conn.execute("PRAGMA user_version").fetchone()[0]
+                    for script in MIGRATIONS[version:]:
+                        for stmt in script.split(";"):
+                            if stmt.strip():
+                                conn.execute(stmt)
+                    conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                conn.execute("COMMIT")
+            self._schema_ready = True
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Транзакция записи: `BEGIN IMMEDIATE` … `COMMIT` (при исключении — `ROLLBACK`)."""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[tuple]:
+        return self.connection().execute(sql, params).fetchone()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.query_one("SELECT value FROM meta WHERE key = ?", (key,))
+        return row[0] if row else None
+
+    def close(self) -> None:
+        """Закрывает соединение текущего потока."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
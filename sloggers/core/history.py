@@ -0,0 +1,167 @@
+"""История работы бота по аккаунту и сводки по ней.
+
+Каждый увиденный заказ — одна строка `order_history` (только целые числа:
+тип, предмет, бюджеты, число откликов, решение фильтра); каждая попытка
+ставки — строка `bids` с исходом и временем от создания заказа до ставки.
+Таблицы только дополняются; история упорядочена на диске по (аккаунт, время),
+а уникальный индекс (аккаунт, заказ) отсекает повторы и связывает заказы со
+ставками — выборки за период остаются быстрыми и на миллионах строк.
+
+Сводки (`HistoryStore.aggregate`) считаются запросами SQL с группировкой по
+типу работы, предмету или часу создания заказа.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from .database import Database
+from .orders import Order
+from .storage import get_database
+
+
+log = logging.getLogger(__name__)
+
+# Исходы попытки ставки
+OUTCOME_PLACED = "placed"  # отклик принят сайтом
+OUTCOME_FAILED = "failed"  # makeOffer вернул ошибку
+OUTCOME_PREFETCH_FAILED = "prefetch_failed"  # не удалось получить детали заказа
+OUTCOME_DROPPED = "dropped"  # очередь откликов была переполнена
+
+# Группировки сводки → выражение SQL над order_history (h)
+GROUPINGS = {
+    "type": "h.type_id",
+    "category": "h.category_id",
+    # Час по текущему смещению часового пояса (:tz) — целочисленно, без strftime на каждой строке
+    "hour": "((CASE WHEN h.creation > 0 THEN h.creation ELSE h.seen_at END) + :tz) % 86400 / 3600",
+}
+
+
+def _int(value, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass
+class HistoryAggregate:
+    """Строка сводки: `key` — ID типа/предмета или час суток (None — итог по всем)."""
+
+    key: Optional[int]
+    seen: int
+    matched: int
+    bids: int
+    placed: int
+    avg_bid: Optional[float]
+    avg_latency: Optional[float]  # секунд от создания заказа до ставки
+
+    @property
+    def match_ratio(self) -> float:
+        return self.matched / self.seen if self.seen else 0.0
+
+    @property
+    def placed_ratio(self) -> float:
+        return self.placed / self.bids if self.bids else 0.0
+
+
+class HistoryStore:
+    """Запись и выборки истории одного аккаунта."""
+
+    def __init__(self, account_id: str, db: Optional[Database] = None):
+        self._account_id = account_id
+        self._db = db or get_database()
+
+    def record_seen(self, orders: Iterable[Order], matched_ids: Iterable, now: Optional[float] = None) -> int:
+        """Записывает страницу новых заказов одной транзакцией. Повторы игнорируются."""
+        now_i = int(time.time() if now is None else now)
+        matched = {_int(i, -1) for i in matched_ids}
+        rows = []
+        for o in orders:
+            oid = o.id
+            if oid < 0:
+                continue
+            rows.append((
+                self._account_id,
+                oid,
+                now_i,
+                o.creation,
+                max(o.type_id, 0),
+                max(o.category_id, 0),
+                o.budget,
+                o.recommended_budget,
+                max(o.count_offers, 0),
+                int(oid in matched),
+            ))
+        if not rows:
+            return 0
+        with self._db.transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO order_history (account_id, order_id, seen_at, creation, type_id, "
+                "category_id, budget, recommended, offers, matched) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def record_bid(self, order: Order, bid: int, outcome: str = OUTCOME_PLACED, now: Optional[float] = None) -> None:
+        """Записывает попытку ставки; задержка — от `creation` заказа."""
+        at = time.time() if now is None else now
+        creation = order.creation
+        latency = at - creation if creation else None
+        with self._db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO bids (account_id, order_id, bid, title, placed_at, outcome, latency) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._account_id, str(order.id), int(bid), order.title, at, outcome, latency),
+            )
+
+    def aggregate(self, by: Optional[str] = None, since: Optional[float] = None) -> List[HistoryAggregate]:
+        """Сводка за период с `since` (unix‑время) с группировкой `by` (см. `GROUPINGS`).
+
+        Без `by` — одна строка‑итог. Ставки сопоставляются с заказами по ID;
+        ставка по заказу, которого нет в истории (до её появления), не учитывается.
+        """
+        key_expr = "NULL"
+        if by is not None:
+            if by not in GROUPINGS:
+                raise ValueError(f"Неизвестная группировка: {by}")
+            key_expr = GROUPINGS[by]
+        params = {"acc": self._account_id, "since": int(since or 0), "tz": time.localtime().tm_gmtoff}
+        # Заказов на порядки больше, чем ставок: считаем их отдельно, а ставки
+        # сопоставляем с заказами поиском по индексу (аккаунт, заказ)
+        # (CROSS JOIN в SQLite фиксирует порядок: сначала ставки, потом заказы)
+        seen_sql = f"""
+            SELECT {key_expr} AS k, COUNT(*), SUM(h.matched)
+            FROM order_history h
+            WHERE h.account_id = :acc AND h.seen_at >= :since
+            GROUP BY k
+        """
+        bids_sql = f"""
+            SELECT {key_expr} AS k, SUM(b.attempts), SUM(b.placed), AVG(b.bid), AVG(b.latency)
+            FROM (
+                SELECT CAST(order_id AS INTEGER) AS oid,
+                       COUNT(*) AS attempts,
+                       MAX(outcome = 'placed') AS placed,
+                       MAX(CASE WHEN outcome = 'placed' THEN bid END) AS bid,
+                       MIN(CASE WHEN outcome = 'placed' THEN latency END) AS latency
+                FROM bids
+                WHERE account_id = :acc AND placed_at >= :since
+                GROUP BY order_id
+            ) b
+            CROSS JOIN order_history h ON h.account_id = :acc AND h.order_id = b.oid
+            WHERE h.seen_at >= :since
+            GROUP BY k
+        """
+        bids = {r[0]: r[1:] for r in self._db.query(bids_sql, params)}
+        out = []
+        for key, seen, matched in self._db.query(seen_sql, params):
+            attempts, placed, avg_bid, avg_latency = bids.get(key, (0, 0, None, None))
+            out.append(HistoryAggregate(key, seen, matched or 0, attempts or 0, placed or 0, avg_bid, avg_latency))
+        out.sort(key=lambda a: a.seen, reverse=True)
+        return out
+
+    def summary(self, since: Optional[float] = None) -> HistoryAggregate:
+        rows = self.aggregate(None, since)
+        return rows[0] if rows else HistoryAggregate(None, 0, 0, 0, 0, None, None)
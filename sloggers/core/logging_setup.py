@@ -1,13 +1,20 @@
 """Настройка логирования.
 
 Логи пишутся в файл пользователя и могут дублироваться в интерфейс.
+В интерфейс записи идут через `LogBuffer`: обработчик только кладёт готовую
+строку в ограниченную очередь (из любого потока), а окно забирает накопленное
+пачкой по таймеру — без сигнала Qt на каждую строку.
 """
 from __future__ import annotations
 
 import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
-from typing import Optional
+from typing import Deque, List, Optional
 
 from .settings import PATHS
 
@@ -37,17 +44,58 @@ def setup_logging(name: str = "sloggers", to_console: bool = False) -> None:
         logger.addHandler(console)
 
 
-class QtLogProxyHandler(logging.Handler):
-    """Прокси‑хендлер для отправки логов в UI через колбэк."""
+@dataclass(frozen=True)
+class LogEntry:
+    """Строка журнала для интерфейса: форматируется один раз при записи."""
 
-    def __init__(self, send_fn):
-        super().__init__()
-        self._send = send_fn
+    created: float
+    levelno: int
+    text: str
+    # Текст в нижнем регистре — поиск по журналу без повторной обработки строк
+    folded: str = field(repr=False)
+
+
+def make_entry(text: str, levelno: int = logging.INFO, created: Optional[float] = None) -> LogEntry:
+    return LogEntry(time.time() if created is None else created, levelno, text, text.casefold())
+
+
+class LogBuffer:
+    """Очередь строк журнала между потоками бота и окном.
+
+    Ограничена `capacity`: если окно не успевает забирать строки, самые старые
+    отбрасываются (их число — в `dropped`), и память не растёт.
+    """
+
+    def __init__(self, capacity: int = 5000):
+        self._lock = threading.Lock()
+        self._pending: Deque[LogEntry] = deque(maxlen=capacity)
+        self.dropped = 0
+
+    def append(self, entry: LogEntry) -> None:
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append(entry)
+
+    def drain(self) -> List[LogEntry]:
+        """Забирает всё накопленное (в порядке поступления)."""
+        with self._lock:
+            if not self._pending:
+                return []
+            out = list(self._pending)
+            self._pending.clear()
+            return out
+
+
+class BufferedLogHandler(logging.Handler):
+    """Хендлер для окна: форматирует запись и кладёт её в `LogBuffer`."""
+
+    def __init__(self, buffer: LogBuffer, level: int = logging.INFO):
+        super().__init__(level)
+        self.buffer = buffer
 
     def emit(self, record: logging.LogRecord) -> None:
         try:
-            msg = self.format(record)
-            self._send(msg)
+            self.buffer.append(make_entry(self.format(record), record.levelno, record.created))
         except Exception:
-            pass
-
+            self.handleError(record)
@@ -0,0 +1,274 @@
+"""Метрики процесса: счётчики и гистограммы задержек горячего пути.
+
+По умолчанию сбор выключен: `counter()` / `histogram()` возвращают общие
+пустые объекты, и вызов в горячем пути стоит одну проверку флага. Включается
+`enable()` — в фоновом режиме флагом `--metrics-port` (тогда метрики отдаются
+по HTTP) или переменной окружения `SLOGGERS_METRICS=1`.
+
+Экспорт:
+- `render_prometheus()` — текстовый формат Prometheus (`/metrics`);
+- `snapshot()` — словарь для JSON (`/metrics.json`) с p50/p95/p99.
+
+Перцентили оцениваются по корзинам гистограммы с линейной интерполяцией
+внутри корзины — точности корзин (шаг ×2–2.5) для задержек достаточно.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+log = logging.getLogger(__name__)
+
+# Корзины по умолчанию (секунды): от миллисекунды до 10 минут — от запроса до «заказ → ставка»
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self, lock: threading.Lock):
+        self.value = 0.0
+        self._lock = lock
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, lock: threading.Lock, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # последняя — +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = lock
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> "_Timer":
+        """`with hist.time(): ...` — наблюдает длительность блока (если он завершился без исключения)."""
+        return _Timer(self)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Оценка q‑квантиля (0..1) по корзинам; None — наблюдений не было."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, c in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+            if c and seen + c >= rank:
+                return lower + (upper - lower) * ((rank - seen) / c)
+            seen += c
+            lower = upper
+        return self.buckets[-1]
+
+
+class _Timer:
+    __slots__ = ("_hist", "_start")
+
+    def __init__(self, hist):
+        self._hist = hist
+        self._start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        # Прерванные этапы (отмена при остановке, ошибка сети) не искажают задержки
+        if exc_type is None:
+            self._hist.observe(time.perf_counter() - self._start)
+
+
+class _NoopMetric:
+    """Пустая метрика для выключенного сбора."""
+
+    __slots__ = ()
+
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+    def time(self) -> "_NoopMetric":
+        return self
+
+    def __enter__(self) -> "_NoopMetric":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+NOOP = _NoopMetric()
+
+
+class MetricsRegistry:
+    """Метрики по имени и набору меток."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, Counter]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+
+    def counter(self, name: str, help: str = "", **labels: str):
+        if not self.enabled:
+            return NOOP
+        key = tuple(sorted(labels.items()))
+        family = self._counters.get(name)
+        if family is None:
+            family = self._counters.setdefault(name, {})
+            self._help.setdefault(name, help)
+        metric = family.get(key)
+        if metric is None:
+            metric = family.setdefault(key, Counter(self._lock))
+        return metric
+
+    def histogram(self, name: str, help: str = "", buckets: Sequence[float] = LATENCY_BUCKETS, **labels: str):
+        if not self.enabled:
+            return NOOP
+        key = tuple(sorted(labels.items()))
+        family = self._histograms.get(name)
+        if family is None:
+            family = self._histograms.setdefault(name, {})
+            self._help.setdefault(name, help)
+        metric = family.get(key)
+        if metric is None:
+            metric = family.setdefault(key, Histogram(self._lock, buckets))
+        return metric
+
+    def reset(self) -> None:
+        self._counters.clear()
+        self._histograms.clear()
+
+    def snapshot(self) -> dict:
+        """Все метрики в виде словаря (для JSON)."""
+        counters = {
+            name: [{"labels": dict(k), "value": c.value} for k, c in family.items()]
+            for name, family in self._counters.items()
+        }
+        histograms = {}
+        for name, family in self._histograms.items():
+            items = []
+            for k, h in family.items():
+                items.append({
+                    "labels": dict(k),
+                    "count": h.count,
+                    "sum": h.sum,
+                    "p50": h.percentile(0.5),
+                    "p95": h.percentile(0.95),
+                    "p99": h.percentile(0.99),
+                })
+            histograms[name] = items
+        return {"time": time.time(), "counters": counters, "histograms": histograms}
+
+    def render_prometheus(self) -> str:
+        """Текстовый формат экспозиции Prometheus 0.0.4."""
+        lines: List[str] = []
+        for name, family in sorted(self._counters.items()):
+            lines.append(f"# HELP {name} {self._help.get(name, '')}")
+            lines.append(f"# TYPE {name} counter")
+            for k, c in family.items():
+                lines.append(f"{name}{_fmt_labels(k)} {_fmt_value(c.value)}")
+        for name, family in sorted(self._histograms.items()):
+            lines.append(f"# HELP {name} {self._help.get(name, '')}")
+            lines.append(f"# TYPE {name} histogram")
+            for k, h in family.items():
+                cumulative = 0
+                for bound, c in zip(h.buckets + (float("inf"),), h.counts):
+                    cumulative += c
+                    le = "+Inf" if bound == float("inf") else _fmt_value(bound)
+                    lines.append(f"{name}_bucket{_fmt_labels(k + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_fmt_labels(k)} {_fmt_value(h.sum)}")
+                lines.append(f"{name}_count{_fmt_labels(k)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def iter_histograms(self, name: str) -> Iterator[Tuple[Dict[str, str], Histogram]]:
+        for k, h in self._histograms.get(name, {}).items():
+            yield dict(k), h
+
+
+def _fmt_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + body + "}"
+
+
+def _fmt_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+METRICS = MetricsRegistry(enabled=os.environ.get("SLOGGERS_METRICS", "") not in ("", "0"))
+
+
+def enable(flag: bool = True) -> None:
+    METRICS.enabled = flag
+
+
+def counter(name: str, help: str = "", **labels: str):
+    return METRICS.counter(name, help, **labels)
+
+
+def histogram(name: str, help: str = "", **labels: str):
+    return METRICS.histogram(name, help, **labels)
+
+
+async def serve_metrics(host: str, port: int, stop_event: asyncio.Event, registry: Optional[MetricsRegistry] = None) -> None:
+    """Минимальный HTTP‑сервер: `/metrics` (Prometheus) и `/metrics.json` (снимок)."""
+    reg = registry or METRICS
+
+    async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Заголовки запроса не нужны — дочитываем до пустой строки
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            path = parts[1] if len(parts) > 1 else "/"
+            if path.startswith("/metrics.json"):
+                body, ctype, status = json.dumps(reg.snapshot(), ensure_ascii=False).encode("utf-8"), "application/json", "200 OK"
+            elif path.startswith("/metrics"):
+                body, ctype, status = reg.render_prometheus().encode("utf-8"), "text/plain; version=0.0.4", "200 OK"
+            else:
+                body, ctype, status = b"not found\n", "text/plain", "404 Not Found"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {ctype}; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(_handle, host, port)
+    log.info("Метрики доступны на http://%s:%s/metrics", host, port)
+    async with server:
+        await stop_event.wait()
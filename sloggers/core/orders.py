@@ -0,0 +1,121 @@
+"""Заказ ленты аукциона в компактном виде.
+
+Страница ленты после декодирования (`network/codec.py`) сразу разбирается в
+`Order` — объекты со `__slots__` и только теми полями, которые бот читает:
+фильтры, переменные шаблонов, история, ставка. Вложенные объекты ответа (тип,
+предмет, заказчик, файлы) разворачиваются в плоские поля один раз при разборе,
+а не цепочками `.get()` в каждом фильтре; лишние поля ответа не хранятся.
+
+ID заказа — целое число (на сайте это числовая строка): так запись меньше, а
+сравнение и хэширование дешевле; заказы без числового ID при разборе
+отбрасываются. Отсутствующие значения — нули и пустые строки: `type_id`/`category_id` = 0 —
+не указан (-1 — непонятный ID), `count_offers` = -1 — сайт не прислал число откликов.
+Описание нужно только фильтру слов — после решения по заказу бот его сбрасывает.
+"""
+from __future__ import annotations
+
+from operator import attrgetter
+from typing import Any, Iterable, List
+
+
+def _int(value: Any, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _ref_id(obj: Any) -> int:
+    """ID вложенного объекта (`type`, `category`): 0 — объекта нет, -1 — ID не число."""
+    if not obj:
+        return 0
+    return _int(obj.get("id"), -1)
+
+
+class Order:
+    """Заказ ленты: плоские поля, нужные боту."""
+
+    __slots__ = (
+        "id", "creation", "type_id", "type_name", "category_id", "category_name",
+        "customer_nick", "customer_online", "title", "description", "budget",
+        "recommended_budget", "deadline", "count_offers", "has_files", "is_premium", "is_express",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        creation: int = 0,
+        type_id: int = 0,
+        type_name: str = "",
+        category_id: int = 0,
+        category_name: str = "",
+        customer_nick: str = "",
+        customer_online: bool = False,
+        title: str = "",
+        description: str = "",
+        budget: int = 0,
+        recommended_budget: int = 0,
+        deadline: int = 0,
+        count_offers: int = -1,
+        has_files: bool = False,
+        is_premium: bool = False,
+        is_express: bool = False,
+    ):
+        self.id = id
+        self.creation = creation
+        self.type_id = type_id
+        self.type_name = type_name
+        self.category_id = category_id
+        self.category_name = category_name
+        self.customer_nick = customer_nick
+        self.customer_online = customer_online
+        self.title = title
+        self.description = description
+        self.budget = budget
+        self.recommended_budget = recommended_budget
+        self.deadline = deadline
+        self.count_offers = count_offers
+        self.has_files = has_files
+        self.is_premium = is_premium
+        self.is_express = is_express
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "Order":
+        """Заказ из объекта ответа GraphQL (`orderDataFragment` или его часть)."""
+        get = raw.get
+        t = get("type")
+        c = get("category")
+        customer = get("customer") or {}
+        return cls(
+            _int(get("id"), -1),
+            _int(get("creation")),
+            _ref_id(t),
+            str(t.get("name") or "") if t else "",
+            _ref_id(c),
+            str(c.get("name") or "") if c else "",
+            str(customer.get("nickName") or ""),
+            bool(customer.get("isOnline")),
+            str(get("title") or ""),
+            str(get("description") or ""),
+            _int(get("budget")),
+            _int(get("recommendedBudget")),
+            _int(get("deadline")),  # сайт отдаёт срок строкой
+            _int(get("countOffers"), -1),
+            bool(get("customerFiles")),
+            bool(get("isPremium")),
+            bool(get("isExpressOrder")),
+        )
+
+    def __repr__(self) -> str:
+        return f"Order(id={self.id}, creation={self.creation}, title={self.title[:40]!r})"
+
+
+def parse_orders(raw: Iterable[Any]) -> List[Order]:
+    """Страница ленты (`orders.orders` ответа) → список `Order`; не‑объекты и заказы без ID пропускаются."""
+    from_dict = Order.from_dict
+    orders = [from_dict(o) for o in raw if isinstance(o, dict)]
+    return [o for o in orders if o.id >= 0]
+
+
+# Ключ сортировки «сначала свежие»: `orders.sort(key=by_creation, reverse=True)`
+by_creation = attrgetter("creation")
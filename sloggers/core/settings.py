@@ -26,6 +26,7 @@ class AppPaths:
     accounts_dir: Path
     logs_dir: Path
     accounts_index: Path
+    database: Path
 
 
 def _compute_paths() -> AppPaths:
@@ -33,7 +34,14 @@ def _compute_paths() -> AppPaths:
     accounts_dir = root / "accounts"
     logs_dir = Path(user_log_dir(APP_NAME, APP_AUTHOR))
     accounts_index = root / "accounts.json"
-    return AppPaths(root=root, accounts_dir=accounts_dir, logs_dir=logs_dir, accounts_index=accounts_index)
+    database = root / "sloggers.db"
+    return AppPaths(
+        root=root,
+        accounts_dir=accounts_dir,
+        logs_dir=logs_dir,
+        accounts_index=accounts_index,
+        database=database,
+    )
 
 
 PATHS: AppPaths = _compute_paths()
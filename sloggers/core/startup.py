@@ -0,0 +1,43 @@
+"""Замер холодного старта окна аккаунта.
+
+Этапы запуска (импорт Qt, импорт модуля окна, создание окна, первый кадр)
+оборачиваются в `stage(...)`; `log_report()` пишет в лог одну строку с их
+длительностью. По этой строке в логе каждого окна аккаунта видно, сколько
+занимает запуск и какой этап подорожал. Подробная разбивка импорта по
+модулям — `python -X importtime -m sloggers --account <id>`.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+log = logging.getLogger(__name__)
+
+_started = time.perf_counter()
+_stages: List[Tuple[str, float]] = []
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stages.append((name, time.perf_counter() - t0))
+
+
+def elapsed() -> float:
+    """Секунд с импорта модуля (начало `main`)."""
+    return time.perf_counter() - _started
+
+
+def report() -> str:
+    parts = [f"{name} {seconds * 1000:.0f} мс" for name, seconds in _stages]
+    parts.append(f"всего {elapsed() * 1000:.0f} мс")
+    return "; ".join(parts)
+
+
+def log_report(what: str) -> None:
+    log.info("Запуск %s: %s", what, report())
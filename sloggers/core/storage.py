@@ -1,22 +1,35 @@
 """Хранение данных (аккаунты и их настройки).
 
-Хранение реализовано на JSON для простоты и прозрачности. Для каждого аккаунта
-создаётся отдельная папка с `cookies.json` и `settings.json`.
+Данные лежат во встроенной базе SQLite (`core/database.py`, файл `sloggers.db`
+в папке приложения): индексированные выборки вместо чтения всего
+`accounts.json`, а изменения — транзакциями, безопасными для нескольких
+процессов. Там же — увиденные заказы, отложенные догоняющие и история ставок.
+
+Прежняя раскладка на JSON (`accounts.json`, `accounts/<id>/cookies.json` и
+`settings.json`) один раз переносится в базу при первом открытии; сами файлы
+не удаляются.
 """
 from __future__ import annotations
 
 import json
+import logging
+import threading
+import time
 import uuid
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from .database import Database
 from .settings import PATHS
 
 
+log = logging.getLogger(__name__)
+
+
 @dataclass
 class AccountRecord:
-    """Короткая карточка аккаунта, хранится в общем `accounts.json`.
+    """Короткая карточка аккаунта (таблица `accounts`).
 
     id: внутренний идентификатор (UUID);
     name: отображаемое имя аккаунта;
@@ -28,6 +41,31 @@ class AccountRecord:
     base_url: str = "https://avtor24.ru"
 
 
+@dataclass
+class BidRecord:
+    """Отправленная ставка (таблица `bids`, пишет её `history.HistoryStore`)."""
+
+    order_id: str
+    bid: int
+    title: str
+    placed_at: float
+
+
+_db: Optional[Database] = None
+_db_lock = threading.Lock()
+
+
+def get_database() -> Database:
+    """База приложения; при первом открытии переносит данные из JSON."""
+    global _db
+    with _db_lock:
+        if _db is None or _db.path != PATHS.database:
+            db = Database(PATHS.database)
+            _migrate_json_layout(db)
+            _db = db
+        return _db
+
+
 def _read_json(path: Path) -> dict:
     if not path.exists():
         return {}
@@ -35,47 +73,55 @@ def _read_json(path: Path) -> dict:
         return json.load(f)
 
 
-def _write_json(path: Path, data: dict) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    with tmp.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    tmp.replace(path)
+def _dumps(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
 
 
 def list_accounts() -> List[AccountRecord]:
-    raw = _read_json(PATHS.accounts_index)
-    items = raw.get("accounts", [])
-    return [AccountRecord(**item) for item in items]
+    rows = get_database().query("SELECT id, name, base_url FROM accounts ORDER BY position, rowid")
+    return [AccountRecord(*row) for row in rows]
 
 
 def save_accounts(items: List[AccountRecord]) -> None:
-    data = {"accounts": [asdict(a) for a in items]}
-    _write_json(PATHS.accounts_index, data)
+    """Заменяет список аккаунтов целиком (порядок — как в `items`)."""
+    with get_database().transaction() as conn:
+        conn.execute("DELETE FROM accounts")
+        conn.executemany(
+            "INSERT INTO accounts (id, name, base_url, position) VALUES (?, ?, ?, ?)",
+            [(a.id, a.name, a.base_url, pos) for pos, a in enumerate(items)],
+        )
 
 
 def get_account(acc_id: str) -> Optional[AccountRecord]:
-    for a in list_accounts():
-        if a.id == acc_id:
-            return a
-    return None
+    row = get_database().query_one("SELECT id, name, base_url FROM accounts WHERE id = ?", (acc_id,))
+    return AccountRecord(*row) if row else None
 
 
 def create_account(name: str, base_url: str = "https://avtor24.ru") -> AccountRecord:
     """Создаёт запись аккаунта и возвращает её.
 
-    Физические файлы аккаунта (cookies/settings) появятся при сохранении в окне аккаунта.
+    Настройки и куки аккаунта появятся при сохранении в окне аккаунта.
     """
     new = AccountRecord(id=str(uuid.uuid4()), name=name, base_url=base_url)
-    items = list_accounts()
-    items.append(new)
-    save_accounts(items)
+    with get_database().transaction() as conn:
+        conn.execute(
+            "INSERT INTO accounts (id, name, base_url, position) "
+            "VALUES (?, ?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM accounts))",
+            (new.id, new.name, new.base_url),
+        )
     return new
 
 
+_ACCOUNT_TABLES = (
+    "account_settings", "cookies", "seen_state", "seen_orders", "followups", "bids", "order_history", "account_health",
+)
+
+
 def delete_account(acc_id: str) -> None:
-    items = [a for a in list_accounts() if a.id != acc_id]
-    save_accounts(items)
+    with get_database().transaction() as conn:
+        conn.execute("DELETE FROM accounts WHERE id = ?", (acc_id,))
+        for table in _ACCOUNT_TABLES:
+            conn.execute(f"DELETE FROM {table} WHERE account_id = ?", (acc_id,))
     # Удаляем папку аккаунта аккуратно (если есть)
     acc_dir = account_dir(acc_id)
     if acc_dir.exists():
@@ -94,6 +140,12 @@ def account_dir(acc_id: str) -> Path:
     return PATHS.accounts_dir / acc_id
 
 
+def account_browser_dir(acc_id: str) -> Path:
+    """Профиль встроенного браузера аккаунта (хранилище сайта, кэш)."""
+    return account_dir(acc_id) / "browser"
+
+
+# Пути прежней JSON‑раскладки — нужны только для переноса в базу
 def account_cookies_path(acc_id: str) -> Path:
     return account_dir(acc_id) / "cookies.json"
 
@@ -102,26 +154,51 @@ def account_settings_path(acc_id: str) -> Path:
     return account_dir(acc_id) / "settings.json"
 
 
+def default_account_settings() -> dict:
+    # Значения по умолчанию — минимально необходимые для старта
+    return {
+        "enabled": True,  # участвует ли аккаунт в фоновом режиме (--headless)
+        "interval_seconds": 3,
+        "followup_delay_minutes": 5,
+        "two_stage_polling": True,  # частая дешёвая проба, полный опрос — только при изменениях
+        "probe_interval_seconds": 3,  # не чаще прежнего опроса: проба — тоже запрос к сайту
+        "full_refresh_seconds": 30,
+        "incremental_polling": True,  # сначала лёгкий запрос ID, полный — только при новых заказах
+        "scheduler": {
+            "kind": "adaptive",  # "fixed" — постоянный шаг
+            "max_requests_per_hour": 1200,  # жёсткий бюджет запросов аккаунта
+            "jitter": 0.15,
+        },
+        "bids": {
+            "per_minute": 10,  # реальный темп ставок
+            "burst": 3,
+            "prefetch_concurrency": 4,  # параллельные getOrderForBid
+            "queue_size": 100,
+        },
+        "filters": {
+            "types": [],  # список ID типов работ
+            "categories": [],  # список ID предметов/категорий
+            "noBids": True,
+            "less3bids": True,
+            "contractual": True,
+        },
+        "health": {
+            "auth_recheck_seconds": 300,  # пауза при истёкшей сессии до повторной проверки
+            "captcha_pause_seconds": 120,  # первая пауза при капче (дальше удваивается)
+            "rate_limit_pause_seconds": 60,  # при HTTP 429 без Retry-After
+        },
+        "templates": {
+            "welcome_path": "",  # путь к txt файлу с приветствием
+            "followup_path": "",  # путь к txt файлу с догоняющим
+        },
+    }
+
+
 def load_account_settings(acc_id: str) -> dict:
-    path = account_settings_path(acc_id)
-    if not path.exists():
-        # Значения по умолчанию — минимально необходимые для старта
-        return {
-            "interval_seconds": 3,
-            "followup_delay_minutes": 5,
-            "filters": {
-                "types": [],  # список ID типов работ
-                "categories": [],  # список ID предметов/категорий
-                "noBids": True,
-                "less3bids": True,
-                "contractual": True,
-            },
-            "templates": {
-                "welcome_path": "",  # путь к txt файлу с приветствием
-                "followup_path": "",  # путь к txt файлу с догоняющим
-            },
-        }
-    data = _read_json(path)
+    row = get_database().query_one("SELECT data FROM account_settings WHERE account_id = ?", (acc_id,))
+    if row is None:
+        return default_account_settings()
+    data = json.loads(row[0])
     filters = data.get("filters", {})
     # Совместимость со старыми настройками, где ключ назывался "subjects"
     if "categories" not in filters and "subjects" in filters:
@@ -130,13 +207,144 @@ def load_account_settings(acc_id: str) -> dict:
 
 
 def save_account_settings(acc_id: str, data: dict) -> None:
-    _write_json(account_settings_path(acc_id), data)
+    with get_database().transaction() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO account_settings (account_id, data, updated) VALUES (?, ?, ?)",
+            (acc_id, _dumps(data), time.time()),
+        )
+
+
+_COOKIE_COLUMNS = "domain, name, path, value, secure, http_only, expires"
+
+
+def _cookie_row(acc_id: str, c: Dict, now: float) -> tuple:
+    expires = c.get("expires")
+    return (
+        acc_id, c.get("domain") or "", c["name"], c.get("path") or "/", c.get("value", ""),
+        int(bool(c.get("secure"))), int(bool(c.get("httpOnly"))),
+        float(expires) if expires is not None else None, now,
+    )
+
+
+def _cookie_key(c: Dict) -> tuple:
+    return (c.get("domain") or "", c["name"], c.get("path") or "/")
 
 
 def save_account_cookies(acc_id: str, cookies: List[Dict]) -> None:
-    _write_json(account_cookies_path(acc_id), {"cookies": cookies})
+    """Заменяет набор cookies аккаунта целиком."""
+    now = time.time()
+    with get_database().transaction() as conn:
+        conn.execute("DELETE FROM cookies WHERE account_id = ?", (acc_id,))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO cookies (account_id, {_COOKIE_COLUMNS}, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [_cookie_row(acc_id, c, now) for c in cookies if c.get("name")],
+        )
+
+
+def apply_cookie_changes(acc_id: str, upserts: List[Dict], removed: List[Dict]) -> None:
+    """Точечно применяет изменения cookies (из браузера аккаунта) одной транзакцией."""
+    if not upserts and not removed:
+        return
+    now = time.time()
+    with get_database().transaction() as conn:
+        conn.executemany(
+            "DELETE FROM cookies WHERE account_id = ? AND domain = ? AND name = ? AND path = ?",
+            [(acc_id, *_cookie_key(c)) for c in removed if c.get("name")],
+        )
+        conn.executemany(
+            f"INSERT OR REPLACE INTO cookies (account_id, {_COOKIE_COLUMNS}, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [_cookie_row(acc_id, c, now) for c in upserts if c.get("name")],
+        )
 
 
 def load_account_cookies(acc_id: str) -> List[Dict]:
-    raw = _read_json(account_cookies_path(acc_id))
-    return raw.get("cookies", [])
+    """Cookies аккаунта (просроченные не возвращаются)."""
+    rows = get_database().query(
+        f"SELECT {_COOKIE_COLUMNS} FROM cookies WHERE account_id = ? AND (expires IS NULL OR expires > ?)",
+        (acc_id, time.time()),
+    )
+    result = []
+    for domain, name, path, value, secure, http_only, expires in rows:
+        cookie = {"domain": domain, "name": name, "value": value, "path": path,
+                  "secure": bool(secure), "httpOnly": bool(http_only)}
+        if expires is not None:
+            cookie["expires"] = expires
+        result.append(cookie)
+    return result
+
+
+def list_bids(acc_id: str, limit: int = 100) -> List[BidRecord]:
+    """Последние ставки аккаунта (новые первыми)."""
+    rows = get_database().query(
+        "SELECT order_id, bid, title, placed_at FROM bids WHERE account_id = ? AND outcome = 'placed' "
+        "ORDER BY placed_at DESC LIMIT ?",
+        (acc_id, int(limit)),
+    )
+    return [BidRecord(*row) for row in rows]
+
+
+# Перенос из JSON
+
+_MIGRATION_KEY = "json_migrated"
+
+
+def _migrate_json_layout(db: Database) -> None:
+    """Однократно переносит JSON‑файлы приложения в базу.
+
+    Отметка в таблице `meta` ставится в той же транзакции, поэтому при
+    одновременном запуске нескольких процессов перенос выполнит только один.
+    """
+    if db.get_meta(_MIGRATION_KEY):
+        return
+    with db.transaction() as conn:
+        if conn.execute("SELECT 1 FROM meta WHERE key = ?", (_MIGRATION_KEY,)).fetchone():
+            return
+        moved = 0
+        try:
+            index = _read_json(PATHS.accounts_index)
+        except (OSError, ValueError) as e:
+            log.warning("Не удалось прочитать %s: %s", PATHS.accounts_index, e)
+            index = {}
+        for pos, item in enumerate(index.get("accounts", [])):
+            acc = AccountRecord(**item)
+            conn.execute(
+                "INSERT OR IGNORE INTO accounts (id, name, base_url, position) VALUES (?, ?, ?, ?)",
+                (acc.id, acc.name, acc.base_url, pos),
+            )
+            # Повреждённые файлы одного аккаунта не должны мешать переносу остальных
+            conn.execute("SAVEPOINT account_files")
+            try:
+                _migrate_account_files(conn, acc.id)
+            except Exception as e:
+                conn.execute("ROLLBACK TO account_files")
+                log.warning("Файлы аккаунта %s перенесены не полностью: %s", acc.id, e)
+            conn.execute("RELEASE account_files")
+            moved += 1
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?)", (_MIGRATION_KEY, str(int(time.time())))
+        )
+    if moved:
+        log.info("Данные %s аккаунтов перенесены из JSON в %s", moved, db.path)
+
+
+def _migrate_account_files(conn, acc_id: str) -> None:
+    now = time.time()
+    try:
+        raw = _read_json(account_settings_path(acc_id))
+    except (OSError, ValueError) as e:
+        log.warning("Файл %s пропущен при переносе: %s", account_settings_path(acc_id), e)
+        raw = {}
+    if raw:
+        conn.execute(
+            "INSERT OR REPLACE INTO account_settings (account_id, data, updated) VALUES (?, ?, ?)",
+            (acc_id, _dumps(raw), now),
+        )
+    try:
+        cookies = _read_json(account_cookies_path(acc_id)).get("cookies", [])
+    except (OSError, ValueError) as e:
+        log.warning("Файл %s пропущен при переносе: %s", account_cookies_path(acc_id), e)
+        cookies = []
+    conn.executemany(
+        f"INSERT OR REPLACE INTO cookies (account_id, {_COOKIE_COLUMNS}, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [_cookie_row(acc_id, c, now) for c in cookies if isinstance(c, dict) and c.get("name")],
+    )
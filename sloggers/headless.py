@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+"""Фоновый режим без GUI: `python -m sloggers --headless`.
+
+Все включённые аккаунты с сохранёнными cookies работают в одном процессе на
+одном asyncio‑цикле (см. `bot/supervisor.py`). PySide6 здесь не импортируется —
+режим подходит для серверов без графики.
+
+С `--metrics-port` включается сбор метрик (`core/metrics.py`), и они отдаются
+по HTTP: `/metrics` — формат Prometheus, `/metrics.json` — снимок с перцентилями.
+"""
+
+import asyncio
+import logging
+import signal
+from typing import List, Optional
+
+from .bot.supervisor import Supervisor, collect_enabled_accounts
+from .core import metrics
+from .core.logging_setup import setup_logging
+from .network.transport import get_registry
+
+
+log = logging.getLogger(__name__)
+
+
+async def _run(account_ids: Optional[List[str]], metrics_port: Optional[int], metrics_host: str) -> None:
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows: обработчики сигналов цикла недоступны, остаётся KeyboardInterrupt
+            pass
+
+    metrics_task = None
+    if metrics_port:
+        metrics.enable()
+        metrics_task = asyncio.create_task(metrics.serve_metrics(metrics_host, metrics_port, stop_event))
+
+    supervisor = Supervisor(collect_enabled_accounts(account_ids))
+    try:
+        await supervisor.run(stop_event)
+    finally:
+        await get_registry().aclose()
+        if metrics_task is not None:
+            stop_event.set()
+            await asyncio.gather(metrics_task, return_exceptions=True)
+
+
+def run_headless(
+    account_ids: Optional[List[str]] = None,
+    metrics_port: Optional[int] = None,
+    metrics_host: str = "127.0.0.1",
+) -> int:
+    """Запускает супервизор и блокируется до Ctrl+C / SIGTERM."""
+    setup_logging(name="headless", to_console=True)
+    log.info("Запуск фонового режима")
+    try:
+        asyncio.run(_run(account_ids, metrics_port, metrics_host))
+    except KeyboardInterrupt:
+        pass
+    log.info("Фоновый режим остановлен")
+    return 0
@@ -3,7 +3,7 @@ from __future__ import annotations
 """Окно лаунчера аккаунтов.
 
 Функции:
-- Просмотр списка аккаунтов;
+- Просмотр списка аккаунтов и состояния их сессий (истекла, капча, …);
 - Добавление/удаление аккаунтов;
 - Запуск отдельного окна аккаунта (в новом процессе).
 """
@@ -12,7 +12,7 @@ import subprocess
 import sys
 from typing import Optional
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -26,6 +26,7 @@ from PySide6.QtWidgets import (
 )
 
 from .core.storage import list_accounts, create_account, delete_account, AccountRecord
+from .bot.health import HEALTH_OK, HEALTH_STOPPED, HealthStore
 
 
 class LauncherWindow(QWidget):
@@ -65,13 +66,35 @@ class LauncherWindow(QWidget):
 
         self._refresh()
 
+        # Состояние сессий пишут боты (окна аккаунтов и фоновый режим) — перечитываем периодически
+        self._health_timer = QTimer(self)
+        self._health_timer.setInterval(5000)
+        self._health_timer.timeout.connect(self._refresh_health)
+        self._health_timer.start()
+
     # Внутренняя утилита: загрузка списка
     def _refresh(self) -> None:
         self._list.clear()
         for acc in list_accounts():
-            item = QListWidgetItem(f"{acc.name} — {acc.id}")
+            item = QListWidgetItem()
             item.setData(Qt.UserRole, acc)
             self._list.addItem(item)
+        self._refresh_health()
+
+    def _refresh_health(self) -> None:
+        try:
+            states = HealthStore().load_all()
+        except Exception:
+            states = {}
+        for row in range(self._list.count()):
+            item = self._list.item(row)
+            acc: AccountRecord = item.data(Qt.UserRole)
+            text = f"{acc.name} — {acc.id}"
+            st = states.get(acc.id)
+            if st is not None and st.state != HEALTH_STOPPED:
+                text += f"  [{st.label}]"
+            item.setText(text)
+            item.setToolTip(st.reason if st is not None and st.state != HEALTH_OK else "")
 
     def _selected(self) -> Optional[AccountRecord]:
         item = self._list.currentItem()
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+"""Журнал событий окна аккаунта.
+
+Строки приходят из `LogBuffer` (см. `core/logging_setup.py`) пачками по
+таймеру и хранятся в модели‑кольце: сверх `capacity` старые строки удаляются.
+Отображение — `QListView` с одинаковой высотой строк: отрисовываются только
+видимые строки, сколько бы их ни было в журнале. Фильтр по уровню и поиск
+работают через прокси‑модель по уже готовым строкам.
+"""
+
+import logging
+import time
+from typing import List
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QSortFilterProxyModel, Qt, QTimer
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QComboBox, QHBoxLayout, QLabel, QLineEdit, QListView, QVBoxLayout, QWidget
+
+from .core.logging_setup import LogBuffer, LogEntry, make_entry
+
+
+# Уровни фильтра журнала: подпись → минимальный уровень. DEBUG в окно не
+# попадает (логгер и `BufferedLogHandler` — на INFO), поэтому и пункта для него нет
+LEVELS = (
+    ("Информация", logging.INFO),
+    ("Предупреждения", logging.WARNING),
+    ("Ошибки", logging.ERROR),
+)
+
+_COLORS = {
+    logging.WARNING: QColor("#b36b00"),
+    logging.ERROR: QColor("#c62828"),
+    logging.CRITICAL: QColor("#c62828"),
+}
+
+
+class LogListModel(QAbstractListModel):
+    """Последние `capacity` строк журнала."""
+
+    LevelRole = Qt.UserRole + 1
+
+    def __init__(self, capacity: int = 5000, parent=None):
+        super().__init__(parent)
+        self._capacity = capacity
+        self._entries: List[LogEntry] = []
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._entries)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self._entries[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{time.strftime('%H:%M:%S', time.localtime(entry.created))}  {entry.text}"
+        if role == Qt.ForegroundRole:
+            return _COLORS.get(entry.levelno)
+        if role == self.LevelRole:
+            return entry.levelno
+        return None
+
+    def entry(self, row: int) -> LogEntry:
+        return self._entries[row]
+
+    def append_batch(self, entries: List[LogEntry]) -> None:
+        """Добавляет пачку строк; лишние старые удаляются одной операцией."""
+        if not entries:
+            return
+        entries = entries[-self._capacity:]
+        overflow = len(self._entries) + len(entries) - self._capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            del self._entries[:overflow]
+            self.endRemoveRows()
+        first = len(self._entries)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        self._entries.extend(entries)
+        self.endInsertRows()
+
+
+class LogFilterProxy(QSortFilterProxyModel):
+    """Фильтр журнала: минимальный уровень и подстрока (без учёта регистра)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._min_level = logging.DEBUG
+        self._needle = ""
+
+    def set_min_level(self, level: int) -> None:
+        self._min_level = level
+        self.invalidateFilter()
+
+    def set_search(self, text: str) -> None:
+        self._needle = text.strip().casefold()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        entry = self.sourceModel().entry(source_row)
+        if entry.levelno < self._min_level:
+            return False
+        return not self._needle or self._needle in entry.folded
+
+
+class LogPanel(QWidget):
+    """Журнал с фильтром по уровню и поиском; забирает строки из `buffer` раз в `flush_ms`."""
+
+    def __init__(self, buffer: LogBuffer, capacity: int = 5000, flush_ms: int = 100, parent=None):
+        super().__init__(parent)
+        self._buffer = buffer
+        self._model = LogListModel(capacity, self)
+        self._proxy = LogFilterProxy(self)
+        self._proxy.setSourceModel(self._model)
+
+        self._level = QComboBox()
+        for title, level in LEVELS:
+            self._level.addItem(title, level)
+        self._level.setCurrentIndex(0)
+        self._proxy.set_min_level(LEVELS[0][1])
+        self._search = QLineEdit()
+        self._search.setPlaceholderText("Поиск по журналу")
+        self._search.setClearButtonEnabled(True)
+        self._status = QLabel()
+
+        self._view = QListView()
+        self._view.setModel(self._proxy)
+        # Одинаковая высота строк: вид не измеряет каждую строку и рисует только видимые
+        self._view.setUniformItemSizes(True)
+        self._view.setEditTriggers(QListView.NoEditTriggers)
+        self._view.setSelectionMode(QListView.ExtendedSelection)
+
+        top = QHBoxLayout()
+        top.addWidget(QLabel("Уровень:"))
+        top.addWidget(self._level)
+        top.addWidget(self._search, 1)
+        top.addWidget(self._status)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(top)
+        layout.addWidget(self._view)
+
+        self._level.currentIndexChanged.connect(lambda _: self._proxy.set_min_level(self._level.currentData()))
+
+        # Поиск перефильтровывает журнал — не на каждую букву, а после паузы ввода
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(200)
+        self._search.textChanged.connect(lambda _: self._search_timer.start())
+        self._search_timer.timeout.connect(lambda: self._proxy.set_search(self._search.text()))
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(flush_ms)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    def add_message(self, text: str, level: int = logging.INFO) -> None:
+        """Строка от самого окна (не через logging)."""
+        self._buffer.append(make_entry(text, level))
+
+    def flush(self) -> None:
+        entries = self._buffer.drain()
+        if not entries:
+            return
+        bar = self._view.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum() - 2
+        self._model.append_batch(entries)
+        if at_bottom:
+            self._view.scrollToBottom()
+        self._update_status()
+
+    def _update_status(self) -> None:
+        dropped = self._buffer.dropped
+        text = f"строк: {self._model.rowCount()}"
+        if dropped:
+            text += f", пропущено: {dropped}"
+        self._status.setText(text)
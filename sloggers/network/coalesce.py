@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+"""Склейка одинаковых запросов и короткий кэш ответов на чтение.
+
+Кэш живёт в `Transport` — то есть общий для всех клиентов одной сессии
+аккаунта. Ключ — (endpoint, операция, текст запроса, переменные):
+- одинаковые запросы, отправленные одновременно (параллельные обработчики
+  конвейера откликов, догоняющие, справочники), делят один поход в сеть
+  (single‑flight): первый вызов идёт на сервер, остальные ждут его ответа;
+- ответы операций с заданным TTL (`DEFAULT_TTL`, секция `network.cache_ttl`
+  настроек аккаунта) ещё `ttl` секунд отдаются из памяти;
+- мутация сбрасывает кэш операций, которые она меняет (`INVALIDATES`; прочие
+  мутации — весь кэш endpoint'а).
+
+Операции без TTL `GraphQLClient` отправляет мимо кэша. Мутации не склеиваются
+и не кэшируются. Ошибки не кэшируются. Просроченные ответы вычищаются при
+записи новых, а число записей ограничено `max_entries` —
+у `getOrderForBid` ключ свой на каждый заказ, и без чистки кэш рос бы всё время работы.
+"""
+
+import asyncio
+import copy
+import itertools
+import json
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from ..core.metrics import METRICS
+
+
+# Сколько секунд ответ операции считается свежим. Опрос ленты не кэшируется —
+# устаревшая лента и есть та задержка, с которой бот борется
+DEFAULT_TTL: Dict[str, float] = {
+    "getOrderForBid": 2.0,
+    "getDictionary": 300.0,
+    "getProfile": 60.0,
+}
+
+# Какие кэшированные операции устаревают после мутации
+INVALIDATES: Dict[str, Tuple[str, ...]] = {
+    "makeOffer": ("getOrderForBid",),  # у заказа сменилось число откликов
+    "addComment": (),
+}
+
+CacheKey = Tuple[str, str, str, str]  # endpoint, операция, SHA‑256 текста, переменные (JSON)
+
+
+def cache_key(endpoint: str, operation: str, sha256: str, variables: Optional[Dict[str, Any]]) -> CacheKey:
+    params = json.dumps(variables, sort_keys=True, ensure_ascii=False, separators=(",", ":")) if variables else ""
+    return (endpoint, operation, sha256, params)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0  # ответ из кэша
+    coalesced: int = 0  # присоединились к запросу, который уже в сети
+    misses: int = 0  # пошли в сеть
+    invalidated: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class ResponseCache:
+    """Single‑flight + TTL‑кэш ответов одного транспорта."""
+
+    def __init__(
+        self,
+        ttl: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        max_entries: int = 512,
+    ):
+        self._ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self._clock = clock
+        self._max = max(1, int(max_entries))
+        self._sweep_at = 64  # размер, при котором пора вычистить просроченные
+        self._entries: Dict[CacheKey, Tuple[float, Any]] = {}  # ключ → (истекает, ответ), в порядке записи
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._joined: Dict[CacheKey, int] = {}  # сколько вызовов ждут запрос из `_inflight`
+        self.stats = CacheStats()
+
+    def ttl(self, operation: str) -> float:
+        return float(self._ttl.get(operation, 0.0))
+
+    async def get_or_fetch(self, key: CacheKey, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Ответ из кэша, из уже идущего запроса или из нового вызова `fetch()`.
+
+        Движок может менять полученные словари (например, сортирует список
+        заказов), поэтому кэш хранит свой снимок ответа, а попадания в кэш и
+        присоединившиеся к запросу получают копии снимка. Вызвавший `fetch()`
+        получает сам ответ — без копирования.
+        """
+        op = key[1]
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > self._clock():
+                self._count(op, "hit")
+                return copy.deepcopy(entry[1])
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._count(op, "coalesced")
+            self._joined[key] = self._joined.get(key, 0) + 1
+            # shield: отмена одного ожидающего не отменяет запрос остальным
+            _, snapshot = await asyncio.shield(task)
+            return copy.deepcopy(snapshot)
+
+        self._count(op, "miss")
+        task = asyncio.ensure_future(self._run(key, fetch))
+        self._inflight[key] = task
+        result, _ = await asyncio.shield(task)
+        return result
+
+    async def _run(self, key: CacheKey, fetch: Callable[[], Awaitable[Any]]) -> Tuple[Any, Any]:
+        """(ответ, снимок): снимок снимается, только если ответ кэшируется или его ждут другие."""
+        try:
+            result = await fetch()
+        finally:
+            self._inflight.pop(key, None)
+            joined = self._joined.pop(key, 0)
+        ttl = self.ttl(key[1])
+        snapshot = copy.deepcopy(result) if ttl > 0 or joined else None
+        if ttl > 0:
+            entries = self._entries
+            entries.pop(key, None)  # запись уходит в конец — порядок остаётся по времени записи
+            entries[key] = (self._clock() + ttl, snapshot)
+            if len(entries) >= self._sweep_at:
+                self._sweep()
+        return result, snapshot
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _sweep(self) -> None:
+        """Убирает просроченные ответы, а сверх `max_entries` — самые давние."""
+        now = self._clock()
+        entries = self._entries
+        for k in [k for k, (expires, _) in entries.items() if expires <= now]:
+            del entries[k]
+        excess = len(entries) - self._max
+        if excess > 0:
+            for k in list(itertools.islice(entries, excess)):
+                del entries[k]
+        # Следующая чистка — когда записей станет вдвое больше, чем осталось
+        self._sweep_at = min(self._max, max(64, 2 * len(entries)))
+
+    def invalidate(self, endpoint: str, operations: Optional[Iterable[str]] = None) -> None:
+        """Сбрасывает ответы `operations` endpoint'а (None — все)."""
+        ops = None if operations is None else set(operations)
+        stale = [k for k in self._entries if k[0] == endpoint and (ops is None or k[1] in ops)]
+        for k in stale:
+            del self._entries[k]
+        self.stats.invalidated += len(stale)
+
+    def after_mutation(self, endpoint: str, mutation: str) -> None:
+        self.invalidate(endpoint, INVALIDATES.get(mutation))
+
+    def _count(self, op: str, result: str) -> None:
+        if result == "hit":
+            self.stats.hits += 1
+        elif result == "coalesced":
+            self.stats.coalesced += 1
+        else:
+            self.stats.misses += 1
+        if METRICS.enabled:
+            METRICS.counter("sloggers_graphql_cache_total", "Запросы на чтение: кэш, склейка, сеть", operation=op, result=result).inc()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+"""Декодирование JSON‑ответов сайта.
+
+Ответ ленты — десятки килобайт JSON на каждый полный опрос каждого аккаунта,
+поэтому разбор берётся из самой быстрой установленной библиотеки: orjson,
+затем msgspec, иначе стандартный `json`. Ни одна из них не обязательна —
+без них всё работает на стандартной библиотеке, только медленнее.
+
+Все декодеры принимают `bytes` (тело ответа как есть, без перекодирования в
+`str`) и при ошибке разбора поднимают `ValueError`, как `json.loads`.
+"""
+
+import json
+from typing import Any, Callable, Dict
+
+try:
+    import orjson
+except ImportError:  # необязательная зависимость
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # необязательная зависимость
+    msgspec = None
+
+
+Loads = Callable[[bytes], Any]
+
+
+def _msgspec_loads() -> Loads:
+    decode = msgspec.json.Decoder().decode
+
+    def loads(data: bytes) -> Any:
+        try:
+            return decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    return loads
+
+
+def available() -> Dict[str, Loads]:
+    """Установленные декодеры по имени, от быстрого к медленному."""
+    found: Dict[str, Loads] = {}
+    if orjson is not None:
+        found["orjson"] = orjson.loads
+    if msgspec is not None:
+        found["msgspec"] = _msgspec_loads()
+    found["json"] = json.loads
+    return found
+
+
+BACKEND, loads = next(iter(available().items()))
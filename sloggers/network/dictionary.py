@@ -1,30 +1,130 @@
 from __future__ import annotations
 
-"""Загрузка справочников (типы работ и категории) через GraphQL."""
+"""Справочники сайта (типы работ и предметы): загрузка через GraphQL и общий кэш.
 
-import asyncio
-from typing import Dict, List
+Справочники одинаковы для всех аккаунтов хоста, поэтому кэшируются в базе
+приложения (`dictionary_cache`) по хосту: окно любого аккаунта показывает их
+сразу, а сеть нужна, только когда запись старше `DICTIONARY_TTL` или её
+обновляют вручную. Вместе с данными хранится хэш содержимого — после
+загрузки по нему видно, изменилось ли что‑то (перерисовывать списки не нужно,
+если нет).
+"""
 
-import httpx
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 
-from .graphql_client import GraphQLClient
+from ..core.database import Database
+from ..core.storage import get_database
 from .queries import GET_DICTIONARY
 
+# Справочники меняются редко — сутки без перезапроса
+DICTIONARY_TTL = 24 * 3600
+
+
+@dataclass
+class CachedDictionary:
+    data: Dict[str, List[dict]]
+    hash: str
+    fetched: float  # время последней загрузки
+    changed: float  # время последнего изменения содержимого
+
+    def is_fresh(self, ttl: float = DICTIONARY_TTL, now: Optional[float] = None) -> bool:
+        return (time.time() if now is None else now) - self.fetched < ttl
+
+
+def _host(base_url: str) -> str:
+    # Как transport.host_of, но без импорта httpx: кэш читается окном при открытии
+    parts = urlsplit(base_url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def dictionary_hash(data: Dict[str, List[dict]]) -> str:
+    raw = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _id_name(item: dict) -> dict:
+    return {"id": str(item.get("id")), "name": item.get("name") or ""}
 
-async def fetch_dictionary_async(base_url: str, cookies: list[dict]) -> Dict[str, List[dict]]:
-    client = GraphQLClient(base_url=base_url, cookies=cookies, endpoint="/graphql")
+
+def _normalize(d: dict) -> Dict[str, List[dict]]:
+    """Только то, что использует окно: ID и названия (служебные поля GraphQL отбрасываются)."""
+    return {
+        "worktypes": [_id_name(t) for t in d.get("worktypes") or []],
+        "workcategoriesgroup": [
+            {"name": g.get("name") or "", "items": [_id_name(it) for it in g.get("items") or []]}
+            for g in d.get("workcategoriesgroup") or []
+        ],
+    }
+
+
+def load_cached_dictionary(base_url: str, db: Optional[Database] = None) -> Optional[CachedDictionary]:
+    """Справочники из кэша (любой давности); None — ещё не загружались."""
+    row = (db or get_database()).query_one(
+        "SELECT data, hash, fetched, changed FROM dictionary_cache WHERE host = ?", (_host(base_url),)
+    )
+    if row is None:
+        return None
+    try:
+        data = json.loads(row[0])
+    except ValueError:
+        return None
+    return CachedDictionary(data, row[1], row[2], row[3])
+
+
+def store_dictionary(
+    base_url: str, data: Dict[str, List[dict]], db: Optional[Database] = None, now: Optional[float] = None
+) -> Tuple[CachedDictionary, bool]:
+    """Сохраняет загруженные справочники. Второй элемент — изменилось ли содержимое."""
+    db = db or get_database()
+    now = time.time() if now is None else now
+    digest = dictionary_hash(data)
+    host = _host(base_url)
+    with db.transaction() as conn:
+        row = conn.execute("SELECT hash, changed FROM dictionary_cache WHERE host = ?", (host,)).fetchone()
+        changed = row is None or row[0] != digest
+        if changed:
+            conn.execute(
+                "INSERT OR REPLACE INTO dictionary_cache (host, data, hash, fetched, changed) VALUES (?, ?, ?, ?, ?)",
+                (host, json.dumps(data, ensure_ascii=False), digest, now, now),
+            )
+        else:
+            # Содержимое то же — только продлеваем срок
+            conn.execute("UPDATE dictionary_cache SET fetched = ? WHERE host = ?", (now, host))
+    return CachedDictionary(data, digest, now, now if changed else row[1]), changed
+
+
+async def fetch_dictionary_async(base_url: str, cookies: list[dict], jar_key: str | None = None) -> Dict[str, List[dict]]:
+    """Загружает справочники через транспорт сессии из реестра (соединение переиспользуется)."""
+    from .graphql_client import GraphQLClient
+
+    client = GraphQLClient(base_url=base_url, cookies=cookies, endpoint="/graphql", jar_key=jar_key)
     try:
         data = await client.call(GET_DICTIONARY, operation_name="getDictionary")
-        d = data.get("dictionarylist", {})
-        return {
-            "worktypes": d.get("worktypes", []),
-            "workcategoriesgroup": d.get("workcategoriesgroup", []),
-        }
+        result = _normalize(data.get("dictionarylist") or {})
+        if not result["worktypes"]:
+            # Пустой ответ (сессия истекла, сбой сайта) не должен затереть кэш
+            raise RuntimeError("сайт вернул пустые справочники")
+        return result
     finally:
         await client.aclose()
 
 
-def fetch_dictionary(base_url: str, cookies: list[dict]) -> Dict[str, List[dict]]:
-    """Синхронная обёртка для использования из UI-потока (через вспомогательный поток)."""
-    return asyncio.run(fetch_dictionary_async(base_url, cookies))
+def refresh_dictionary(base_url: str, cookies: list[dict], jar_key: str | None = None) -> Tuple[CachedDictionary, bool]:
+    """Загружает справочники и обновляет кэш. Блокирует — вызывать из фонового потока."""
+
+    from .transport import get_registry
+
+    async def _once() -> Dict[str, List[dict]]:
+        try:
+            return await fetch_dictionary_async(base_url, cookies, jar_key)
+        finally:
+            # asyncio.run создаёт отдельный цикл — его соединения закрываем сразу
+            await get_registry().aclose()
 
+    return store_dictionary(base_url, asyncio.run(_once()))
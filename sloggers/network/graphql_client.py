@@ -4,57 +4,273 @@ from __future__ import annotations
 
 Клиент использует cookies, сохранённые из встроенного браузера, чтобы работать от имени
 пользовательской сессии. В случае необходимости можно добавить Bearer‑авторизацию.
+
+HTTP‑соединения клиент берёт из общего реестра (`network/transport.py`): все клиенты
+одной сессии работают поверх одного тёплого HTTP/2‑соединения.
+
+Ответы, по которым повтор бесполезен, поднимаются отдельными исключениями:
+`AuthError` — сессия не авторизована (HTTP 401/403, редирект на вход или
+ошибка авторизации в ответе GraphQL), `RateLimitError` — HTTP 429. Повторы
+tenacity — только на сетевых ошибках.
+
+Запросы уходят как automatic persisted queries (APQ): в теле — только
+SHA‑256 текста из реестра `queries.document()`. Если сервер хэша ещё не знает,
+запрос сразу повторяется с текстом (сервер его запоминает); если APQ сервер
+не поддерживает, транспорт запоминает это и дальше шлёт обычный текст.
+
+Ответы части операций (`getOrderForBid`, справочники, профиль) недолго
+кэшируются, а одинаковые такие запросы, идущие одновременно, склеиваются в один
+поход в сеть — см. `network/coalesce.py`. Операции без TTL (опрос ленты) идут
+мимо кэша. Мутация сбрасывает кэш операций,
+которые она меняет (`makeOffer` → `getOrderForBid`).
+
+Тело ответа разбирается самым быстрым установленным JSON‑декодером
+(`network/codec.py`) прямо из байтов.
+
+При включённых метриках (`core/metrics.py`) каждый вызов учитывается по имени
+операции: число запросов и повторов, ошибки, длительность, байты в обе стороны.
 """
 
-import asyncio
 import logging
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, Optional, Union
 
 import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from ..core.metrics import METRICS
+from .coalesce import cache_key
+from .codec import loads
+from .queries import QueryDocument, document
+from .transport import Transport, TransportConfig, TransportRegistry, get_registry
+
 
 log = logging.getLogger(__name__)
 
 
+class GraphQLError(RuntimeError):
+    """Ответ GraphQL с полем `errors`."""
+
+    def __init__(self, errors: Any):
+        super().__init__(f"GraphQL errors: {errors}")
+        self.errors = errors
+
+
+class AuthError(RuntimeError):
+    """Сайт не считает сессию авторизованной — нужны свежие cookies."""
+
+
+class RateLimitError(RuntimeError):
+    """Сайт ограничил частоту запросов (HTTP 429)."""
+
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP 429, повтор через {retry_after:.0f} с" if retry_after else "HTTP 429")
+        self.retry_after = retry_after
+
+
+# Признаки ошибки авторизации в тексте или коде ошибки GraphQL
+_AUTH_MARKERS = ("unauthorized", "unauthenticated", "not authorized", "forbidden", "access denied", "авториз", "доступ запрещ")
+
+
+def _is_auth_error(errors: Any) -> bool:
+    for err in errors if isinstance(errors, list) else [errors]:
+        if not isinstance(err, dict):
+            continue
+        code = str((err.get("extensions") or {}).get("code") or "").lower()
+        text = f"{code} {err.get('message') or ''}".lower()
+        if any(m in text for m in _AUTH_MARKERS):
+            return True
+    return False
+
+
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+    try:
+        return max(0.0, float(resp.headers.get("Retry-After", "")))
+    except ValueError:
+        return None
+
+
+_APQ_MISSING = ("persistedquerynotfound", "persisted_query_not_found")
+_APQ_UNSUPPORTED = ("persistedquerynotsupported", "persisted_query_not_supported")
+# Так отвечает сервер без APQ, не прочитавший `extensions`: запрос не выполнялся
+_NO_QUERY = ("must provide query",)
+
+
+def _persisted_miss(resp: httpx.Response, known: Optional[bool], read_only: bool = True) -> Optional[str]:
+    """Почему сервер не выполнил запрос по хэшу: "missing", "unsupported" или None (ответ настоящий).
+
+    Мутацию считаем невыполненной только по явному ответу сервера: повтор с
+    текстом после настоящей ошибки мог бы, например, отправить отклик дважды.
+    """
+    if resp.status_code not in (200, 400):
+        return None
+    errors = data = None
+    # Обычный ответ без ошибок не разбираем дважды — его декодирует `_check_response`
+    if b'"errors"' in resp.content:
+        try:
+            body = loads(resp.content)
+            errors, data = body.get("errors"), body.get("data")
+        except (ValueError, AttributeError):
+            errors = None
+    for err in errors if isinstance(errors, list) else []:
+        if not isinstance(err, dict):
+            continue
+        text = f"{(err.get('extensions') or {}).get('code') or ''} {err.get('message') or ''}".lower()
+        if any(m in text for m in _APQ_MISSING):
+            return "missing"
+        if any(m in text for m in _APQ_UNSUPPORTED) or any(m in text for m in _NO_QUERY):
+            return "unsupported"
+    if known is None and read_only:
+        # Сервер без APQ отвечает 400 или 200 с ошибкой «нет текста запроса» другими
+        # словами; первый запрос по хэшу без данных в ответе — признак того же, а
+        # лишний повтор чтения безвреден. Ошибку авторизации отдаст и запрос
+        # с текстом — её разбирает `_check_response`
+        if resp.status_code == 400 or (errors and not data and not _is_auth_error(errors)):
+            return "unsupported"
+    return None
+
+
+def _check_response(resp: httpx.Response) -> Dict[str, Any]:
+    if resp.status_code in (401, 403):
+        raise AuthError(f"HTTP {resp.status_code}")
+    if resp.is_redirect:
+        # GraphQL сам по себе не перенаправляет — это уход на страницу входа
+        raise AuthError(f"HTTP {resp.status_code} → {resp.headers.get('Location', '')}")
+    if resp.status_code == 429:
+        raise RateLimitError(_retry_after(resp))
+    resp.raise_for_status()
+    data = loads(resp.content)
+    if "errors" in data:
+        if _is_auth_error(data["errors"]):
+            raise AuthError(f"GraphQL: {data['errors']}")
+        raise GraphQLError(data["errors"])
+    return data.get("data", {})
+
+
+def _count_retry(retry_state) -> None:
+    """Хук tenacity перед паузой: учитываем повтор запроса."""
+    if METRICS.enabled:
+        op = retry_state.args[3] if len(retry_state.args) > 3 else None
+        METRICS.counter("sloggers_graphql_retries_total", "Повторы GraphQL-запросов", operation=op or "anonymous").inc()
+
+
 class GraphQLClient:
     """Минималистичный GraphQL‑клиент c повторными попытками на сетевых ошибках.
 
     Можно указать конкретный endpoint (по умолчанию `/graphql`). Для чата
-    на avtor24.ru используется `/graphqlapi`.
+    на avtor24.ru используется `/graphqlapi`. Клиенты с одинаковым `jar_key`
+    (обычно ID аккаунта) делят один транспорт; без него ключом служит отпечаток cookies.
     """
 
-    def __init__(self, base_url: str, cookies: list[dict], endpoint: str = "/graphql"):
+    def __init__(
+        self,
+        base_url: str,
+        cookies: list[dict],
+        endpoint: str = "/graphql",
+        jar_key: Optional[str] = None,
+        config: Optional[TransportConfig] = None,
+        registry: Optional[TransportRegistry] = None,
+    ):
         self._endpoint = endpoint if endpoint.startswith("/") else "/" + endpoint
         self._base_url = base_url.rstrip("/") + self._endpoint
-        self._client = httpx.AsyncClient(timeout=20.0, http2=True)
-        # Восстанавливаем cookies в сессию
-        for c in cookies:
-            try:
-                self._client.cookies.set(name=c["name"], value=c["value"], domain=c.get("domain"), path=c.get("path", "/"))
-            except Exception:
-                pass
+        self._registry = registry or get_registry()
+        self._transport: Optional[Transport] = self._registry.acquire(base_url, cookies, jar_key=jar_key, config=config)
+        self._client = self._transport.client
+
+    @property
+    def transport(self) -> Transport:
+        assert self._transport is not None
+        return self._transport
 
     async def aclose(self) -> None:
-        await self._client.aclose()
+        """Возвращает транспорт в реестр (соединение остаётся тёплым для других клиентов)."""
+        if self._transport is not None:
+            self._registry.release(self._transport)
+            self._transport = None
+
+    async def call(
+        self,
+        query: Union[str, QueryDocument],
+        variables: Optional[Dict[str, Any]] = None,
+        operation_name: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        doc = query if isinstance(query, QueryDocument) else document(query)
+        op = operation_name or doc.name or None
+        responses = self.transport.responses
+        if not doc.read_only:
+            try:
+                return await self._fetch(doc, variables, op)
+            finally:
+                # Даже при ошибке мутация могла дойти до сервера — кэш уже не верен
+                responses.after_mutation(self._base_url, op or "")
+        if responses.ttl(op or "anonymous") <= 0:
+            # Без TTL (опрос ленты) кэш только копировал бы ответ на каждом запросе
+            return await self._fetch(doc, variables, op)
+        key = cache_key(self._base_url, op or "anonymous", doc.sha256, variables)
+        return await responses.get_or_fetch(key, lambda: self._fetch(doc, variables, op))
 
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=8),
         retry=retry_if_exception_type((httpx.TransportError, httpx.ReadTimeout)),
+        before_sleep=_count_retry,
         reraise=True,
     )
-    async def call(self, query: str, variables: Optional[Dict[str, Any]] = None, operation_name: Optional[str] = None) -> Dict[str, Any]:
-        payload: Dict[str, Any] = {"query": query}
+    async def _fetch(self, doc: QueryDocument, variables: Optional[Dict[str, Any]], op: Optional[str]) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {}
         if variables is not None:
             payload["variables"] = variables
-        if operation_name is not None:
-            payload["operationName"] = operation_name
-
-        log.debug("GraphQL call: %s", operation_name or query[:60])
-        resp = await self._client.post(self._base_url, json=payload, headers={"Content-Type": "application/json"})
-        resp.raise_for_status()
-        data = resp.json()
-        if "errors" in data:
-            raise RuntimeError(f"GraphQL errors: {data['errors']}")
-        return data.get("data", {})
+        if op is not None:
+            payload["operationName"] = op
+
+        log.debug("GraphQL call: %s", op or doc.text[:60])
+        transport = self.transport
+        known = transport.apq.get(self._base_url)
+        use_apq = transport.config.persisted_queries and known is not False
+        if use_apq:
+            payload["extensions"] = {"persistedQuery": {"version": 1, "sha256Hash": doc.sha256}}
+            resp = await self._post(payload, op)
+            miss = _persisted_miss(resp, known, doc.read_only)
+            if miss is None:
+                return _check_response(resp)
+            if METRICS.enabled:
+                METRICS.counter("sloggers_graphql_apq_misses_total", "Запросы, повторённые с текстом", operation=op or "anonymous").inc()
+            if miss == "unsupported":
+                log.info("Сервер %s не поддерживает persisted queries — запросы идут с текстом", self._base_url)
+                transport.apq[self._base_url] = False
+                del payload["extensions"]
+                use_apq = False
+        payload["query"] = doc.text
+        data = _check_response(await self._post(payload, op))
+        if use_apq:
+            transport.apq[self._base_url] = True
+        return data
+
+    async def _post(self, payload: Dict[str, Any], op: Optional[str]) -> httpx.Response:
+        if not METRICS.enabled:
+            return await self._client.post(self._base_url, json=payload, headers={"Content-Type": "application/json"})
+        return await self._measured_post(payload, op or "anonymous")
+
+    async def _measured_post(self, payload: Dict[str, Any], op: str) -> httpx.Response:
+        METRICS.counter("sloggers_graphql_requests_total", "GraphQL-запросы (с повторами)", operation=op).inc()
+        started = time.perf_counter()
+        try:
+            resp = await self._client.post(self._base_url, json=payload, headers={"Content-Type": "application/json"})
+        except Exception as e:
+            METRICS.counter("sloggers_graphql_errors_total", "Ошибки GraphQL-запросов", operation=op, kind=type(e).__name__).inc()
+            raise
+        finally:
+            METRICS.histogram("sloggers_graphql_request_seconds", "Длительность GraphQL-запроса", operation=op).observe(
+                time.perf_counter() - started
+            )
+        METRICS.counter("sloggers_graphql_sent_bytes_total", "Отправлено байт (тело запроса)", operation=op).inc(
+            len(resp.request.content)
+        )
+        METRICS.counter("sloggers_graphql_received_bytes_total", "Получено байт (по проводу)", operation=op).inc(
+            resp.num_bytes_downloaded
+        )
+        if resp.status_code >= 400:
+            METRICS.counter(
+                "sloggers_graphql_errors_total", "Ошибки GraphQL-запросов", operation=op, kind=f"HTTP {resp.status_code}"
+            ).inc()
+        return resp
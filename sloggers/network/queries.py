@@ -1,16 +1,53 @@
-"""Тексты GraphQL запросов/мутаций.
+"""Тексты GraphQL запросов/мутаций и реестр документов запросов.
 
 Примечание: схема может изменяться. При ошибках в production — проверьте актуальные
 запросы в инструментах разработчика браузера (Network, вкладка graphql) и обновите строки ниже.
+
+Реестр (`document()`) хранит каждый текст запроса в сжатом виде вместе с его
+SHA‑256 — по хэшу клиент отправляет запрос как persisted query (см.
+`graphql_client.py`), не пересылая текст. Ленту бот запрашивает запросом,
+собранным из нужных ему полей заказа (`auction_orders_query`), а не полным
+`GET_AUCTION_WITH_CONSTRAINTS` сайта.
 """
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable
+
+
+@dataclass(frozen=True)
+class QueryDocument:
+    """Текст запроса (без лишних пробелов) и его SHA‑256 для persisted queries."""
+
+    name: str
+    text: str
+    sha256: str
+
+    @property
+    def read_only(self) -> bool:
+        """Запрос на чтение (не мутация) — такие можно склеивать и кэшировать."""
+        return not self.text.startswith("mutation")
+
+
+_documents: Dict[str, QueryDocument] = {}
+
+
+def document(query: str, name: str = "") -> QueryDocument:
+    """Документ запроса из реестра; хэш считается один раз на текст."""
+    doc = _documents.get(query)
+    if doc is None:
+        # В запросах нет строковых литералов — пробелы можно схлопнуть без изменения смысла
+        text = " ".join(query.split())
+        doc = QueryDocument(name, text, hashlib.sha256(text.encode("utf-8")).hexdigest())
+        _documents[query] = doc
+    return doc
 
 # Справочники (типы работ, категории и т.п.)
 GET_DICTIONARY = """
 query getDictionary {
   dictionarylist {
-    worktypes { id name count }
-    workcategoriesgroup { name items { id name count } }
-    phonemasks { maskId code mask country }
+    worktypes { id name }
+    workcategoriesgroup { name items { id name } }
   }
 }
 """
@@ -31,7 +68,8 @@ query getProfile {
 """
 
 
-# Получение ленты аукциона по фильтрам/ограничениям (по мотивам HAR)
+# Полный запрос ленты сайта по фильтрам/ограничениям (по мотивам HAR); бот сам шлёт
+# `auction_orders_query` — только с нужными ему полями
 GET_AUCTION_WITH_CONSTRAINTS = """
 query GetAuctionWithConstraints($skip: Int, $limit: Int, $filter: AuctionFilterInputType, $constraintsFilter: AuctionFilterInputType, $pagination: AuctionPaginationInputType) {
   auctionFilterConstraint(filter: $constraintsFilter) {
@@ -97,6 +135,32 @@ fragment orderDataFragment on order {
 """
 
 
+# Проба ленты: число заказов под фильтром и флаг новых приватных заказов (десятки байт).
+# Полный опрос выполняется, только когда проба показала изменение.
+GET_AUCTION_PROBE = """
+query GetAuctionProbe($filter: AuctionFilterInputType) {
+  auctionFilteredCount(filter: $filter)
+  hasNewPrivateOrders
+}
+"""
+
+
+# Лёгкий запрос ленты: только ID и время создания заказов той же страницы.
+# Полный запрос ленты (`auction_orders_query`) отправляется, только если среди них есть новые.
+GET_AUCTION_IDS = """
+query GetAuctionIds($skip: Int, $limit: Int, $filter: AuctionFilterInputType, $pagination: AuctionPaginationInputType) {
+  orders(skip: $skip, limit: $limit, filter: $filter, pagination: $pagination) {
+    total
+    captcha
+    orders {
+      id
+      creation
+    }
+  }
+}
+"""
+
+
 # Детали для отклика (минимально необходимые поля)
 GET_ORDER_FOR_BID = """
 query getOrderForBid($id: ID!) {
@@ -166,3 +230,53 @@ fragment messageFragment on message {
   __typename
 }
 """
+
+
+# Поля заказа, из которых собирается запрос ленты: имя → выборка. Порядок — как в orderDataFragment
+ORDER_FIELDS: Dict[str, str] = {
+    "id": "id",
+    "type": "type { id name }",
+    "category": "category { id name }",
+    "customer": "customer { id isOnline nickName }",
+    "badges": "badges { id name }",
+    "title": "title",
+    "description": "description",
+    "budget": "budget",
+    "recommendedBudget": "recommendedBudget",
+    "isPremium": "isPremium",
+    "creation": "creation",
+    "deadline": "deadline",
+    "customerFiles": "customerFiles { id }",
+    "countOffers": "countOffers",
+    "isExpressOrder": "isExpressOrder",
+    "authorHasOffer": "authorHasOffer",
+}
+
+
+def order_selection(fields: Iterable[str]) -> str:
+    """Выборка полей заказа; неизвестное поле — ValueError (опечатка не должна молча пропасть)."""
+    wanted = set(fields) | {"id"}
+    unknown = wanted - ORDER_FIELDS.keys()
+    if unknown:
+        raise ValueError(f"Неизвестные поля заказа: {', '.join(sorted(unknown))}")
+    return " ".join(sel for name, sel in ORDER_FIELDS.items() if name in wanted)
+
+
+@lru_cache(maxsize=16)
+def _auction_orders(fields: FrozenSet[str], market: bool) -> QueryDocument:
+    # Диапазон бюджетов ленты под фильтром — несколько байт; нужен только ценам
+    constraint = "auctionFilterConstraint(filter: $filter) { minBudget maxBudget } " if market else ""
+    text = (
+        "query GetAuctionOrders($skip: Int, $limit: Int, $filter: AuctionFilterInputType, "
+        f"$pagination: AuctionPaginationInputType) {{ {constraint}auctionFilteredCount(filter: $filter) "
+        "orders(skip: $skip, limit: $limit, filter: $filter, pagination: $pagination) "
+        f"{{ total captcha orders {{ {order_selection(fields)} }} }} }}"
+    )
+    return document(text, "GetAuctionOrders")
+
+
+def auction_orders_query(fields: Iterable[str], market: bool = False) -> QueryDocument:
+    """Лента аукциона только с полями `fields` — без ограничений фильтра и рекомендаций,
+    которые возвращает полный запрос сайта. `market` — добавить диапазон бюджетов
+    (`auctionFilterConstraint`) для ограничения цены ставки."""
+    return _auction_orders(frozenset(fields), market)
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+"""Общий пул HTTP/2‑соединений для GraphQL‑клиентов.
+
+Все клиенты одного аккаунта (endpoint'ы `/graphql` и `/graphqlapi`, загрузка
+справочников) получают из реестра один и тот же `Transport` — а значит, один
+`httpx.AsyncClient` с тёплым HTTP/2‑соединением к хосту. Ключ реестра —
+(хост, cookie‑jar): у разных аккаунтов разные сессии, и смешивать их нельзя.
+
+Реестр привязан к циклу событий: соединения httpx нельзя переносить между
+циклами, поэтому `get_registry()` возвращает отдельный реестр на каждый цикл.
+"""
+
+import asyncio
+import hashlib
+import logging
+import weakref
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from .coalesce import ResponseCache
+
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    """Параметры пула соединений (секция `network` в настройках аккаунта)."""
+
+    max_connections: int = 10
+    max_keepalive_connections: int = 5
+    keepalive_expiry: float = 120.0
+    timeout: float = 20.0
+    http2: bool = True
+    persisted_queries: bool = True  # отправлять хэш запроса вместо текста (APQ)
+    # TTL кэша ответов по операциям поверх `coalesce.DEFAULT_TTL` (0 — не кэшировать)
+    cache_ttl: Tuple[Tuple[str, float], ...] = ()
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "TransportConfig":
+        net = settings.get("network", {}) or {}
+        default = cls()
+        return cls(
+            max_connections=int(net.get("max_connections", default.max_connections)),
+            max_keepalive_connections=int(net.get("max_keepalive_connections", default.max_keepalive_connections)),
+            keepalive_expiry=float(net.get("keepalive_expiry", default.keepalive_expiry)),
+            timeout=float(net.get("timeout", default.timeout)),
+            http2=bool(net.get("http2", default.http2)),
+            persisted_queries=bool(net.get("persisted_queries", default.persisted_queries)),
+            cache_ttl=tuple(sorted((str(op), float(ttl)) for op, ttl in (net.get("cache_ttl") or {}).items())),
+        )
+
+
+@dataclass
+class TransportStats:
+    """Счётчики переиспользования соединений."""
+
+    requests: int = 0
+    connections_opened: int = 0
+    http2_requests: int = 0
+
+    @property
+    def reused(self) -> int:
+        return max(0, self.requests - self.connections_opened)
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused / self.requests if self.requests else 0.0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["reused"] = self.reused
+        data["reuse_ratio"] = round(self.reuse_ratio, 3)
+        return data
+
+
+TransportKey = Tuple[str, str]
+
+
+def host_of(base_url: str) -> str:
+    """`https://avtor24.ru/graphql` → `https://avtor24.ru`."""
+    parts = urlsplit(base_url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def cookie_jar_key(cookies: Iterable[dict]) -> str:
+    """Отпечаток набора cookies — ключ сессии, если вызывающий не дал свой."""
+    h = hashlib.sha1()
+    for c in sorted((c.get("domain") or "", c.get("name", ""), c.get("value", "")) for c in cookies):
+        h.update("\x1f".join(c).encode("utf-8"))
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+
+class Transport:
+    """Один `httpx.AsyncClient` на (хост, сессия) со статистикой соединений."""
+
+    def __init__(self, key: TransportKey, config: TransportConfig):
+        self.key = key
+        self.config = config
+        self.stats = TransportStats()
+        self.refs = 0
+        self.last_used = 0.0
+        # Поддержка persisted queries по URL endpoint'а: None — ещё не ясно
+        self.apq: Dict[str, bool] = {}
+        # Склейка одинаковых запросов и кэш ответов на чтение — общие для всех клиентов сессии
+        self.responses = ResponseCache(dict(config.cache_ttl))
+        # Сетевые потоки httpcore, которые уже встречались: новый поток = новое соединение
+        self._streams: "weakref.WeakSet" = weakref.WeakSet()
+        self._stream_ids: set[int] = set()
+        limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        )
+        self.client = httpx.AsyncClient(
+            timeout=config.timeout,
+            http2=config.http2,
+            limits=limits,
+            event_hooks={"response": [self._on_response]},
+        )
+
+    def set_cookies(self, cookies: Iterable[dict]) -> None:
+        """Загружает cookies в сессию (существующие с тем же именем перезаписываются)."""
+        for c in cookies:
+            try:
+                self.client.cookies.set(name=c["name"], value=c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+            except Exception:
+                pass
+
+    def delete_cookies(self, cookies: Iterable[dict]) -> None:
+        """Удаляет cookies из сессии (например, сайт разлогинил браузер аккаунта)."""
+        for c in cookies:
+            try:
+                self.client.cookies.delete(c["name"], domain=c.get("domain"), path=c.get("path", "/"))
+            except Exception:
+                pass
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        self.stats.requests += 1
+        if response.http_version == "HTTP/2":
+            self.stats.http2_requests += 1
+        stream = response.extensions.get("network_stream")
+        if stream is None:
+            return
+        try:
+            if stream in self._streams:
+                return
+            self._streams.add(stream)
+        except TypeError:
+            # Поток без поддержки weakref — сравниваем по id
+            if id(stream) in self._stream_ids:
+                return
+            self._stream_ids.add(id(stream))
+        self.stats.connections_opened += 1
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class TransportRegistry:
+    """Реестр транспортов с подсчётом ссылок.
+
+    Освобождённый транспорт не закрывается сразу: соединение остаётся тёплым
+    `idle_ttl` секунд, чтобы следующий клиент (например, обновление справочников)
+    не платил за TCP+TLS+HTTP/2 рукопожатие заново.
+    """
+
+    def __init__(self, config: Optional[TransportConfig] = None, idle_ttl: float = 300.0):
+        self._config = config or TransportConfig()
+        self._idle_ttl = idle_ttl
+        self._items: Dict[TransportKey, Transport] = {}
+        self._closing: Set[asyncio.Task] = set()  # фоновые закрытия простаивающих транспортов
+
+    def acquire(
+        self,
+        base_url: str,
+        cookies: List[dict],
+        jar_key: Optional[str] = None,
+        config: Optional[TransportConfig] = None,
+    ) -> Transport:
+        """Выдаёт транспорт для хоста и сессии; парный вызов — `release()`."""
+        self._close_idle()
+        key = (host_of(base_url), jar_key or cookie_jar_key(cookies))
+        tr = self._items.get(key)
+        if tr is None:
+            tr = Transport(key, config or self._config)
+            self._items[key] = tr
+        tr.set_cookies(cookies)
+        tr.refs += 1
+        return tr
+
+    def release(self, transport: Transport) -> None:
+        transport.refs = max(0, transport.refs - 1)
+        transport.last_used = _now()
+
+    def stats(self) -> Dict[TransportKey, TransportStats]:
+        return {k: t.stats for k, t in self._items.items()}
+
+    def _close_idle(self) -> None:
+        now = _now()
+        for key, tr in list(self._items.items()):
+            if tr.refs == 0 and now - tr.last_used > self._idle_ttl:
+                del self._items[key]
+                # Ссылка на задачу держится до конца закрытия — иначе её может собрать GC
+                task = asyncio.get_running_loop().create_task(tr.aclose())
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+
+    async def aclose(self) -> None:
+        """Закрывает все соединения (при остановке цикла событий)."""
+        items = list(self._items.values())
+        self._items.clear()
+        for tr in items:
+            try:
+                await tr.aclose()
+            except Exception as e:
+                log.debug("Ошибка при закрытии транспорта %s: %s", tr.key[0], e)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+
+def _now() -> float:
+    return asyncio.get_running_loop().time()
+
+
+_registries: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, TransportRegistry]" = weakref.WeakKeyDictionary()
+
+
+def get_registry() -> TransportRegistry:
+    """Реестр транспортов текущего цикла событий (создаётся при первом обращении)."""
+    loop = asyncio.get_running_loop()
+    reg = _registries.get(loop)
+    if reg is None:
+        reg = TransportRegistry()
+        _registries[loop] = reg
+    return reg
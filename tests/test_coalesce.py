@@ -0,0 +1,34 @@
+"""Кэш ответов: кто получает копию ответа, а кто — сам ответ."""
+import asyncio
+
+from sloggers.network.coalesce import ResponseCache, cache_key
+
+
+def test_only_waiters_and_hits_get_copies():
+    async def run():
+        cache = ResponseCache(ttl={"getOrderForBid": 60.0, "getOrders": 0.0})
+        answer = {"orders": [3, 1, 2]}
+        released = asyncio.Event()
+
+        async def fetch():
+            await released.wait()
+            return answer
+
+        key = cache_key("e", "getOrderForBid", "", {"id": "1"})
+        first = asyncio.ensure_future(cache.get_or_fetch(key, fetch))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(cache.get_or_fetch(key, fetch))
+        await asyncio.sleep(0)
+        released.set()
+        own, joined = await first, await second
+        own["orders"].sort()  # вызвавший меняет свой ответ
+        hit = await cache.get_or_fetch(key, fetch)
+
+        feed = await cache.get_or_fetch(cache_key("e", "getOrders", "", None), fetch)
+        return cache, answer, own, joined, hit, feed
+
+    cache, answer, own, joined, hit, feed = asyncio.run(run())
+    assert own is answer and feed is answer
+    assert joined == hit == {"orders": [3, 1, 2]} and joined is not hit
+    assert (cache.stats.misses, cache.stats.coalesced, cache.stats.hits) == (2, 1, 1)
+    assert len(cache) == 1  # без TTL ответ не хранится
@@ -0,0 +1,37 @@
+"""Разбор ответа на запрос по хэшу (automatic persisted queries)."""
+import json
+
+import httpx
+
+from sloggers.network.graphql_client import _persisted_miss
+
+
+def _resp(status: int, body: dict) -> httpx.Response:
+    return httpx.Response(status, content=json.dumps(body).encode())
+
+
+def test_server_ignoring_extensions_is_unsupported():
+    # Сервер без APQ: 200 и ошибка «нет текста запроса»
+    resp = _resp(200, {"errors": [{"message": "Must provide query string."}]})
+    assert _persisted_miss(resp, None) == "unsupported"
+    assert _persisted_miss(_resp(400, {"errors": [{"message": "Bad Request"}]}), None) == "unsupported"
+
+
+def test_apq_codes_and_real_answers():
+    missing = _resp(200, {"errors": [{"message": "PersistedQueryNotFound", "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"}}]})
+    assert _persisted_miss(missing, None) == "missing"
+    assert _persisted_miss(missing, True) == "missing"
+    # Данные с частичными ошибками и ошибки после подтверждённой поддержки — настоящий ответ
+    partial = _resp(200, {"data": {"orders": None}, "errors": [{"message": "boom"}]})
+    assert _persisted_miss(partial, None) is None
+    assert _persisted_miss(_resp(200, {"errors": [{"message": "boom"}]}), True) is None
+    # Ошибку авторизации разбирает `_check_response`, а не откат на текст
+    assert _persisted_miss(_resp(200, {"errors": [{"message": "Unauthorized"}]}), None) is None
+
+
+def test_mutation_falls_back_only_on_explicit_answer():
+    # Ошибка мутации может прийти и после того, как отклик уже записан — повторять нельзя
+    assert _persisted_miss(_resp(200, {"errors": [{"message": "Order closed"}]}), None, read_only=False) is None
+    assert _persisted_miss(_resp(400, {"errors": [{"message": "Bad Request"}]}), None, read_only=False) is None
+    no_query = _resp(400, {"errors": [{"message": "GraphQL operations must contain a non-empty `query`. Must provide query string."}]})
+    assert _persisted_miss(no_query, None, read_only=False) == "unsupported"
@@ -0,0 +1,35 @@
+"""Порядок ставок конвейера, когда узкое место — ограничитель темпа."""
+import asyncio
+
+from sloggers.bot.pipeline import BidPipeline, PipelineConfig
+from sloggers.core.orders import Order
+
+
+def test_best_candidate_at_token_time_gets_the_bid():
+    async def run() -> list:
+        prefetched, placed = [], []
+
+        async def prefetch(order: Order) -> dict:
+            prefetched.append(order.id)
+            return {}
+
+        async def place(order: Order, info: dict) -> bool:
+            placed.append(order.id)
+            return True
+
+        config = PipelineConfig(per_minute=600, burst=1, prefetch_concurrency=1, queue_size=10, queue_polls=0)
+        pipeline = BidPipeline(prefetch, place, config)
+        pipeline.start()
+        pipeline.submit(Order(1), 1.0)
+        await asyncio.sleep(0.01)  # первый токен сразу, следующий — через 0.1 с
+        pipeline.submit(Order(2), 1.0)
+        await asyncio.sleep(0.01)  # обработчик взял заказ 2 и ждёт токен
+        pipeline.submit(Order(3), 5.0)
+        await pipeline.join()
+        await pipeline.aclose()
+        return [prefetched, placed]
+
+    prefetched, placed = asyncio.run(run())
+    assert placed == [1, 3, 2]
+    # Детали запрашиваются только с токеном — в том же порядке, что и ставки
+    assert prefetched == placed
@@ -0,0 +1,60 @@
+"""Оценка кандидатов по заказам в том виде, в каком их возвращает запрос ленты бота."""
+import time
+
+from sloggers.bot.filters import order_fields
+from sloggers.bot.scoring import OrderScorer, ScoringConfig
+from sloggers.core.orders import parse_orders
+from sloggers.network.queries import ORDER_FIELDS, auction_orders_query
+
+
+def _order(**fields) -> dict:
+    """Заказ с полями `orderDataFragment`, которые читает бот."""
+    now = int(time.time())
+    return {
+        "id": "11700000",
+        "type": {"id": 2, "name": "Курсовая работа"},
+        "category": {"id": 15, "name": "Экономика"},
+        "customer": {"id": "4242", "isOnline": False, "nickName": "user42"},
+        "badges": [],
+        "title": "Курсовая по экономике",
+        "description": "Нужна курсовая",
+        "budget": 1500,
+        "recommendedBudget": 2000,
+        "isPremium": False,
+        "creation": now - 60,
+        "deadline": str(now + 7 * 86400),
+        "customerFiles": [],
+        "countOffers": 1,
+        "authorHasOffer": False,
+        "isExpressOrder": False,
+        **fields,
+    }
+
+
+def _as_served(settings: dict, raw: dict) -> dict:
+    """Заказ, урезанный до полей, которые запрашивает `auction_orders_query` с этими настройками."""
+    text = auction_orders_query(order_fields(settings)).text
+    selection = text[text.index("orders {", text.index("orders(")):]
+    return {name: raw[name] for name, sel in ORDER_FIELDS.items() if f" {sel} " in selection and name in raw}
+
+
+def _flags_only(settings: dict) -> OrderScorer:
+    return OrderScorer(ScoringConfig.from_settings(settings))
+
+
+def test_premium_and_express_reach_the_scorer():
+    weights = {"freshness": 0, "budget": 0, "offers": 0, "online": 0, "category": 0, "premium": 0.5, "express": 0.25}
+    settings = {"scoring": {"weights": weights}}
+    raw = _order(isPremium=True, isExpressOrder=True)
+
+    served = _as_served(settings, raw)
+    assert "isPremium" in served and "isExpressOrder" in served
+    (order,) = parse_orders([served])
+    assert _flags_only(settings).score_batch([order]) == [0.75]
+
+
+def test_flags_not_requested_without_weights():
+    weights = {"premium": 0, "express": 0}
+    fields = order_fields({"scoring": {"weights": weights}})
+    assert "isPremium" not in fields and "isExpressOrder" not in fields
+    assert not {"isPremium", "isExpressOrder"} & order_fields({"scoring": {"enabled": False}})
@@ -0,0 +1,31 @@
+"""Ограниченный индекс увиденных заказов: что вытесняется при переполнении."""
+from sloggers.bot.seen_index import SeenOrderIndex
+from sloggers.core.database import Database
+
+
+def test_eviction_follows_creation_not_insertion(tmp_path):
+    db = Database(tmp_path / "seen.db")
+    seen = SeenOrderIndex(db, "acc", max_orders=3)
+    # Первая страница, затем старая страница при листании, затем новый заказ
+    for oid, creation in ((100, 100), (90, 90), (40, 40), (110, 110)):
+        seen.add(oid, creation)
+    assert len(seen) == 3
+    # Вытеснен самый ранний (40), а не первый добавленный (100)
+    assert seen.floor == 41
+    assert seen.is_seen(100, 100) and not seen.is_seen(95, 95)
+    assert seen.is_seen(30, 30)
+
+    seen.save()
+    reloaded = SeenOrderIndex(db, "acc", max_orders=3).load()
+    assert reloaded.floor == 41 and len(reloaded) == 3
+    reloaded.add(120, 120)
+    assert reloaded.floor == 91 and not reloaded.is_seen(95, 95) and reloaded.is_seen(60, 60)
+    db.close()
+
+
+def test_non_numeric_ids_are_not_tracked(tmp_path):
+    db = Database(tmp_path / "seen.db")
+    seen = SeenOrderIndex(db, "acc")
+    seen.add("abc", 100)
+    assert len(seen) == 0 and not seen.is_seen("abc", 100)
+    db.close()
@@ -0,0 +1,19 @@
+"""Изоляция аккаунтов в фоновом режиме."""
+import asyncio
+
+from sloggers.bot import supervisor
+from sloggers.bot.supervisor import AccountSpec, Supervisor
+
+
+def test_bad_settings_stop_only_their_account(monkeypatch):
+    monkeypatch.setattr(supervisor, "load_account_spec", lambda acc_id: None)
+    bad = AccountSpec("bad", "bad", {"filters": {"include_keywords": ["re:("]}})
+
+    async def run() -> None:
+        stop = asyncio.Event()
+        sup = Supervisor([bad], restart_delay=0.01)
+        # Ошибка конструктора не выходит из `run`: аккаунт уходит на перезапуск
+        await asyncio.wait_for(sup.run(stop), timeout=5)
+        assert sup.restarts["bad"] == 1
+
+    asyncio.run(run())